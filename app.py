@@ -1,10 +1,12 @@
 import streamlit as st
 import pandas as pd
-import time
 
 import services.database as db
+import services.database.assincrono as adb
 import ui.components as components
 import ui.styles as styles
+import ui.viewport as viewport
+from services.aquecimento import aquecer_caches, aguardar_aquecimento
 from services.auth import GerenciadorSenha
 from services.rate_limiter import registrar_tentativa, limpar_rate_limit_login
 from services.logging_module import LoggerStructurado
@@ -92,6 +94,8 @@ def tela_login():
                         st.session_state.usuario_nome = dados["nome"]
                         st.session_state.usuario_perfil = dados["perfil"]
                         logger.seguranca("LOGIN_SUCESSO", {"usuario": user, "perfil": dados["perfil"]})
+                        # Leituras da primeira tela já começam em segundo plano
+                        st.session_state.aquecimento = aquecer_caches(dados["perfil"], usuario=user)
                         st.rerun()
                     else:
                         # ✅ Login falhou - registra tentativa e verifica rate limiting
@@ -123,10 +127,16 @@ if not st.session_state.logado:
     tela_login()
 else:
     # 3.1. Dados Globais
+    # Primeiro rerun após o login: espera o pré-carregamento para desenhar do cache
+    aguardar_aquecimento(st.session_state.pop("aquecimento", None))
     try:
         hash_dados = db.obter_versao_planilha()
     except Exception:
-        hash_dados = time.time()
+        hash_dados = None
+
+    # Métricas da sidebar buscadas em paralelo com as consultas da página;
+    # os cards são preenchidos no fim do script (ver _mostrar_metricas)
+    futuro_metricas = adb.get_metricas(versao=hash_dados)
 
     NOME_USER = st.session_state.usuario_nome
     PERFIL = st.session_state.usuario_perfil
@@ -134,6 +144,9 @@ else:
     # Injeta o CSS global baseado no perfil
     styles.aplicar_estilos(perfil=PERFIL)
 
+    # Largura da tela: medida uma vez por sessão; as páginas só leem o valor
+    viewport.medir()
+
     # ✅ 3.2. MENU NA SIDEBAR (hambúrguer no mobile)
     with st.sidebar:
         st.image("assets/imagem da empresa.jpg", use_container_width=True)
@@ -169,16 +182,23 @@ else:
 
         st.markdown("---")
         # --- Resumo (métricas) no final do menu ---
-        try:
-            qtd_cli, qtd_ped = db.get_metricas(_hash_versao=hash_dados)
-        except Exception:
-            qtd_cli, qtd_ped = "-", "-"
-
-        components.render_metric_card("👥 Total Clientes", qtd_cli, "#58a6ff", compact=True)
-        components.render_metric_card("📦 Pedidos Totais", qtd_ped, "#f1e05a", compact=True)
-        components.render_metric_card("👤 Usuário Logado", NOME_USER, "#238636", compact=True)
+        painel_metricas = st.container()
+
+        def _mostrar_metricas():
+            try:
+                qtd_cli, qtd_ped = futuro_metricas.result()
+            except Exception:
+                qtd_cli, qtd_ped = "-", "-"
+            with painel_metricas:
+                components.render_metric_card("👥 Total Clientes", qtd_cli, "#58a6ff", compact=True)
+                components.render_metric_card("📦 Pedidos Totais", qtd_ped, "#f1e05a", compact=True)
+                components.render_metric_card("👤 Usuário Logado", NOME_USER, "#238636", compact=True)
 
         st.markdown("---")
+        # sinal explícito de redimensionamento (ex.: celular girado)
+        if st.button("📱 Ajustar à Tela", use_container_width=True):
+            viewport.remedir()
+            st.rerun()
         if st.button("🚪 Sair", use_container_width=True):
             st.session_state.logado = False
             st.session_state.filtro_status_dash = None
@@ -211,6 +231,7 @@ else:
             st.rerun()
 
         page_gerenciar_edicao.render_page(hash_dados, PERFIL, NOME_USER)
+        _mostrar_metricas()
         st.stop()
 
     # ✅ ESSENCIAL: escolha_nav sempre definido (vem do menu da sidebar)
@@ -233,3 +254,5 @@ else:
 
     elif escolha_nav == "🐟 Recebimento de Salmão":
         page_salmao.render_page(hash_dados, PERFIL, NOME_USER)
+
+    _mostrar_metricas()
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark da exportação do histórico de pedidos: DataFrame inteiro x lotes em arquivo.
+
+Mede o pico de memória alocada pelo Python (tracemalloc) durante a
+exportação CSV e XLSX de todos os pedidos. "Antes" junta todas as linhas em
+um DataFrame e grava com pandas; "depois" usa `lotes_pedidos` +
+`exportar_em_arquivo`. O banco em memória é montado antes da medição, então
+só o custo da exportação entra na conta.
+
+Roda sobre o banco em memória (não precisa de Supabase):
+    python benchmarks/exportacao_historico.py [quantidades_de_pedidos...]
+"""
+import io
+import os
+import random
+import sys
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ.setdefault("MODELO_LOCAL_ARQUIVO", "")
+
+import pandas as pd  # noqa: E402
+
+import services.database as db  # noqa: E402
+from services.database.memoria import BancoMemoria  # noqa: E402
+from services.exportacao import descartar_arquivo, exportar_em_arquivo  # noqa: E402
+
+STATUS = ["PENDENTE", "GERADO", "ENTREGUE", "ORÇAMENTO", "RESERVADO", "NÃO GERADO"]
+PAGAMENTOS = ["PIX", "BOLETO", "DINHEIRO", "CARTÃO"]
+
+
+def montar_banco(qtd_pedidos):
+    random.seed(42)
+    return BancoMemoria({"pedidos": [{
+        "ID_PEDIDO": i,
+        "COD CLIENTE": i % 800,
+        "NOME CLIENTE": f"CLIENTE {i % 800:05d}",
+        "CIDADE": "SÃO CARLOS",
+        "STATUS": random.choice(STATUS),
+        "DIA DA ENTREGA": f"{random.randint(1, 28):02d}/{random.randint(1, 12):02d}/2026",
+        "PEDIDO": f"{random.randint(1, 20)}kg salmão fresco",
+        "PAGAMENTO": random.choice(PAGAMENTOS),
+        "NR PEDIDO": "",
+        "OBSERVAÇÃO": "",
+        "ROTA": "ROTA 1",
+    } for i in range(1, qtd_pedidos + 1)]})
+
+
+def _antes(formato):
+    df = pd.concat(list(db.lotes_pedidos()), ignore_index=True)
+    buffer = io.BytesIO()
+    if formato == "csv":
+        df.to_csv(buffer, sep=";", index=False)
+    else:
+        with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
+            df.to_excel(writer, index=False, sheet_name="Pedidos")
+
+
+def _depois(formato):
+    descartar_arquivo(exportar_em_arquivo(db.lotes_pedidos(), formato, aba="Pedidos"))
+
+
+def pico(funcao, formato):
+    tracemalloc.start()
+    try:
+        funcao(formato)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def _mb(numero):
+    return f"{numero / 1024 / 1024:.1f} MB"
+
+
+def main():
+    quantidades = [int(q) for q in sys.argv[1:]] or [10_000, 50_000]
+
+    print("=" * 66)
+    print("📤 EXPORTAÇÃO DO HISTÓRICO DE PEDIDOS - pico de memória")
+    print("=" * 66)
+    print(f"{'Pedidos':>10}  {'Formato':<8}{'DataFrame inteiro':>20}{'Lotes em arquivo':>20}")
+    for qtd in quantidades:
+        banco = montar_banco(qtd)
+        with db.usar_banco(banco):
+            for formato in ("csv", "xlsx"):
+                antes, depois = pico(_antes, formato), pico(_depois, formato)
+                print(f"{qtd:>10,}  {formato:<8}{_mb(antes):>20}{_mb(depois):>20}".replace(",", "."))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark de memória dos DataFrames: object (antes) x esquema tipado (depois).
+
+Mede `memory_usage(deep=True)` de cada resultado guardado em cache (um por
+processo, compartilhado entre as sessões) e do que cada sessão guarda em
+`st.session_state` (faixa de tags do salmão). "Antes" é o DataFrame montado
+direto das linhas, como os leitores faziam (com select("*") no estoque);
+"depois" é o retorno dos leitores atuais.
+
+Roda sobre o banco em memória (não precisa de Supabase):
+    python benchmarks/memoria_dataframes.py [quantidade_de_pedidos]
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+os.environ.setdefault("MODELO_LOCAL_ARQUIVO", "")
+
+import pandas as pd  # noqa: E402
+
+import services.database as db  # noqa: E402
+from services.database.esquemas import select_do_esquema  # noqa: E402
+from services.database.memoria import BancoMemoria  # noqa: E402
+from services.database.pedidos import _COLUNAS_VISUALIZACAO  # noqa: E402
+
+STATUS = ["PENDENTE", "GERADO", "ENTREGUE", "ORÇAMENTO", "RESERVADO", "NÃO GERADO"]
+PAGAMENTOS = ["PIX", "BOLETO", "DINHEIRO", "CARTÃO"]
+CIDADES = ["SÃO CARLOS", "ARARAQUARA", "RIBEIRÃO PRETO", "CAMPINAS", "LIMEIRA", "RIO CLARO"]
+ROTAS = ["ROTA 1", "ROTA 2", "ROTA 3", "CLIENTE VEM BUSCAR"]
+STATUS_SALMAO = [None, "Livre", "Gerado", "Orçamento", "Reservado"]
+CALIBRES = ["8/10", "10/12", "12/14", "14/16"]
+
+
+def montar_banco(qtd_pedidos):
+    random.seed(42)
+    qtd_clientes = max(qtd_pedidos // 25, 10)
+    clientes = [{
+        "Código": c,
+        "Cliente": f"CLIENTE {c:05d}",
+        "Nome Cidade": random.choice(CIDADES),
+        "CPF/CNPJ": f"{random.randrange(10**10, 10**11)}",
+        "ROTA": random.choice(ROTAS),
+    } for c in range(1, qtd_clientes + 1)]
+    pedidos = []
+    for i in range(1, qtd_pedidos + 1):
+        cliente = random.choice(clientes)
+        pedidos.append({
+            "ID_PEDIDO": i,
+            "CARIMBO DE DATA/HORA": f"{random.randint(1, 28):02d}/01/2026 10:00:00",
+            "COD CLIENTE": cliente["Código"],
+            "NOME CLIENTE": cliente["Cliente"],
+            "CIDADE": cliente["Nome Cidade"],
+            "STATUS": random.choice(STATUS),
+            "DIA DA ENTREGA": f"{random.randint(1, 28):02d}/{random.randint(1, 12):02d}/2026",
+            "PEDIDO": f"{random.randint(1, 20)}kg salmão fresco",
+            "PAGAMENTO": random.choice(PAGAMENTOS),
+            "NR PEDIDO": str(random.randint(1000, 9999)) if random.random() < 0.5 else "",
+            "OBSERVAÇÃO": "",
+            "ROTA": cliente["ROTA"],
+        })
+    estoque = [{
+        "Tag": t,
+        "Status": random.choice(STATUS_SALMAO),
+        "Calibre": random.choice(CALIBRES),
+        "Peso": round(random.uniform(2, 8), 3),
+        "Cliente": random.choice(clientes)["Cliente"] if random.random() < 0.3 else None,
+        "Fornecedor": random.choice(["SALMONES", "AQUACHILE", "MULTIEXPORT"]),
+        "Validade": f"{random.randint(1, 28):02d}/{random.randint(1, 12):02d}/2027",
+    } for t in range(1, 5001)]
+    return BancoMemoria({"clientes": clientes, "pedidos": pedidos, "estoque_salmao": estoque})
+
+
+def _df_objeto(banco, tabela, colunas, limite=None, desc=False, chave=None):
+    consulta = banco.table(tabela).select(colunas)
+    if chave:
+        consulta = consulta.order(chave, desc=desc)
+    if limite:
+        consulta = consulta.limit(limite)
+    return pd.DataFrame(consulta.execute().data)
+
+
+def medir(qtd_pedidos):
+    banco = montar_banco(qtd_pedidos)
+    visualizacao = select_do_esquema("pedidos", _COLUNAS_VISUALIZACAO)
+    pagina = select_do_esquema("pedidos")
+    with db.usar_banco(banco):
+        estoque_antes = _df_objeto(banco, "estoque_salmao", "*", limite=1000, chave="Tag")
+        estoque_antes["Tag"] = estoque_antes["Tag"].astype(int)
+        estoque = db.get_estoque_filtrado(1, 1000)
+        medicoes = [
+            ("cache", "buscar_pedidos_visualizacao",
+             _df_objeto(banco, "pedidos", visualizacao, limite=5000, desc=True, chave="ID_PEDIDO"),
+             db.buscar_pedidos_visualizacao()),
+            ("cache", "listar_clientes_rotas",
+             _df_objeto(banco, "clientes", 'Cliente, "Nome Cidade", ROTA'),
+             db.listar_clientes_rotas()),
+            ("cache", "buscar_pedidos_paginado (20)",
+             _df_objeto(banco, "pedidos", pagina, limite=20, desc=True, chave="ID_PEDIDO"),
+             db.buscar_pedidos_paginado(tamanho_pagina=20)[0]),
+            ("cache", "get_estoque_filtrado (1000 tags)", estoque_antes, estoque),
+            # Cada sessão guarda sua cópia da faixa em st.session_state.salmao_df
+            ("sessão", "salmao_df (1000 tags)", estoque_antes, estoque),
+        ]
+    return [
+        (escopo, nome, antes.memory_usage(deep=True).sum(), depois.memory_usage(deep=True).sum())
+        for escopo, nome, antes, depois in medicoes
+    ]
+
+
+def _fmt(numero):
+    return f"{numero:,}".replace(",", ".")
+
+
+def main():
+    qtd_pedidos = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    medicoes = medir(qtd_pedidos)
+
+    print("=" * 78)
+    print(f"🧠 MEMÓRIA DOS DATAFRAMES - {_fmt(qtd_pedidos)} pedidos")
+    print("=" * 78)
+    print(f"{'Escopo':<8}{'Leitura':<36}{'Antes (bytes)':>14}{'Depois (bytes)':>16}")
+    totais = {}
+    for escopo, nome, antes, depois in medicoes:
+        print(f"{escopo:<8}{nome:<36}{_fmt(antes):>14}{_fmt(depois):>16}  {antes / max(depois, 1):.1f}x")
+        t_antes, t_depois = totais.get(escopo, (0, 0))
+        totais[escopo] = (t_antes + antes, t_depois + depois)
+    print("-" * 78)
+    for escopo, (antes, depois) in totais.items():
+        print(f"Total por {escopo:<34}{_fmt(antes):>14}{_fmt(depois):>16}  {antes / max(depois, 1):.1f}x")
+
+
+if __name__ == "__main__":
+    main()
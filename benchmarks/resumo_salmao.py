@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark do resumo do salmão: RPC agregada x download da coluna Status.
+
+Roda sobre o banco em memória (não precisa de Supabase):
+    python benchmarks/resumo_salmao.py [quantidade_de_tags]
+"""
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SUPABASE_URL", "http://localhost")
+os.environ.setdefault("SUPABASE_KEY", "benchmark")
+
+import services.database as db  # noqa: E402
+from services.database.memoria import BancoMemoria  # noqa: E402
+
+STATUS = [None, "Livre", "Gerado", "Aberto", "Orçamento", "Reservado", "gerado "]
+
+
+def medir(qtd_tags, rpcs=None):
+    random.seed(42)
+    banco = BancoMemoria({
+        "estoque_salmao": [{"Tag": t, "Status": random.choice(STATUS)} for t in range(1, qtd_tags + 1)],
+        "estoque_salmao_backup": [{"Tag": t} for t in range(1, qtd_tags // 10 + 1)],
+    }, rpcs=rpcs)
+    with db.usar_banco(banco):
+        db.get_resumo_global_salmao.clear()
+        resumo = db.get_resumo_global_salmao()
+    return resumo, banco.requisicoes, banco.bytes_respostas
+
+
+def _fmt(numero):
+    return f"{numero:,}".replace(",", ".")
+
+
+def main():
+    qtd_tags = int(sys.argv[1]) if len(sys.argv) > 1 else 50_000
+    resumo_rpc, req_rpc, bytes_rpc = medir(qtd_tags)
+    resumo_cli, req_cli, bytes_cli = medir(qtd_tags, rpcs={})
+    assert resumo_rpc == resumo_cli, "RPC e fallback devem dar o mesmo resumo"
+
+    print("=" * 60)
+    print(f"📊 RESUMO DO SALMÃO - {_fmt(qtd_tags)} tags")
+    print("=" * 60)
+    # As requisições incluem a leitura da versão dos dados (cache_por_versao)
+    print(f"Sem RPC (coluna Status): {req_cli} requisições, {_fmt(bytes_cli):>12} bytes")
+    print(f"Com RPC agregada:        {req_rpc} requisições, {_fmt(bytes_rpc):>12} bytes")
+    print(f"Redução do payload: {bytes_cli / max(bytes_rpc, 1):.0f}x")
+    print(f"Resumo: {resumo_rpc}")
+
+
+if __name__ == "__main__":
+    main()
@@ -26,6 +26,30 @@ if not SUPABASE_URL or not SUPABASE_KEY:
 
 FUSO_BR = pytz.timezone("America/Sao_Paulo")
 
+# --- BANCO DE DADOS ---
+# Quantos IDs cada processo reserva por vez (pedidos/clientes)
+TAMANHO_BLOCO_IDS = int(os.getenv("TAMANHO_BLOCO_IDS", "10"))
+
+# Cópia local (SQLite) de pedidos, clientes e estoque_salmao; vazio desativa
+MODELO_LOCAL_ARQUIVO = os.getenv("MODELO_LOCAL_ARQUIVO", ".cache/modelo_local.sqlite")
+
+# Pool HTTP compartilhado por todas as sessões (services/database/conexoes.py)
+HTTP_MAX_CONEXOES = int(os.getenv("HTTP_MAX_CONEXOES", "20"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "10"))
+HTTP_KEEPALIVE_SEGUNDOS = float(os.getenv("HTTP_KEEPALIVE_SEGUNDOS", "60"))
+HTTP_TIMEOUT_SEGUNDOS = float(os.getenv("HTTP_TIMEOUT_SEGUNDOS", "15"))
+HTTP_TIMEOUT_CONEXAO = float(os.getenv("HTTP_TIMEOUT_CONEXAO", "5"))
+HTTP_TIMEOUT_POOL = float(os.getenv("HTTP_TIMEOUT_POOL", "10"))
+# "auto" usa HTTP/2 se o pacote h2 estiver instalado; "0"/"1" força
+HTTP2 = os.getenv("HTTP2", "auto").lower()
+
+# Linhas por página na tabela de pedidos (Gerenciar/Operações)
+TAMANHO_PAGINA_PEDIDOS = 20
+# Acima disso a exportação sugere CSV (XLSX grande demora a gerar e a abrir)
+LIMITE_EXPORTACAO_XLSX = int(os.getenv("LIMITE_EXPORTACAO_XLSX", "100000"))
+# Quanto o primeiro rerun após o login espera o pré-carregamento (services/aquecimento.py)
+AQUECIMENTO_ESPERA_SEGUNDOS = float(os.getenv("AQUECIMENTO_ESPERA_SEGUNDOS", "5"))
+
 
 # --- REGRAS DE NEGÓCIO (VALIDADE) ---
 DIAS_ALERTA_AMARELO = 7  
@@ -72,4 +96,15 @@ PALETA_CORES = {
             "bg_card_sutil": "rgba(0, 31, 63, 0.2)" # Fundo translúcido azulado
         }
     }
-}
\ No newline at end of file
+}
+
+# Marcador de status nas tabelas (mesma cor da PALETA_CORES["STATUS"], como texto)
+ICONES_STATUS = {
+    "PENDENTE": "🟡",
+    "GERADO": "🟠",
+    "NÃO GERADO": "🔴",
+    "CANCELADO": "❌",
+    "ENTREGUE": "🟢",
+    "ORÇAMENTO": "⚪",
+    "RESERVADO": "🔵"
+}
@@ -0,0 +1,33 @@
+-- 001 - Contadores de ID reservados por bloco
+-- Executar no Supabase SQL Editor.
+--
+-- Substitui o "maior ID + 1" feito pelo app antes de cada insert em
+-- pedidos/clientes. Cada processo reserva um bloco de IDs de uma vez
+-- (services/database/ids.py); o UPDATE ... RETURNING é atômico, então
+-- dois operadores nunca recebem o mesmo ID.
+
+CREATE TABLE IF NOT EXISTS contadores_id (
+    tabela    TEXT PRIMARY KEY,
+    ultimo_id BIGINT NOT NULL DEFAULT 0
+);
+
+-- Parte do maior ID já existente em cada tabela
+INSERT INTO contadores_id (tabela, ultimo_id)
+SELECT 'pedidos', COALESCE(MAX("ID_PEDIDO"), 0) FROM pedidos
+ON CONFLICT (tabela) DO NOTHING;
+
+INSERT INTO contadores_id (tabela, ultimo_id)
+SELECT 'clientes', COALESCE(MAX("Código"), 0) FROM clientes
+ON CONFLICT (tabela) DO NOTHING;
+
+-- Reserva p_quantidade IDs e retorna o último ID do bloco reservado
+CREATE OR REPLACE FUNCTION reservar_ids(p_tabela TEXT, p_quantidade INTEGER DEFAULT 1)
+RETURNS BIGINT
+LANGUAGE sql
+AS $$
+    INSERT INTO contadores_id AS c (tabela, ultimo_id)
+    VALUES (p_tabela, GREATEST(p_quantidade, 1))
+    ON CONFLICT (tabela) DO UPDATE
+        SET ultimo_id = c.ultimo_id + GREATEST(p_quantidade, 1)
+    RETURNING ultimo_id;
+$$;
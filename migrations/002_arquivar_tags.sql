@@ -0,0 +1,52 @@
+-- 002 - Arquivamento de tags em uma única transação
+-- Executar no Supabase SQL Editor.
+--
+-- Faz no servidor, para uma lista inteira de tags, o que o app fazia tag a
+-- tag: backup da tag e das subtags, exclusão das subtags, reset da tag e
+-- log. Usada por services/database/salmao.arquivar_tags_geradas.
+
+CREATE OR REPLACE FUNCTION arquivar_tags(p_tags BIGINT[], p_usuario TEXT, p_data_hora TEXT)
+RETURNS INTEGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_cols_tag TEXT;
+    v_cols_sub TEXT;
+    v_total    INTEGER;
+BEGIN
+    -- Copia todas as colunas de origem (mesmo comportamento do insert feito pelo app)
+    SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+      INTO v_cols_tag
+      FROM information_schema.columns
+     WHERE table_schema = 'public' AND table_name = 'estoque_salmao';
+
+    SELECT string_agg(quote_ident(column_name), ', ' ORDER BY ordinal_position)
+      INTO v_cols_sub
+      FROM information_schema.columns
+     WHERE table_schema = 'public' AND table_name = 'estoque_subtags';
+
+    EXECUTE format(
+        'INSERT INTO estoque_salmao_backup (%s) SELECT %s FROM estoque_salmao WHERE "Tag" = ANY($1)',
+        v_cols_tag, v_cols_tag
+    ) USING p_tags;
+
+    EXECUTE format(
+        'INSERT INTO estoque_subtags_backup (%s) SELECT %s FROM estoque_subtags WHERE "ID_Pai" = ANY($1)',
+        v_cols_sub, v_cols_sub
+    ) USING p_tags;
+
+    DELETE FROM estoque_subtags WHERE "ID_Pai" = ANY(p_tags);
+
+    UPDATE estoque_salmao
+       SET "Status" = NULL, "Calibre" = NULL, "Peso" = 0,
+           "Cliente" = NULL, "Fornecedor" = NULL, "Validade" = NULL
+     WHERE "Tag" = ANY(p_tags);
+    GET DIAGNOSTICS v_total = ROW_COUNT;
+
+    INSERT INTO logs ("DATA_HORA", "USUARIO", "CAMPO", "VALOR_ANTIGO", "VALOR_NOVO")
+    SELECT p_data_hora, p_usuario, 'ARQUIVAMENTO_RESET', 'TAG-' || t, 'Reset Total (Status None)'
+      FROM unnest(p_tags) AS t;
+
+    RETURN v_total;
+END;
+$$;
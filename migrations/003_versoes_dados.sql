@@ -0,0 +1,48 @@
+-- 003 - Versão dos dados por tabela
+-- Executar no Supabase SQL Editor.
+--
+-- Cada escrita (INSERT/UPDATE/DELETE/TRUNCATE) nas tabelas abaixo incrementa
+-- o contador da tabela em `versoes_dados`. O app lê esses contadores em
+-- services/database/cache.obter_versao_planilha e só refaz as leituras
+-- cacheadas quando a tabela de que dependem muda.
+
+CREATE TABLE IF NOT EXISTS versoes_dados (
+    tabela TEXT PRIMARY KEY,
+    versao BIGINT NOT NULL DEFAULT 0
+);
+
+CREATE OR REPLACE FUNCTION incrementar_versao_dados()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO versoes_dados (tabela, versao)
+    VALUES (TG_TABLE_NAME, 1)
+    ON CONFLICT (tabela) DO UPDATE SET versao = versoes_dados.versao + 1;
+    RETURN NULL;
+END;
+$$;
+
+-- Um trigger por comando (não por linha): um upsert em lote conta uma vez só
+DO $$
+DECLARE
+    v_tabela TEXT;
+BEGIN
+    FOREACH v_tabela IN ARRAY ARRAY[
+        'pedidos', 'clientes', 'logs',
+        'estoque_salmao', 'estoque_subtags',
+        'estoque_salmao_backup', 'estoque_subtags_backup'
+    ] LOOP
+        INSERT INTO versoes_dados (tabela, versao) VALUES (v_tabela, 0)
+        ON CONFLICT (tabela) DO NOTHING;
+
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_versao_dados ON %I', v_tabela);
+        EXECUTE format(
+            'CREATE TRIGGER trg_versao_dados
+                AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON %I
+                FOR EACH STATEMENT EXECUTE FUNCTION incrementar_versao_dados()',
+            v_tabela
+        );
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,9 @@
+-- 004 - Índices da paginação por cursor
+-- Executar no Supabase SQL Editor.
+--
+-- A listagem de clientes pagina por (Cliente, Código); com este índice cada
+-- página é uma leitura curta do índice, em qualquer profundidade. Pedidos
+-- paginam por ID_PEDIDO, que já é a chave primária.
+
+CREATE INDEX IF NOT EXISTS clientes_cliente_codigo_idx
+    ON clientes ("Cliente", "Código");
@@ -0,0 +1,26 @@
+-- 005 - Resumo do estoque de salmão agregado no servidor
+-- Executar no Supabase SQL Editor.
+--
+-- Devolve a contagem de tags por Status (poucas linhas, qualquer que seja o
+-- tamanho do estoque) e o total do histórico de backup, em uma requisição.
+-- Usada por services/database/salmao.get_resumo_global_salmao.
+--
+-- Formato: {"status": [{"status": "Livre", "quantidade": 10}, ...], "historico": 42}
+
+CREATE OR REPLACE FUNCTION resumo_status_salmao()
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'status', COALESCE((
+            SELECT jsonb_agg(jsonb_build_object('status', "Status", 'quantidade', quantidade))
+              FROM (
+                  SELECT "Status", count(*) AS quantidade
+                    FROM estoque_salmao
+                   GROUP BY "Status"
+              ) AS por_status
+        ), '[]'::jsonb),
+        'historico', (SELECT count(*) FROM estoque_salmao_backup)
+    );
+$$;
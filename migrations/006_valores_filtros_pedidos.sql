@@ -0,0 +1,31 @@
+-- 006 - Valores distintos para os filtros de pedidos
+-- Executar no Supabase SQL Editor.
+--
+-- Devolve todas as cidades e rotas que aparecem em pedidos (SELECT DISTINCT
+-- no servidor), inclusive as que só existem em pedidos antigos. Os índices
+-- permitem responder lendo só o índice, sem varrer a tabela.
+-- Usada por services/database/pedidos.listar_dados_filtros.
+--
+-- Formato: {"cidades": ["CIDADE A", ...], "rotas": ["ROTA 1", ...]}
+
+CREATE INDEX IF NOT EXISTS pedidos_cidade_idx ON pedidos ("CIDADE");
+CREATE INDEX IF NOT EXISTS pedidos_rota_idx ON pedidos ("ROTA");
+
+CREATE OR REPLACE FUNCTION valores_filtros_pedidos()
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    SELECT jsonb_build_object(
+        'cidades', COALESCE((
+            SELECT jsonb_agg(cidade ORDER BY cidade)
+              FROM (SELECT DISTINCT "CIDADE"::TEXT AS cidade FROM pedidos) AS c
+             WHERE btrim(cidade) <> ''
+        ), '[]'::jsonb),
+        'rotas', COALESCE((
+            SELECT jsonb_agg(rota ORDER BY rota)
+              FROM (SELECT DISTINCT "ROTA"::TEXT AS rota FROM pedidos) AS r
+             WHERE btrim(rota) <> ''
+        ), '[]'::jsonb)
+    );
+$$;
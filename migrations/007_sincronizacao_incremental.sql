@@ -0,0 +1,54 @@
+-- 007 - Marcas d'água para a sincronização incremental do modelo local
+-- Executar no Supabase SQL Editor.
+--
+-- O app mantém uma cópia local (SQLite) de pedidos, clientes e estoque_salmao
+-- (services/database/modelo_local.py) e, quando a versão de uma tabela muda,
+-- busca só o que mudou desde a última sincronização:
+--   - pedidos: ID_PEDIDO maior que o último visto + pedidos citados em logs
+--     com ID_LOG maior que o último visto;
+--   - clientes e estoque_salmao: linhas com ALTERADO_EM maior que o último visto.
+-- Sem esta migração, o app recarrega a tabela inteira quando ela muda.
+--
+-- estoque_salmao_backup recebe a coluna também: o arquivamento (arquivar_tags,
+-- migração 002, e o fallback em services/database/salmao.py) copia todas as
+-- colunas de estoque_salmao para o backup.
+
+-- Sequência crescente nos logs (DATA_HORA é texto dd/mm/aaaa e não ordena)
+ALTER TABLE logs ADD COLUMN IF NOT EXISTS "ID_LOG" BIGINT GENERATED BY DEFAULT AS IDENTITY;
+CREATE INDEX IF NOT EXISTS logs_id_log_idx ON logs ("ID_LOG");
+
+-- Carimbo da última alteração de cada linha
+CREATE OR REPLACE FUNCTION carimbar_alterado_em()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW."ALTERADO_EM" := now();
+    RETURN NEW;
+END;
+$$;
+
+ALTER TABLE clientes ADD COLUMN IF NOT EXISTS "ALTERADO_EM" TIMESTAMPTZ NOT NULL DEFAULT now();
+ALTER TABLE estoque_salmao ADD COLUMN IF NOT EXISTS "ALTERADO_EM" TIMESTAMPTZ NOT NULL DEFAULT now();
+-- Sem trigger no backup: a linha arquivada guarda o carimbo que tinha no estoque
+ALTER TABLE estoque_salmao_backup ADD COLUMN IF NOT EXISTS "ALTERADO_EM" TIMESTAMPTZ NOT NULL DEFAULT now();
+
+DO $$
+DECLARE
+    v_tabela TEXT;
+BEGIN
+    FOREACH v_tabela IN ARRAY ARRAY['clientes', 'estoque_salmao'] LOOP
+        EXECUTE format(
+            'CREATE INDEX IF NOT EXISTS %I ON %I ("ALTERADO_EM")',
+            v_tabela || '_alterado_em_idx', v_tabela
+        );
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_alterado_em ON %I', v_tabela);
+        EXECUTE format(
+            'CREATE TRIGGER trg_alterado_em
+                BEFORE INSERT OR UPDATE ON %I
+                FOR EACH ROW EXECUTE FUNCTION carimbar_alterado_em()',
+            v_tabela
+        );
+    END LOOP;
+END;
+$$;
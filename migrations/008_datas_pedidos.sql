@@ -0,0 +1,76 @@
+-- 008 - Datas nativas em pedidos
+-- Executar no Supabase SQL Editor. Depois, preencher os pedidos antigos:
+--     python preencher_datas_pedidos.py
+--
+-- "DIA DA ENTREGA" e "CARIMBO DE DATA/HORA" são texto dd/mm/aaaa: não ordenam
+-- nem permitem filtro por período no servidor. As colunas novas guardam o
+-- mesmo valor como DATE/TIMESTAMPTZ; salvar_pedido grava as duas formas e os
+-- filtros de período (data_inicio/data_fim) usam DATA_ENTREGA.
+
+ALTER TABLE pedidos ADD COLUMN IF NOT EXISTS "DATA_ENTREGA" DATE;
+ALTER TABLE pedidos ADD COLUMN IF NOT EXISTS "CRIADO_EM" TIMESTAMPTZ;
+
+CREATE INDEX IF NOT EXISTS pedidos_data_entrega_idx ON pedidos ("DATA_ENTREGA");
+CREATE INDEX IF NOT EXISTS pedidos_criado_em_idx ON pedidos ("CRIADO_EM");
+
+-- Conversões que devolvem NULL para texto inválido (ex.: 31/02/2024)
+CREATE OR REPLACE FUNCTION data_br(p_texto TEXT)
+RETURNS DATE
+LANGUAGE plpgsql
+IMMUTABLE
+AS $$
+BEGIN
+    RETURN to_date(btrim(p_texto), 'DD/MM/YYYY');
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION carimbo_br(p_texto TEXT)
+RETURNS TIMESTAMPTZ
+LANGUAGE plpgsql
+STABLE
+AS $$
+BEGIN
+    -- O carimbo é gravado no horário de Brasília (core/config.FUSO_BR)
+    RETURN to_timestamp(btrim(p_texto), 'DD/MM/YYYY HH24:MI:SS')::TIMESTAMP
+        AT TIME ZONE 'America/Sao_Paulo';
+EXCEPTION WHEN others THEN
+    RETURN NULL;
+END;
+$$;
+
+-- Preenche um lote de pedidos com ID_PEDIDO > p_apos. Cada chamada é uma
+-- transação curta; o script chama de novo com "ultimo" até ele vir nulo.
+-- Formato: {"ultimo": 5000, "atualizados": 4987}
+CREATE OR REPLACE FUNCTION preencher_datas_pedidos(p_apos BIGINT DEFAULT 0, p_lote INT DEFAULT 5000)
+RETURNS JSONB
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_ultimo BIGINT;
+    v_atualizados INT;
+BEGIN
+    SELECT max(lote."ID_PEDIDO") INTO v_ultimo
+      FROM (
+          SELECT "ID_PEDIDO" FROM pedidos
+           WHERE "ID_PEDIDO" > p_apos
+           ORDER BY "ID_PEDIDO"
+           LIMIT p_lote
+      ) AS lote;
+
+    IF v_ultimo IS NULL THEN
+        RETURN jsonb_build_object('ultimo', NULL, 'atualizados', 0);
+    END IF;
+
+    UPDATE pedidos
+       SET "DATA_ENTREGA" = COALESCE("DATA_ENTREGA", data_br("DIA DA ENTREGA"::TEXT)),
+           "CRIADO_EM" = COALESCE("CRIADO_EM", carimbo_br("CARIMBO DE DATA/HORA"::TEXT))
+     WHERE "ID_PEDIDO" > p_apos
+       AND "ID_PEDIDO" <= v_ultimo
+       AND ("DATA_ENTREGA" IS NULL OR "CRIADO_EM" IS NULL);
+    GET DIAGNOSTICS v_atualizados = ROW_COUNT;
+
+    RETURN jsonb_build_object('ultimo', v_ultimo, 'atualizados', v_atualizados);
+END;
+$$;
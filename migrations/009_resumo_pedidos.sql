@@ -0,0 +1,169 @@
+-- 009 - Resumo diário de pedidos para os indicadores
+-- Executar no Supabase SQL Editor, depois da 008.
+--
+-- `resumo_pedidos` guarda quantos pedidos existem por (data de entrega,
+-- status, pagamento, cliente). Um trigger em `pedidos` ajusta as contagens na
+-- mesma transação de cada INSERT/UPDATE/DELETE, então o resumo nunca fica
+-- atrasado em relação às escritas de services/database/pedidos.py.
+-- A RPC `resumo_dashboard` soma o resumo de um período e devolve só os
+-- totais que o dashboard desenha: vários anos custam o mesmo que uma semana.
+--
+-- Pedidos sem data de entrega válida ficam com DATA_ENTREGA = '-infinity':
+-- entram em "Tudo" e ficam fora de qualquer período.
+-- `recalcular_resumo_pedidos()` refaz o resumo do zero (carga inicial ou
+-- conferência periódica).
+--
+-- As chaves de texto passam por `chave_resumo` (btrim de espaço, tab e
+-- quebra de linha; NULL vira ''), a mesma normalização do cálculo local em
+-- services/database/pedidos.py. "COD CLIENTE" é guardado como texto: o
+-- trigger não pode falhar (e abortar a escrita em `pedidos`) por um código
+-- vazio ou não numérico.
+
+CREATE TABLE IF NOT EXISTS resumo_pedidos (
+    "DATA_ENTREGA" DATE NOT NULL,
+    "STATUS" TEXT NOT NULL,
+    "PAGAMENTO" TEXT NOT NULL,
+    "COD CLIENTE" TEXT NOT NULL,
+    "NOME CLIENTE" TEXT NOT NULL,
+    "QTD" INT NOT NULL,
+    PRIMARY KEY ("DATA_ENTREGA", "STATUS", "PAGAMENTO", "COD CLIENTE", "NOME CLIENTE")
+);
+
+-- Reexecução sobre uma versão anterior desta migração (código BIGINT)
+ALTER TABLE resumo_pedidos ALTER COLUMN "COD CLIENTE" TYPE TEXT USING "COD CLIENTE"::TEXT;
+DROP FUNCTION IF EXISTS ajustar_resumo_pedidos(DATE, TEXT, TEXT, BIGINT, TEXT, INT);
+
+CREATE OR REPLACE FUNCTION chave_resumo(p_valor TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT COALESCE(btrim(p_valor, E' \t\r\n'), '');
+$$;
+
+CREATE OR REPLACE FUNCTION ajustar_resumo_pedidos(
+    p_data DATE, p_status TEXT, p_pagamento TEXT, p_cod TEXT, p_nome TEXT, p_delta INT
+)
+RETURNS VOID
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO resumo_pedidos AS r ("DATA_ENTREGA", "STATUS", "PAGAMENTO", "COD CLIENTE", "NOME CLIENTE", "QTD")
+    VALUES (
+        COALESCE(p_data, '-infinity'::DATE), chave_resumo(p_status), chave_resumo(p_pagamento),
+        chave_resumo(p_cod), chave_resumo(p_nome), p_delta
+    )
+    ON CONFLICT ("DATA_ENTREGA", "STATUS", "PAGAMENTO", "COD CLIENTE", "NOME CLIENTE")
+    DO UPDATE SET "QTD" = r."QTD" + EXCLUDED."QTD";
+
+    DELETE FROM resumo_pedidos
+     WHERE "QTD" <= 0
+       AND "DATA_ENTREGA" = COALESCE(p_data, '-infinity'::DATE)
+       AND "STATUS" = chave_resumo(p_status)
+       AND "PAGAMENTO" = chave_resumo(p_pagamento)
+       AND "COD CLIENTE" = chave_resumo(p_cod)
+       AND "NOME CLIENTE" = chave_resumo(p_nome);
+END;
+$$;
+
+CREATE OR REPLACE FUNCTION trg_ajustar_resumo_pedidos()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_data_antiga DATE;
+    v_data_nova DATE;
+BEGIN
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        v_data_antiga := COALESCE(OLD."DATA_ENTREGA", data_br(OLD."DIA DA ENTREGA"::TEXT));
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        v_data_nova := COALESCE(NEW."DATA_ENTREGA", data_br(NEW."DIA DA ENTREGA"::TEXT));
+    END IF;
+
+    -- Edições que não mexem na chave do resumo (ex.: OBSERVAÇÃO) não custam nada
+    IF TG_OP = 'UPDATE'
+       AND v_data_antiga IS NOT DISTINCT FROM v_data_nova
+       AND OLD."STATUS"::TEXT IS NOT DISTINCT FROM NEW."STATUS"::TEXT
+       AND OLD."PAGAMENTO"::TEXT IS NOT DISTINCT FROM NEW."PAGAMENTO"::TEXT
+       AND OLD."COD CLIENTE"::TEXT IS NOT DISTINCT FROM NEW."COD CLIENTE"::TEXT
+       AND OLD."NOME CLIENTE"::TEXT IS NOT DISTINCT FROM NEW."NOME CLIENTE"::TEXT THEN
+        RETURN NULL;
+    END IF;
+
+    IF TG_OP IN ('UPDATE', 'DELETE') THEN
+        PERFORM ajustar_resumo_pedidos(v_data_antiga, OLD."STATUS"::TEXT, OLD."PAGAMENTO"::TEXT,
+                                       OLD."COD CLIENTE"::TEXT, OLD."NOME CLIENTE"::TEXT, -1);
+    END IF;
+    IF TG_OP IN ('INSERT', 'UPDATE') THEN
+        PERFORM ajustar_resumo_pedidos(v_data_nova, NEW."STATUS"::TEXT, NEW."PAGAMENTO"::TEXT,
+                                       NEW."COD CLIENTE"::TEXT, NEW."NOME CLIENTE"::TEXT, 1);
+    END IF;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_resumo_pedidos ON pedidos;
+CREATE TRIGGER trg_resumo_pedidos
+    AFTER INSERT OR UPDATE OR DELETE ON pedidos
+    FOR EACH ROW EXECUTE FUNCTION trg_ajustar_resumo_pedidos();
+
+CREATE OR REPLACE FUNCTION recalcular_resumo_pedidos()
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_linhas INT;
+BEGIN
+    LOCK TABLE pedidos IN SHARE MODE;  -- sem escritas no meio do recálculo
+    DELETE FROM resumo_pedidos;
+    INSERT INTO resumo_pedidos ("DATA_ENTREGA", "STATUS", "PAGAMENTO", "COD CLIENTE", "NOME CLIENTE", "QTD")
+    SELECT COALESCE("DATA_ENTREGA", data_br("DIA DA ENTREGA"::TEXT), '-infinity'::DATE),
+           chave_resumo("STATUS"::TEXT), chave_resumo("PAGAMENTO"::TEXT),
+           chave_resumo("COD CLIENTE"::TEXT), chave_resumo("NOME CLIENTE"::TEXT),
+           count(*)
+      FROM pedidos
+     GROUP BY 1, 2, 3, 4, 5;
+    GET DIAGNOSTICS v_linhas = ROW_COUNT;
+    RETURN v_linhas;
+END;
+$$;
+
+SELECT recalcular_resumo_pedidos();
+
+-- Totais de um período (NULL = sem limite) no formato usado pelo dashboard:
+-- {"total": 120, "status": {"PENDENTE": 80, ...}, "pagamento": {"PIX": 70, ...},
+--  "dias": {"2026-03-01": 12, ...}, "clientes": [["CLIENTE A", 9], ...]}
+CREATE OR REPLACE FUNCTION resumo_dashboard(p_inicio DATE DEFAULT NULL, p_fim DATE DEFAULT NULL, p_top INT DEFAULT 5)
+RETURNS JSONB
+LANGUAGE sql
+STABLE
+AS $$
+    WITH r AS (
+        SELECT *
+          FROM resumo_pedidos
+         WHERE (p_inicio IS NULL OR "DATA_ENTREGA" >= p_inicio)
+           AND (p_fim IS NULL OR "DATA_ENTREGA" <= p_fim)
+    )
+    SELECT jsonb_build_object(
+        'total', (SELECT COALESCE(sum("QTD"), 0) FROM r),
+        'status', COALESCE((
+            SELECT jsonb_object_agg(chave, qtd)
+              FROM (SELECT "STATUS" AS chave, sum("QTD") AS qtd FROM r WHERE "STATUS" <> '' GROUP BY 1) s
+        ), '{}'::jsonb),
+        'pagamento', COALESCE((
+            SELECT jsonb_object_agg(chave, qtd)
+              FROM (SELECT "PAGAMENTO" AS chave, sum("QTD") AS qtd FROM r WHERE "PAGAMENTO" <> '' GROUP BY 1) p
+        ), '{}'::jsonb),
+        'dias', COALESCE((
+            SELECT jsonb_object_agg(chave::TEXT, qtd)
+              FROM (SELECT "DATA_ENTREGA" AS chave, sum("QTD") AS qtd FROM r
+                     WHERE "DATA_ENTREGA" <> '-infinity'::DATE GROUP BY 1) d
+        ), '{}'::jsonb),
+        'clientes', COALESCE((
+            SELECT jsonb_agg(jsonb_build_array(chave, qtd) ORDER BY qtd DESC, chave)
+              FROM (SELECT "NOME CLIENTE" AS chave, sum("QTD") AS qtd FROM r WHERE "NOME CLIENTE" <> ''
+                     GROUP BY 1 ORDER BY 2 DESC, 1 LIMIT p_top) c
+        ), '[]'::jsonb)
+    );
+$$;
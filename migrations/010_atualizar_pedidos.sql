@@ -0,0 +1,28 @@
+-- 010 - Edição em lote de pedidos em um único UPDATE
+-- Executar no Supabase SQL Editor.
+--
+-- Recebe a lista de alterações da tela de gestão, cada uma com o ID_PEDIDO
+-- e só os campos editáveis que mudaram, e grava todas em um UPDATE: uma
+-- requisição por salvamento, mesmo quando cada pedido tem valores próprios
+-- (OBSERVAÇÃO, NR PEDIDO). Campos ausentes de uma alteração mantêm o valor
+-- atual da linha, então edições concorrentes nos outros campos são
+-- preservadas; pedidos excluídos nesse meio tempo não são recriados.
+-- Usada por services/database/pedidos.atualizar_pedidos_editaveis.
+--
+-- Formato: [{"ID_PEDIDO": 12, "STATUS": "ENTREGUE"}, {"ID_PEDIDO": 15, "OBSERVAÇÃO": "..."}]
+-- Devolve os ID_PEDIDO gravados.
+
+CREATE OR REPLACE FUNCTION atualizar_pedidos(p_alteracoes JSONB)
+RETURNS TABLE ("ID_PEDIDO" BIGINT)
+LANGUAGE sql
+AS $$
+    UPDATE pedidos p
+       SET ("STATUS", "PAGAMENTO", "NR PEDIDO", "OBSERVAÇÃO") = (
+               -- jsonb_populate_record converte os tipos e mantém o que não veio
+               SELECT n."STATUS", n."PAGAMENTO", n."NR PEDIDO", n."OBSERVAÇÃO"
+                 FROM jsonb_populate_record(p, a.valor) AS n
+           )
+      FROM jsonb_array_elements(p_alteracoes) AS a(valor)
+     WHERE p."ID_PEDIDO" = (a.valor->>'ID_PEDIDO')::BIGINT
+    RETURNING p."ID_PEDIDO"::BIGINT;
+$$;
@@ -0,0 +1,62 @@
+-- 011 - ALTERADO_EM em pedidos e registro de exclusões para o modelo local
+-- Executar no Supabase SQL Editor, depois da 007.
+--
+-- Com a 007, o modelo local (services/database/modelo_local.py) achava os
+-- pedidos alterados pelos logs: edições que não gravam log (a RPC
+-- `preencher_datas_pedidos`, SQL direto) nunca chegavam à cópia local, e
+-- nenhuma tabela avisava exclusões. Aqui:
+--   - pedidos ganha ALTERADO_EM com o mesmo trigger de clientes e
+--     estoque_salmao (função `carimbar_alterado_em`, da 007);
+--   - cada DELETE em pedidos, clientes e estoque_salmao grava a chave da
+--     linha em `exclusoes`, com o próprio ALTERADO_EM. A sincronização lê as
+--     exclusões com a mesma marca d'água das linhas alteradas.
+-- Sem esta migração o modelo local fica desligado e as leituras vão direto
+-- ao Supabase.
+
+-- Pedidos já existentes ficam com a época: a primeira sincronização depois da
+-- migração não volta a baixar a tabela inteira pela margem da marca d'água.
+ALTER TABLE pedidos ADD COLUMN IF NOT EXISTS "ALTERADO_EM" TIMESTAMPTZ NOT NULL DEFAULT '1970-01-01T00:00:00+00:00';
+ALTER TABLE pedidos ALTER COLUMN "ALTERADO_EM" SET DEFAULT now();
+CREATE INDEX IF NOT EXISTS pedidos_alterado_em_idx ON pedidos ("ALTERADO_EM");
+DROP TRIGGER IF EXISTS trg_alterado_em ON pedidos;
+CREATE TRIGGER trg_alterado_em
+    BEFORE INSERT OR UPDATE ON pedidos
+    FOR EACH ROW EXECUTE FUNCTION carimbar_alterado_em();
+
+CREATE TABLE IF NOT EXISTS exclusoes (
+    "ID_EXCLUSAO" BIGINT GENERATED ALWAYS AS IDENTITY PRIMARY KEY,
+    tabela TEXT NOT NULL,
+    chave BIGINT NOT NULL,
+    "ALTERADO_EM" TIMESTAMPTZ NOT NULL DEFAULT now()
+);
+CREATE INDEX IF NOT EXISTS exclusoes_tabela_alterado_em_idx ON exclusoes (tabela, "ALTERADO_EM");
+
+-- TG_ARGV[0]: coluna da chave primária da tabela
+CREATE OR REPLACE FUNCTION registrar_exclusao()
+RETURNS TRIGGER
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO exclusoes (tabela, chave) VALUES (TG_TABLE_NAME, (to_jsonb(OLD)->>TG_ARGV[0])::BIGINT);
+    RETURN OLD;
+END;
+$$;
+
+DO $$
+DECLARE
+    v_tabela TEXT;
+    v_chave TEXT;
+BEGIN
+    FOR v_tabela, v_chave IN
+        SELECT * FROM (VALUES ('pedidos', 'ID_PEDIDO'), ('clientes', 'Código'), ('estoque_salmao', 'Tag')) AS t
+    LOOP
+        EXECUTE format('DROP TRIGGER IF EXISTS trg_registrar_exclusao ON %I', v_tabela);
+        EXECUTE format(
+            'CREATE TRIGGER trg_registrar_exclusao
+                AFTER DELETE ON %I
+                FOR EACH ROW EXECUTE FUNCTION registrar_exclusao(%L)',
+            v_tabela, v_chave
+        );
+    END LOOP;
+END;
+$$;
@@ -0,0 +1,36 @@
+# preencher_datas_pedidos.py (executar uma vez, depois de migrations/008_datas_pedidos.sql)
+# Uso: python preencher_datas_pedidos.py [tamanho_do_lote]
+#
+# Copia "DIA DA ENTREGA" e "CARIMBO DE DATA/HORA" (texto) para DATA_ENTREGA e
+# CRIADO_EM nos pedidos antigos. Cada lote é uma transação curta no banco, então
+# o app pode continuar em uso; se for interrompido, basta rodar de novo.
+
+import sys
+
+from supabase import create_client
+from services.database.pedidos import preencher_datas_pedidos
+from services.logging_module import LoggerStructurado
+from core.config import SUPABASE_URL, SUPABASE_KEY
+
+client = create_client(SUPABASE_URL, SUPABASE_KEY)
+logger = LoggerStructurado("preencher_datas_pedidos")
+lote = int(sys.argv[1]) if len(sys.argv) > 1 else 5000
+
+print("=" * 60)
+print("PREENCHIMENTO DAS DATAS NATIVAS DE PEDIDOS")
+print("=" * 60)
+
+
+def progresso(ultimo, atualizados):
+    print(f"  ✅ Até o pedido {ultimo}: {atualizados} atualizados")
+
+
+try:
+    total = preencher_datas_pedidos(client, lote=lote, ao_avancar=progresso)
+    print("-" * 60)
+    print(f"\n✨ Concluído: {total} pedidos preenchidos.\n")
+    logger.info("preencher_datas_pedidos", "DATAS_PEDIDOS_PREENCHIDAS", dados={"total": total})
+except Exception as e:
+    print(f"❌ Erro no preenchimento: {e}")
+    logger.erro("preencher_datas_pedidos", str(e))
+    exit(1)
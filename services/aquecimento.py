@@ -0,0 +1,68 @@
+"""
+Pré-carregamento dos caches logo após o login.
+
+Assim que `autenticar_usuario` confirma o acesso, as leituras que o perfil vai
+fazer na primeira tela (página inicial do menu + métricas da barra lateral)
+começam em um pool de threads de fundo. O rerun seguinte espera essas
+leituras por alguns segundos e desenha a tela a partir do cache, em vez de
+pagar cada consulta fria em série.
+
+Cada leitura é a própria função síncrona com cache, chamada direto na thread
+do pool, que recebe o contexto do Streamlit da sessão que fez o login (sem
+ele, st.cache_data avisa da falta de ScriptRunContext a cada leitura).
+
+    Admin    -> "📝 Novo Pedido": clientes com cidade/rota e pedidos recentes
+    Operador -> "🚚 Operações": opções de filtro e primeira página de pedidos
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import services.database as db
+from services.database.assincrono import com_contexto
+from core.config import AQUECIMENTO_ESPERA_SEGUNDOS, TAMANHO_PAGINA_PEDIDOS
+from services.logging_module import logger
+
+_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="aquecimento")
+
+
+def leituras_do_perfil(perfil: str, versao) -> dict:
+    """Leituras da primeira tela de `perfil` (nome -> função sem argumentos)."""
+    leituras = {
+        "metricas": lambda: db.get_metricas(versao=versao),
+    }
+    if perfil == "Admin":
+        leituras["clientes_rotas"] = lambda: db.listar_clientes_rotas(versao=versao)
+        leituras["pedidos_recentes"] = lambda: db.buscar_pedidos_visualizacao(versao=versao)
+    else:
+        leituras["filtros_pedidos"] = lambda: db.listar_dados_filtros(versao=versao)
+        leituras["primeira_pagina"] = lambda: db.buscar_pedidos_paginado(
+            tamanho_pagina=TAMANHO_PAGINA_PEDIDOS, filtros={}, versao=versao
+        )
+    return leituras
+
+
+def _executar(nome, leitura, usuario):
+    try:
+        leitura()
+    except Exception as e:
+        # Só perde o ganho: a página faz a leitura normalmente
+        logger.aviso("aquecer_caches", f"{nome}: {e}", usuario=usuario)
+
+
+def aquecer_caches(perfil: str, usuario: str = "sistema") -> list:
+    """Dispara em segundo plano as leituras de `perfil` e retorna os futures."""
+    try:
+        versao = db.obter_versao_planilha()
+    except Exception:
+        versao = None
+    return [
+        _executor.submit(com_contexto(_executar), nome, leitura, usuario)
+        for nome, leitura in leituras_do_perfil(perfil, versao).items()
+    ]
+
+
+def aguardar_aquecimento(futuros, timeout: float = AQUECIMENTO_ESPERA_SEGUNDOS) -> bool:
+    """Espera o pré-carregamento (no máximo `timeout` s). True se tudo terminou."""
+    if not futuros:
+        return True
+    _, pendentes = wait(futuros, timeout=timeout)
+    return not pendentes
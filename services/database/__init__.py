@@ -2,13 +2,24 @@
 Serviço de banco de dados Supabase.
 Reexporta todas as funções para manter compatibilidade com `import services.database as db`.
 """
-from services.database.client import get_db_client, get_max_id, obter_versao_planilha
+from services.database.client import contar_linhas, get_db_client, get_max_id, usar_banco
+from services.database.cache import (
+    VersaoDados,
+    altera_tabelas,
+    cache_por_versao,
+    invalidar_tabelas,
+    obter_versao_planilha,
+)
+from services.database.conexoes import estatisticas_conexoes
+from services.database.ids import proximo_id
 from services.database.auth import autenticar_usuario
 from services.database.clientes import (
     listar_clientes,
+    listar_clientes_rotas,
     criar_novo_cliente,
     get_metricas,
     buscar_clientes_paginado,
+    contar_clientes,
 )
 from services.database.pedidos import (
     listar_dados_filtros,
@@ -17,10 +28,14 @@ from services.database.pedidos import (
     salvar_pedido,
     atualizar_pedidos_editaveis,
     buscar_pedidos_paginado,
+    contar_pedidos,
+    erro_periodo,
+    lotes_pedidos,
 )
 from services.database.salmao import (
     get_estoque_filtrado,
     get_estoque_backup_filtrado,
+    lotes_historico_salmao,
     salvar_alteracoes_estoque,
     registrar_subtag,
     buscar_subtags_por_tag,
@@ -32,20 +47,34 @@ from services.database.salmao import (
 __all__ = [
     "get_db_client",
     "get_max_id",
+    "contar_linhas",
     "obter_versao_planilha",
+    "cache_por_versao",
+    "altera_tabelas",
+    "invalidar_tabelas",
+    "VersaoDados",
+    "usar_banco",
+    "estatisticas_conexoes",
+    "proximo_id",
     "autenticar_usuario",
     "listar_clientes",
+    "listar_clientes_rotas",
     "criar_novo_cliente",
     "get_metricas",
     "buscar_clientes_paginado",
+    "contar_clientes",
     "listar_dados_filtros",
     "buscar_pedidos_visualizacao",
     "obter_resumo_historico",
     "salvar_pedido",
     "atualizar_pedidos_editaveis",
     "buscar_pedidos_paginado",
+    "contar_pedidos",
+    "erro_periodo",
+    "lotes_pedidos",
     "get_estoque_filtrado",
     "get_estoque_backup_filtrado",
+    "lotes_historico_salmao",
     "salvar_alteracoes_estoque",
     "registrar_subtag",
     "buscar_subtags_por_tag",
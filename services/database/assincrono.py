@@ -0,0 +1,75 @@
+"""
+Leituras de uma página executadas ao mesmo tempo.
+
+As funções de `services/database/*` são síncronas: em um rerun, as consultas
+de uma página rodam uma depois da outra. Aqui cada leitura usada ao carregar
+as páginas devolve um `concurrent.futures.Future`: a própria função síncrona
+(mesmo cache, modelo local e tratamento de erro) roda em um pool de threads
+de tamanho fixo, e a página pede os resultados depois de disparar todas:
+
+    from services.database import assincrono as adb
+    filtros = adb.listar_dados_filtros(versao=hash_dados)
+    pagina = adb.buscar_pedidos_paginado(filtros=filtros_ativos, versao=hash_dados)
+    (cidades, rotas), (df, total, cursores) = filtros.result(), pagina.result()
+
+O tempo da página passa a ser o da consulta mais lenta, não a soma de todas.
+O pool é limitado (`_MAX_LEITURAS`): muitas sessões ao mesmo tempo enfileiram
+as leituras em vez de abrir uma thread por consulta. As consultas usam o pool
+HTTP compartilhado (conexoes.py).
+"""
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+from streamlit.runtime.scriptrunner_utils.script_run_context import SCRIPT_RUN_CONTEXT_ATTR_NAME
+
+from services.database import clientes as _clientes
+from services.database import pedidos as _pedidos
+
+_MAX_LEITURAS = 8
+
+_executor = ThreadPoolExecutor(max_workers=_MAX_LEITURAS, thread_name_prefix="db-leitura")
+
+
+def com_contexto(func, contexto=None):
+    """
+    `func` para rodar em uma thread de pool com o contexto do Streamlit de
+    quem a criou (ou `contexto`): avisos da leitura (st.error/st.warning)
+    aparecem na página e o cache não reclama da falta de sessão. Ao terminar,
+    a thread devolve o contexto, já que o pool a reaproveita para outras sessões.
+    """
+    if contexto is None:
+        contexto = get_script_run_ctx(suppress_warning=True)
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        thread = threading.current_thread()
+        if contexto is not None:
+            add_script_run_ctx(thread, contexto)
+        try:
+            return func(*args, **kwargs)
+        finally:
+            if hasattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME):
+                delattr(thread, SCRIPT_RUN_CONTEXT_ATTR_NAME)
+
+    return wrapper
+
+
+def _no_pool(func):
+    """Versão de `func` que agenda a leitura no pool e retorna o Future."""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return _executor.submit(com_contexto(func), *args, **kwargs)
+
+    return wrapper
+
+
+# ============================================================
+# LEITURAS
+# ============================================================
+
+get_metricas = _no_pool(_clientes.get_metricas)
+buscar_clientes_paginado = _no_pool(_clientes.buscar_clientes_paginado)
+listar_dados_filtros = _no_pool(_pedidos.listar_dados_filtros)
+buscar_pedidos_paginado = _no_pool(_pedidos.buscar_pedidos_paginado)
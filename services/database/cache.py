@@ -0,0 +1,139 @@
+"""
+Versão dos dados e cache de leituras por versão.
+
+Cada tabela tem um contador em `versoes_dados`, incrementado por trigger a
+cada escrita (migrations/003_versoes_dados.sql). As leituras cacheadas usam
+os contadores das tabelas de que dependem como parte da chave do cache, então
+só voltam ao banco quando esses dados mudam de fato.
+
+Leitores declaram as tabelas que leem (`@cache_por_versao(...)`) e escritores
+as tabelas que alteram (`@altera_tabelas(...)`); ao fim de cada escrita, só os
+caches que dependem dessas tabelas são descartados.
+"""
+import functools
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+
+import streamlit as st
+
+from services.database.client import get_db_client
+
+# Por quantos segundos a versão lida do banco é reaproveitada entre reruns
+_TTL_VERSAO = 5
+# Sem a tabela versoes_dados, a versão passa a mudar a cada janela (segundos)
+_JANELA_SEM_VERSAO = 60
+
+# Tabela -> {nome qualificado: leitura cacheada que depende dela}
+_LEITORES = defaultdict(dict)
+
+
+@dataclass(frozen=True)
+class VersaoDados:
+    """Contadores de alteração por tabela. Imutável, pode ir na chave do cache."""
+
+    contadores: tuple = ()
+
+    def de(self, *tabelas) -> tuple:
+        """Versão apenas das tabelas informadas (a chave "*" vale para todas)."""
+        mapa = dict(self.contadores)
+        return tuple(mapa.get(t, mapa.get("*", 0)) for t in tabelas)
+
+
+@st.cache_data(ttl=_TTL_VERSAO, show_spinner=False)
+def obter_versao_planilha() -> VersaoDados:
+    """Lê os contadores de `versoes_dados` (uma consulta pequena)."""
+    try:
+        resp = get_db_client().table("versoes_dados").select("tabela, versao").execute()
+        if resp.data:
+            return VersaoDados(tuple(sorted((l["tabela"], int(l["versao"])) for l in resp.data)))
+    except Exception:
+        pass
+    # Migração não aplicada: comporta-se como um TTL curto
+    return VersaoDados((("*", int(time.time() // _JANELA_SEM_VERSAO)),))
+
+
+def registrar_leitor(nome, leitor, *tabelas):
+    """
+    Registra um cache (qualquer objeto com `.clear()`) a descartar quando
+    alguma das `tabelas` for alterada por uma escrita deste processo.
+    """
+    for tabela in tabelas:
+        # Por nome: recarregar o módulo (hot reload) substitui, não duplica
+        _LEITORES[tabela][nome] = leitor
+
+
+def cache_por_versao(*tabelas, em_erro=None, **opcoes_cache):
+    """
+    Como `@st.cache_data`, mas com a versão de `tabelas` na chave do cache.
+
+    A função decorada aceita `versao=` (a VersaoDados já obtida no rerun, ex.:
+    `hash_dados` do app.py); sem ela, consulta a versão atual.
+
+    Só retornos vão para o cache: a leitura deve deixar a exceção subir. Com
+    `em_erro` (função sem argumentos), a falha devolve `em_erro()` apenas
+    nesta chamada e a próxima tenta o banco de novo, em vez de guardar o
+    valor vazio até a versão mudar.
+    """
+    def decorator(func):
+        def _com_versao(chave_versao, *args, **kwargs):
+            return func(*args, **kwargs)
+
+        # O Streamlit identifica o cache por módulo + nome qualificado
+        _com_versao.__module__ = func.__module__
+        _com_versao.__qualname__ = f"{func.__qualname__}[versao]"
+        cacheada = st.cache_data(**opcoes_cache)(_com_versao)
+
+        @functools.wraps(func)
+        def wrapper(*args, versao=None, **kwargs):
+            if not isinstance(versao, VersaoDados):
+                versao = obter_versao_planilha()
+            if em_erro is None:
+                return cacheada(versao.de(*tabelas), *args, **kwargs)
+            try:
+                return cacheada(versao.de(*tabelas), *args, **kwargs)
+            except Exception:
+                return em_erro()
+
+        wrapper.clear = cacheada.clear
+        wrapper.tabelas = tabelas
+        registrar_leitor(f"{func.__module__}.{func.__qualname__}", wrapper, *tabelas)
+        return wrapper
+
+    return decorator
+
+
+def leitores_de(*tabelas) -> list:
+    """Leituras cacheadas que dependem de alguma das `tabelas` (sem repetição)."""
+    vistos = {}
+    for tabela in tabelas:
+        vistos.update(_LEITORES.get(tabela, {}))
+    return list(vistos.values())
+
+
+def invalidar_tabelas(*tabelas):
+    """Descarta a versão lida e os caches que dependem de `tabelas`."""
+    obter_versao_planilha.clear()
+    for leitor in leitores_de(*tabelas):
+        leitor.clear()
+
+
+def altera_tabelas(*tabelas):
+    """
+    Declara as tabelas que uma função de escrita altera.
+
+    Ao terminar (mesmo com erro, pois parte da escrita pode ter sido gravada),
+    invalida apenas os caches que leem essas tabelas.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                invalidar_tabelas(*tabelas)
+
+        wrapper.tabelas = tabelas
+        return wrapper
+
+    return decorator
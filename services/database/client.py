@@ -1,17 +1,49 @@
 """
 Cliente Supabase e funções base compartilhadas.
 """
-import time
+from contextlib import contextmanager
+
 from supabase import create_client, Client
 import streamlit as st
 
 from core.config import SUPABASE_URL, SUPABASE_KEY
+from services.database.conexoes import instalar_pool
+
+# Código do PostgREST para "função não encontrada" (migração ainda não aplicada)
+RPC_INEXISTENTE = "PGRST202"
+
+# Backend alternativo (ex.: BancoMemoria nos testes); None = Supabase real
+_banco_substituto = None
 
 
 @st.cache_resource
+def _criar_cliente_supabase() -> Client:
+    # Pool HTTP configurado e instrumentado (services/database/conexoes.py)
+    return instalar_pool(create_client(SUPABASE_URL, SUPABASE_KEY))
+
+
 def get_db_client() -> Client:
-    """Retorna o cliente do Supabase (Singleton)."""
-    return create_client(SUPABASE_URL, SUPABASE_KEY)
+    """Retorna o cliente do Supabase (Singleton) ou o backend substituto ativo."""
+    if _banco_substituto is not None:
+        return _banco_substituto
+    return _criar_cliente_supabase()
+
+
+def get_banco_substituto():
+    """Backend substituto ativo (ex.: BancoMemoria), ou None com o Supabase real."""
+    return _banco_substituto
+
+
+@contextmanager
+def usar_banco(banco):
+    """Direciona todo o acesso a dados para `banco` enquanto o bloco estiver ativo."""
+    global _banco_substituto
+    anterior = _banco_substituto
+    _banco_substituto = banco
+    try:
+        yield banco
+    finally:
+        _banco_substituto = anterior
 
 
 def get_max_id(table_name: str, id_column: str) -> int:
@@ -30,6 +62,40 @@ def get_max_id(table_name: str, id_column: str) -> int:
         return 0
 
 
-def obter_versao_planilha():
-    """Controle de cache inteligente."""
-    return time.time()
+
+def consulta_contagem(client, table_name: str, id_column: str):
+    """Consulta de total exato (count="exact", head=True: só o número, sem dados)."""
+    return client.table(table_name).select(id_column, count="exact", head=True)
+
+
+def contar_linhas(table_name: str, id_column: str) -> int:
+    """Total exato de linhas de uma tabela."""
+    try:
+        return consulta_contagem(get_db_client(), table_name, id_column).execute().count or 0
+    except Exception:
+        return 0
+
+
+def montar_pagina(linhas, tamanho_pagina, apos, antes, cursor_de):
+    """
+    Recorta o resultado de uma consulta keyset (pedida com `tamanho_pagina + 1`
+    linhas, em ordem invertida quando `antes` é usado) e calcula os cursores.
+
+    Retorna (linhas_da_pagina, {"anterior": ..., "proxima": ...}); `cursor_de`
+    extrai o cursor de uma linha.
+    """
+    voltando = antes is not None
+    sobra = len(linhas) > tamanho_pagina
+    linhas = linhas[:tamanho_pagina]
+    if voltando:
+        linhas.reverse()
+
+    cursores = {"anterior": None, "proxima": None}
+    if linhas:
+        tem_anterior = sobra if voltando else apos is not None
+        tem_proxima = True if voltando else sobra
+        if tem_anterior:
+            cursores["anterior"] = cursor_de(linhas[0])
+        if tem_proxima:
+            cursores["proxima"] = cursor_de(linhas[-1])
+    return linhas, cursores
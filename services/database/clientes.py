@@ -1,36 +1,57 @@
 """
 Operações de clientes.
 """
+from concurrent.futures import ThreadPoolExecutor
+
 import pandas as pd
 import streamlit as st
 
-from services.database.client import get_db_client, get_max_id
+from services.database.cache import altera_tabelas, cache_por_versao
+from services.database.client import consulta_contagem, get_db_client, montar_pagina
+from services.database.esquemas import carregar, select_do_esquema
+from services.database.ids import proximo_id
+from services.database.modelo_local import modelo_sincronizado
 from services.utils import limpar_texto
 
 
-@st.cache_data(ttl=300, show_spinner=False)
-def listar_clientes(_hash_versao=None):
-    client = get_db_client()
-    try:
-        response = client.table("clientes").select("Cliente").order("Cliente").execute()
-        if response.data:
-            lista = [c["Cliente"] for c in response.data if c["Cliente"]]
-            return sorted(list(set(lista)))
-    except Exception:
-        pass
-    return []
+def _nomes_clientes(linhas):
+    return sorted({c["Cliente"] for c in linhas or [] if c["Cliente"]})
+
+
+@cache_por_versao("clientes", em_erro=list, ttl=3600, show_spinner=False)
+def listar_clientes():
+    modelo = modelo_sincronizado("clientes")
+    if modelo is not None:
+        return _nomes_clientes(modelo.linhas("clientes", colunas=["Cliente"]))
+    response = get_db_client().table("clientes").select("Cliente").order("Cliente").execute()
+    return _nomes_clientes(response.data)
+
+
+_COLUNAS_ROTAS = ["Cliente", "Nome Cidade", "ROTA"]
 
 
+@cache_por_versao("clientes", em_erro=pd.DataFrame, ttl=3600, show_spinner=False)
+def listar_clientes_rotas():
+    """Clientes com cidade e rota (seleção do cliente no Novo Pedido)."""
+    modelo = modelo_sincronizado("clientes")
+    if modelo is not None:
+        linhas = modelo.linhas("clientes", colunas=_COLUNAS_ROTAS)
+    else:
+        linhas = get_db_client().table("clientes").select(select_do_esquema("clientes", _COLUNAS_ROTAS)).execute().data
+    if linhas:
+        return carregar(linhas, "clientes", _COLUNAS_ROTAS)
+    return pd.DataFrame()
+
+
+@altera_tabelas("clientes")
 def criar_novo_cliente(nome, cidade, documento=""):
     client = get_db_client()
-    listar_clientes.clear()
-    get_metricas.clear()
 
     nome_final = limpar_texto(nome)
     cidade_final = limpar_texto(cidade)
     doc_final = limpar_texto(documento)
 
-    novo_id = get_max_id("clientes", "Código") + 1
+    novo_id = proximo_id("clientes", "Código")
 
     dados = {
         "Código": novo_id,
@@ -47,36 +68,88 @@ def criar_novo_cliente(nome, cidade, documento=""):
         st.error(f"Erro ao criar cliente: {e}")
 
 
-@st.cache_data(ttl=300, show_spinner=False)
-def get_metricas(_hash_versao=None):
-    client = get_db_client()
-    try:
-        # Traz 1000 registros max - já basta para dashboard
-        resp_cli = client.table("clientes").select("Código").limit(1000).execute()
-        resp_ped = client.table("pedidos").select("ID_PEDIDO").limit(1000).execute()
-        return len(resp_cli.data), len(resp_ped.data)
-    except:
-        return 0, 0
+def _contar(tabela, coluna):
+    """Como `contar_linhas`, mas a falha sobe (não vai para o cache como 0)."""
+    return consulta_contagem(get_db_client(), tabela, coluna).execute().count or 0
 
 
-def buscar_clientes_paginado(pagina_atual=1, tamanho_pagina=20):
-    client = get_db_client()
-    inicio = (pagina_atual - 1) * tamanho_pagina
-    fim = inicio + tamanho_pagina - 1
+@cache_por_versao("clientes", "pedidos", em_erro=lambda: (0, 0), ttl=3600, show_spinner=False)
+def get_metricas():
+    """
+    Totais exatos de clientes e pedidos para a barra lateral.
+
+    Duas contagens `head=True` (só o número, custo constante) feitas em
+    paralelo; o resultado fica em cache até uma das tabelas mudar.
+    """
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        qtd_cli = executor.submit(_contar, "clientes", "Código")
+        qtd_ped = executor.submit(_contar, "pedidos", "ID_PEDIDO")
+        return qtd_cli.result(), qtd_ped.result()
+
 
+def _valor_filtro(valor):
+    """Valor entre aspas para filtros `or` do PostgREST (aceita vírgula e parênteses)."""
+    texto = str(valor).replace("\\", "\\\\").replace('"', '\\"')
+    return f'"{texto}"'
+
+
+def _filtro_cursor_clientes(nome, codigo, voltando):
+    """
+    Condição keyset para a ordem (Cliente ASC NULLS LAST, Código ASC).
+
+    Avançando: linhas depois de (nome, codigo); voltando: linhas antes.
+    """
+    codigo = int(codigo)
+    if nome is None:
+        if voltando:
+            return f"Cliente.not.is.null,and(Cliente.is.null,Código.lt.{codigo})"
+        return f"and(Cliente.is.null,Código.gt.{codigo})"
+    nome = _valor_filtro(nome)
+    if voltando:
+        return f"Cliente.lt.{nome},and(Cliente.eq.{nome},Código.lt.{codigo})"
+    return f"Cliente.gt.{nome},Cliente.is.null,and(Cliente.eq.{nome},Código.gt.{codigo})"
+
+
+@cache_por_versao("clientes", em_erro=int, ttl=3600, show_spinner=False)
+def contar_clientes():
+    """Total de clientes (uma contagem por versão da tabela)."""
+    return _contar("clientes", "Código")
+
+
+def _consulta_pagina_clientes(client, tamanho_pagina, apos, antes):
+    """Consulta keyset em (Cliente, Código); uma linha a mais indica se existe próxima página."""
+    query = client.table("clientes").select(select_do_esquema("clientes"))
+    voltando = antes is not None
+    cursor = antes if voltando else apos
+    if cursor is not None:
+        query = query.or_(_filtro_cursor_clientes(cursor[0], cursor[1], voltando))
+    return query\
+        .order("Cliente", desc=voltando)\
+        .order("Código", desc=voltando)\
+        .limit(tamanho_pagina + 1)
+
+
+def _pagina_clientes(linhas, tamanho_pagina, apos, antes):
+    linhas, cursores = montar_pagina(
+        linhas, tamanho_pagina, apos, antes, lambda l: (l.get("Cliente"), l.get("Código"))
+    )
+    return carregar(linhas, "clientes"), cursores
+
+
+def buscar_clientes_paginado(tamanho_pagina=20, apos=None, antes=None, versao=None):
+    """
+    Página de clientes por cursor (keyset) em (Cliente, Código), em ordem alfabética.
+
+    `apos`/`antes`: par (Cliente, Código) da última/primeira linha da página
+    atual. Retorna (df, total_registros, cursores), com cursores
+    {"anterior": par ou None, "proxima": par ou None}. `versao` vai para a
+    contagem cacheada.
+    """
+    client = get_db_client()
     try:
-        cols = '"Código", Cliente, "Nome Cidade", "CPF/CNPJ", ROTA'
-        response = client.table("clientes")\
-            .select(cols, count="exact")\
-            .order("Cliente", desc=False)\
-            .range(inicio, fim)\
-            .execute()
-
-        total_registros = response.count if response.count is not None else 0
-        df = pd.DataFrame(response.data)
-        if df.empty:
-            df = pd.DataFrame(columns=["Código", "Cliente", "Nome Cidade", "ROTA"])
-        return df, total_registros
+        linhas = _consulta_pagina_clientes(client, tamanho_pagina, apos, antes).execute().data or []
+        df, cursores = _pagina_clientes(linhas, tamanho_pagina, apos, antes)
+        return df, contar_clientes(versao=versao), cursores
     except Exception as e:
         st.error(f"Erro clientes: {e}")
-        return pd.DataFrame(), 0
+        return pd.DataFrame(), 0, {"anterior": None, "proxima": None}
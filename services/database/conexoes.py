@@ -0,0 +1,188 @@
+"""
+Pool HTTP do cliente Supabase, configurável e instrumentado.
+
+Todas as sessões do Streamlit compartilham um único cliente (`st.cache_resource`),
+então compartilham também o pool de conexões do httpx. Este módulo troca o
+pool padrão por um com limites, keep-alive, timeouts e HTTP/2 definidos em
+core/config.py (variáveis HTTP_*) e conta conexões abertas e reutilizadas e
+requisições em andamento, para dimensionar o pool no horário de pico.
+"""
+import importlib.util
+import threading
+
+import httpx
+from postgrest.utils import SyncClient
+
+from core.config import (
+    HTTP2,
+    HTTP_KEEPALIVE_SEGUNDOS,
+    HTTP_MAX_CONEXOES,
+    HTTP_MAX_KEEPALIVE,
+    HTTP_TIMEOUT_CONEXAO,
+    HTTP_TIMEOUT_POOL,
+    HTTP_TIMEOUT_SEGUNDOS,
+)
+
+# Evento do httpcore emitido apenas quando uma conexão nova é aberta
+_EVENTO_NOVA_CONEXAO = "connection.connect_tcp.complete"
+
+
+def http2_disponivel() -> bool:
+    """HTTP/2 conforme a configuração; em "auto", só se o pacote h2 existir."""
+    if HTTP2 in ("0", "false", "nao", "não"):
+        return False
+    if HTTP2 in ("1", "true", "sim"):
+        return True
+    return importlib.util.find_spec("h2") is not None
+
+
+class EstatisticasConexao:
+    """Contadores do pool (thread-safe)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.conexoes_abertas = 0
+        self.conexoes_reutilizadas = 0
+        self.requisicoes = 0
+        self.erros = 0
+        self.em_andamento = 0
+        self.pico_em_andamento = 0
+
+    def inicio(self):
+        with self._lock:
+            self.requisicoes += 1
+            self.em_andamento += 1
+            self.pico_em_andamento = max(self.pico_em_andamento, self.em_andamento)
+
+    def fim(self):
+        with self._lock:
+            self.em_andamento -= 1
+
+    def conexao(self, nova: bool):
+        with self._lock:
+            if nova:
+                self.conexoes_abertas += 1
+            else:
+                self.conexoes_reutilizadas += 1
+
+    def erro(self):
+        with self._lock:
+            self.erros += 1
+
+    def resumo(self) -> dict:
+        with self._lock:
+            return {
+                "conexoes_abertas": self.conexoes_abertas,
+                "conexoes_reutilizadas": self.conexoes_reutilizadas,
+                "requisicoes": self.requisicoes,
+                "erros": self.erros,
+                "em_andamento": self.em_andamento,
+                "pico_em_andamento": self.pico_em_andamento,
+            }
+
+
+class _FluxoMonitorado(httpx.SyncByteStream):
+    """Corpo da resposta que avisa quando foi lido e fechado (fim da requisição)."""
+
+    def __init__(self, fluxo, ao_fechar):
+        self._fluxo = fluxo
+        self._ao_fechar = ao_fechar
+        self._fechado = False
+
+    def __iter__(self):
+        yield from self._fluxo
+
+    def close(self):
+        try:
+            self._fluxo.close()
+        finally:
+            if not self._fechado:
+                self._fechado = True
+                self._ao_fechar()
+
+
+def _rastrear_conexao(request: httpx.Request) -> list:
+    """
+    Marca a requisição para detectar abertura de conexão (eventos de trace
+    do httpcore). Retorna uma lista que recebe True se uma conexão for aberta.
+    """
+    nova_conexao = []
+    trace_original = request.extensions.get("trace")
+
+    def trace(evento, info):
+        if evento == _EVENTO_NOVA_CONEXAO:
+            nova_conexao.append(True)
+        if trace_original is not None:
+            return trace_original(evento, info)
+
+    request.extensions["trace"] = trace
+    return nova_conexao
+
+
+class TransporteInstrumentado(httpx.HTTPTransport):
+    """HTTPTransport que alimenta `EstatisticasConexao` a cada requisição."""
+
+    def __init__(self, estatisticas: EstatisticasConexao, **kwargs):
+        super().__init__(**kwargs)
+        self.estatisticas = estatisticas
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        nova_conexao = _rastrear_conexao(request)
+        self.estatisticas.inicio()
+        try:
+            response = super().handle_request(request)
+        except Exception:
+            self.estatisticas.erro()
+            self.estatisticas.fim()
+            raise
+        self.estatisticas.conexao(bool(nova_conexao))
+        response.stream = _FluxoMonitorado(response.stream, self.estatisticas.fim)
+        return response
+
+
+# Contadores do pool do processo (o cliente Supabase também é um só)
+ESTATISTICAS = EstatisticasConexao()
+
+
+def estatisticas_conexoes() -> dict:
+    """Retrato atual dos contadores do pool compartilhado."""
+    return ESTATISTICAS.resumo()
+
+
+def _opcoes_transporte() -> dict:
+    return {
+        "http2": http2_disponivel(),
+        "limits": httpx.Limits(
+            max_connections=HTTP_MAX_CONEXOES,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+            keepalive_expiry=HTTP_KEEPALIVE_SEGUNDOS,
+        ),
+        "retries": 1,  # nova tentativa só se a conexão falhar ao abrir
+    }
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(HTTP_TIMEOUT_SEGUNDOS, connect=HTTP_TIMEOUT_CONEXAO, pool=HTTP_TIMEOUT_POOL)
+
+
+def criar_sessao_http(base_url, headers, estatisticas: EstatisticasConexao = ESTATISTICAS) -> SyncClient:
+    """Sessão httpx do PostgREST com o pool configurado e instrumentado."""
+    return SyncClient(
+        base_url=base_url,
+        headers=headers,
+        timeout=_timeout(),
+        transport=TransporteInstrumentado(estatisticas, **_opcoes_transporte()),
+    )
+
+
+def instalar_pool(client, estatisticas: EstatisticasConexao = ESTATISTICAS):
+    """
+    Cria já o cliente PostgREST do Supabase (normalmente criado sob demanda,
+    o que não é seguro com várias sessões chegando juntas) e troca a sua
+    sessão httpx pela do pool configurado.
+    """
+    postgrest = client.postgrest
+    anterior = postgrest.session
+    postgrest.session = criar_sessao_http(anterior.base_url, anterior.headers, estatisticas)
+    anterior.close()
+    return client
@@ -0,0 +1,102 @@
+"""
+Esquemas das tabelas lidas pelo app: colunas projetadas e tipos compactos.
+
+`pd.DataFrame(response.data)` deixa tudo como object: cada STATUS repetido
+vira uma string Python, datas ficam como texto e pesos como float64. Os
+leitores passam as linhas por `carregar`, que projeta as colunas declaradas
+aqui e converte cada uma para o tipo do esquema:
+
+    "category"  texto com poucos valores distintos (status, cidade, rota...)
+    "Int32"     inteiro que pode faltar (IDs, códigos, tags)
+    "float32"   pesos em kg
+    DATA        texto dd/mm/aaaa -> datetime64 (inválido vira NaT)
+    "object"    texto livre
+"""
+import pandas as pd
+
+DATA = "data"
+
+ESQUEMAS = {
+    "pedidos": {
+        "ID_PEDIDO": "Int32",
+        "COD CLIENTE": "Int32",
+        "NOME CLIENTE": "category",
+        "CIDADE": "category",
+        "STATUS": "category",
+        "DIA DA ENTREGA": DATA,
+        "PEDIDO": "object",
+        "PAGAMENTO": "category",
+        "NR PEDIDO": "object",
+        "OBSERVAÇÃO": "object",
+        "ROTA": "category",
+    },
+    "clientes": {
+        "Código": "Int32",
+        "Cliente": "object",
+        "Nome Cidade": "category",
+        "CPF/CNPJ": "object",
+        "ROTA": "category",
+    },
+    "estoque_salmao": {
+        "Tag": "Int32",
+        "Status": "category",
+        "Calibre": "category",
+        "Peso": "float32",
+        "Cliente": "category",
+        "Fornecedor": "category",
+        "Validade": DATA,
+    },
+    "estoque_subtags": {
+        "ID_Pai": "Int32",
+        "Letra": "object",
+        "Cliente": "category",
+        "Peso": "float32",
+        "Status": "category",
+        "Calibre_Aux": "object",
+    },
+}
+# O histórico arquivado tem as mesmas colunas do estoque
+ESQUEMAS["estoque_salmao_backup"] = ESQUEMAS["estoque_salmao"]
+
+
+def colunas_do_esquema(tabela: str) -> list:
+    return list(ESQUEMAS[tabela])
+
+
+def _citar(coluna):
+    return coluna if coluna.isascii() and coluna.isidentifier() else f'"{coluna}"'
+
+
+def select_do_esquema(tabela: str, colunas=None) -> str:
+    """Lista de colunas para o `.select()` (nomes com espaço ou acento entre aspas)."""
+    return ", ".join(_citar(c) for c in (colunas or colunas_do_esquema(tabela)))
+
+
+def _converter(serie, tipo):
+    if tipo == DATA:
+        return pd.to_datetime(serie, format="%d/%m/%Y", errors="coerce")
+    if tipo in ("Int32", "float32"):
+        return pd.to_numeric(serie, errors="coerce").astype(tipo)
+    if tipo == "category":
+        return serie.astype("category")
+    return serie
+
+
+def tipar(df: pd.DataFrame, tabela: str) -> pd.DataFrame:
+    """Converte as colunas de `df` que estão no esquema de `tabela` (idempotente)."""
+    esquema = ESQUEMAS[tabela]
+    for coluna in df.columns:
+        tipo = esquema.get(coluna)
+        if tipo is not None:
+            df[coluna] = _converter(df[coluna], tipo)
+    return df
+
+
+def carregar(linhas, tabela: str, colunas=None) -> pd.DataFrame:
+    """
+    DataFrame tipado a partir de linhas (dicts) do Supabase, do modelo local
+    ou do banco em memória. Só as `colunas` pedidas (padrão: as do esquema)
+    entram, na ordem dada; colunas ausentes nas linhas ficam vazias.
+    """
+    colunas = list(colunas or colunas_do_esquema(tabela))
+    return tipar(pd.DataFrame(linhas or [], columns=colunas), tabela)
@@ -0,0 +1,62 @@
+"""
+Alocação de IDs por blocos reservados no banco.
+
+Substitui o `get_max_id() + 1` antes de cada insert: o processo reserva um
+bloco de IDs de uma vez pela RPC `reservar_ids` (contador atômico em
+`contadores_id`) e entrega os IDs localmente. Dois operadores salvando ao
+mesmo tempo nunca recebem o mesmo ID e a maioria dos inserts não paga a
+ida extra ao banco.
+"""
+import threading
+
+import streamlit as st
+from postgrest.exceptions import APIError
+
+from core.config import TAMANHO_BLOCO_IDS
+from services.database.client import get_db_client, get_max_id, RPC_INEXISTENTE
+
+
+class AlocadorIds:
+    """Entrega IDs sequenciais a partir de blocos reservados no banco (thread-safe)."""
+
+    def __init__(self, tamanho_bloco: int = TAMANHO_BLOCO_IDS):
+        self.tamanho_bloco = max(int(tamanho_bloco), 1)
+        self._blocos = {}  # tabela -> [proximo_livre, ultimo_reservado]
+        self._lock = threading.Lock()
+
+    def _reservar(self, tabela: str, coluna: str) -> list:
+        """Reserva um novo bloco e devolve [primeiro, ultimo]."""
+        try:
+            resp = get_db_client().rpc(
+                "reservar_ids", {"p_tabela": tabela, "p_quantidade": self.tamanho_bloco}
+            ).execute()
+            ultimo = int(resp.data)
+            return [ultimo - self.tamanho_bloco + 1, ultimo]
+        except APIError as e:
+            if e.code != RPC_INEXISTENTE:
+                raise
+            # Sem a migração: mantém o comportamento antigo, um ID por vez
+            proximo = get_max_id(tabela, coluna) + 1
+            return [proximo, proximo]
+
+    def proximo(self, tabela: str, coluna: str) -> int:
+        """Retorna o próximo ID livre de `tabela`, reservando novo bloco se preciso."""
+        with self._lock:
+            bloco = self._blocos.get(tabela)
+            if bloco is None or bloco[0] > bloco[1]:
+                bloco = self._reservar(tabela, coluna)
+                self._blocos[tabela] = bloco
+            novo_id = bloco[0]
+            bloco[0] += 1
+            return novo_id
+
+
+@st.cache_resource
+def get_alocador_ids() -> AlocadorIds:
+    """Alocador único por processo."""
+    return AlocadorIds()
+
+
+def proximo_id(tabela: str, coluna: str) -> int:
+    """Atalho para o próximo ID de `tabela` usando o alocador do processo."""
+    return get_alocador_ids().proximo(tabela, coluna)
@@ -0,0 +1,574 @@
+"""
+Banco em memória que imita o subconjunto da API do Supabase usado pelo app.
+
+Serve como substituto local do Supabase em testes e benchmarks:
+    banco = BancoMemoria({"pedidos": [...]})
+    with usar_banco(banco):
+        db.salvar_pedido(...)
+
+Cada `execute()` conta como uma requisição (`banco.requisicoes`) e o tamanho
+do JSON devolvido é somado em `banco.bytes_respostas`. Se a tabela
+`versoes_dados` existir, as escritas incrementam o contador da tabela alterada,
+como os triggers de migrations/003_versoes_dados.sql.
+"""
+import json
+import threading
+import time
+from copy import deepcopy
+from datetime import datetime, timezone
+
+from postgrest.exceptions import APIError
+
+from services.utils import carimbo_br_iso, data_br_iso
+
+# Chave primária de cada tabela (usada por upsert e pelas RPCs)
+_CHAVES_PADRAO = {
+    "pedidos": "ID_PEDIDO",
+    "clientes": "Código",
+    "estoque_salmao": "Tag",
+    "contadores_id": "tabela",
+}
+
+# Colunas preenchidas pelo banco com as migrações 007 e 011 (sincronização incremental)
+_IDENTIDADES = {"logs": "ID_LOG", "exclusoes": "ID_EXCLUSAO"}
+_CARIMBOS = {t: "ALTERADO_EM" for t in ("pedidos", "clientes", "estoque_salmao", "exclusoes")}
+# Tabelas cujo DELETE é registrado em `exclusoes` (trigger da 011)
+_EXCLUSOES_REGISTRADAS = ("pedidos", "clientes", "estoque_salmao")
+
+# Colunas de data nativas criadas pela migração 008
+_COLUNAS_DATAS = {"pedidos": ("DATA_ENTREGA", "CRIADO_EM")}
+
+# RPCs disponíveis no banco em memória (espelham as funções em migrations/)
+_RPCS = {}
+
+
+def _rpc(nome):
+    def decorator(func):
+        _RPCS[nome] = func
+        return func
+    return decorator
+
+
+class RespostaMemoria:
+    """Resposta no mesmo formato do `APIResponse` do postgrest."""
+
+    def __init__(self, data, count=None):
+        self.data = data
+        self.count = count
+
+
+def _comparar(valor, operador, alvo):
+    """Aplica um operador do PostgREST com semântica de NULL do SQL."""
+    if operador == "is":
+        return valor is None if alvo is None else valor == alvo
+    if valor is None:
+        return False
+    if operador == "in":
+        return valor in alvo or str(valor) in {str(a) for a in alvo}
+    try:
+        a, b = valor, alvo
+        if isinstance(a, (int, float)) and isinstance(b, str):
+            b = type(a)(b)
+        if operador == "eq":
+            return a == b
+        if operador == "neq":
+            return a != b
+        if operador == "gt":
+            return a > b
+        if operador == "gte":
+            return a >= b
+        if operador == "lt":
+            return a < b
+        if operador == "lte":
+            return a <= b
+    except (TypeError, ValueError):
+        return _comparar(str(valor), operador, str(alvo))
+    raise ValueError(f"Operador não suportado: {operador}")
+
+
+def _dividir_termos(texto):
+    """Divide `a,b(c,d),"e,f"` nas vírgulas de nível zero (fora de parênteses e aspas)."""
+    termos, atual, nivel, aspas, escape = [], "", 0, False, False
+    for ch in texto:
+        if escape:
+            atual += ch
+            escape = False
+            continue
+        if ch == "\\" and aspas:
+            atual += ch
+            escape = True
+            continue
+        if ch == '"':
+            aspas = not aspas
+        elif not aspas and ch == "(":
+            nivel += 1
+        elif not aspas and ch == ")":
+            nivel -= 1
+        elif not aspas and nivel == 0 and ch == ",":
+            termos.append(atual)
+            atual = ""
+            continue
+        atual += ch
+    if atual:
+        termos.append(atual)
+    return termos
+
+
+def _valor_logico(valor):
+    if len(valor) >= 2 and valor[0] == valor[-1] == '"':
+        return valor[1:-1].replace('\\"', '"').replace("\\\\", "\\")
+    return None if valor == "null" else valor
+
+
+def _filtro_logico(termo):
+    """Converte um termo de `or=(...)` do PostgREST (ex.: `and(a.eq.1,b.gt.2)`) em predicado."""
+    for juncao, combinar in (("and(", all), ("or(", any)):
+        if termo.startswith(juncao) and termo.endswith(")"):
+            filtros = [_filtro_logico(t) for t in _dividir_termos(termo[len(juncao):-1])]
+            return lambda linha: combinar(f(linha) for f in filtros)
+    coluna, resto = termo.split(".", 1)
+    negar = resto.startswith("not.")
+    if negar:
+        resto = resto[4:]
+    operador, valor = resto.split(".", 1)
+    if operador == "in":
+        alvo = [_valor_logico(v) for v in _dividir_termos(valor[1:-1])]
+    else:
+        alvo = _valor_logico(valor)
+    if negar:
+        return lambda linha: not _comparar(linha.get(coluna), operador, alvo)
+    return lambda linha: _comparar(linha.get(coluna), operador, alvo)
+
+
+def _separar_colunas(colunas):
+    if not colunas or colunas.strip() == "*":
+        return None
+    return [c.strip().strip('"') for c in colunas.split(",") if c.strip()]
+
+
+class ConsultaMemoria:
+    """Construtor de consulta encadeável (select/insert/update/upsert/delete)."""
+
+    def __init__(self, banco, tabela):
+        self._banco = banco
+        self._tabela = tabela
+        self._operacao = "select"
+        self._colunas = None
+        self._count = None
+        self._head = False
+        self._payload = None
+        self._on_conflict = None
+        self._filtros = []
+        self._colunas_filtro = []
+        self._ordem = []
+        self._limite = None
+        self._inicio = 0
+
+    # --- Operações ---
+    def select(self, colunas="*", count=None, head=False):
+        self._colunas = _separar_colunas(colunas)
+        self._count = count
+        self._head = head
+        return self
+
+    def insert(self, dados):
+        self._operacao = "insert"
+        self._payload = dados
+        return self
+
+    def update(self, dados):
+        self._operacao = "update"
+        self._payload = dados
+        return self
+
+    def upsert(self, dados, on_conflict=None):
+        self._operacao = "upsert"
+        self._payload = dados
+        self._on_conflict = on_conflict
+        return self
+
+    def delete(self):
+        self._operacao = "delete"
+        return self
+
+    # --- Filtros ---
+    def _filtro(self, coluna, operador, alvo):
+        self._colunas_filtro.append(coluna)
+        self._filtros.append(lambda linha: _comparar(linha.get(coluna), operador, alvo))
+        return self
+
+    def eq(self, coluna, valor):
+        return self._filtro(coluna, "eq", valor)
+
+    def neq(self, coluna, valor):
+        return self._filtro(coluna, "neq", valor)
+
+    def gt(self, coluna, valor):
+        return self._filtro(coluna, "gt", valor)
+
+    def gte(self, coluna, valor):
+        return self._filtro(coluna, "gte", valor)
+
+    def lt(self, coluna, valor):
+        return self._filtro(coluna, "lt", valor)
+
+    def lte(self, coluna, valor):
+        return self._filtro(coluna, "lte", valor)
+
+    def in_(self, coluna, valores):
+        return self._filtro(coluna, "in", list(valores))
+
+    def is_(self, coluna, valor):
+        alvo = None if valor in (None, "null") else valor
+        return self._filtro(coluna, "is", alvo)
+
+    def or_(self, filtros):
+        termos = [_filtro_logico(t) for t in _dividir_termos(filtros)]
+        self._filtros.append(lambda linha: any(f(linha) for f in termos))
+        return self
+
+    # --- Ordenação e janela ---
+    def order(self, coluna, desc=False):
+        self._ordem.append((coluna, desc))
+        return self
+
+    def limit(self, quantidade):
+        self._limite = quantidade
+        return self
+
+    def range(self, inicio, fim):
+        self._inicio = inicio
+        self._limite = fim - inicio + 1
+        return self
+
+    # --- Execução ---
+    def _linhas_filtradas(self, linhas):
+        return [l for l in linhas if all(f(l) for f in self._filtros)]
+
+    def _ordenar(self, linhas):
+        for coluna, desc in reversed(self._ordem):
+            # NULLS LAST em ASC e NULLS FIRST em DESC, como no Postgres
+            nulos = [l for l in linhas if l.get(coluna) is None]
+            valores = sorted(
+                (l for l in linhas if l.get(coluna) is not None),
+                key=lambda l: l.get(coluna),
+                reverse=desc,
+            )
+            linhas = nulos + valores if desc else valores + nulos
+        return linhas
+
+    def _projetar(self, linhas):
+        if self._colunas is None:
+            return deepcopy(linhas)
+        return [{c: deepcopy(l.get(c)) for c in self._colunas} for l in linhas]
+
+    def execute(self):
+        return self._banco._executar(self)
+
+    def _executar_em(self, tabelas):
+        if self._operacao == "select":
+            self._banco.verificar_colunas(
+                self._tabela, (self._colunas or []) + self._colunas_filtro + [c for c, _ in self._ordem]
+            )
+            linhas = tabelas.get(self._tabela, [])
+            selecionadas = self._ordenar(self._linhas_filtradas(linhas))
+            total = len(selecionadas) if self._count else None
+            if self._head:
+                return RespostaMemoria([], total)
+            fim = None if self._limite is None else self._inicio + self._limite
+            return RespostaMemoria(self._projetar(selecionadas[self._inicio:fim]), total)
+
+        payload = self._payload if isinstance(self._payload, list) else [self._payload or {}]
+        self._banco.verificar_colunas(self._tabela, {c for linha in payload for c in linha})
+        # Só conta como alteração se o comando não falhar (como no Postgres)
+        resposta = self._escrever(tabelas.setdefault(self._tabela, []))
+        self._banco.registrar_escrita(self._tabela)
+        return resposta
+
+    def _escrever(self, linhas):
+        chave = self._banco.chaves.get(self._tabela)
+
+        if self._operacao == "insert":
+            novas = deepcopy(self._payload if isinstance(self._payload, list) else [self._payload])
+            if chave:
+                existentes = {l.get(chave) for l in linhas}
+                for nova in novas:
+                    if nova.get(chave) in existentes:
+                        raise APIError({
+                            "code": "23505",
+                            "message": f'duplicate key value violates unique constraint "{self._tabela}_pkey"',
+                        })
+                    existentes.add(nova.get(chave))
+            self._banco.carimbar(self._tabela, novas, inseridas=True)
+            linhas.extend(novas)
+            return RespostaMemoria(deepcopy(novas))
+
+        if self._operacao == "update":
+            alteradas = self._linhas_filtradas(linhas)
+            for linha in alteradas:
+                linha.update(deepcopy(self._payload))
+            self._banco.carimbar(self._tabela, alteradas)
+            return RespostaMemoria(deepcopy(alteradas))
+
+        if self._operacao == "upsert":
+            chave = self._on_conflict or chave
+            novas = deepcopy(self._payload if isinstance(self._payload, list) else [self._payload])
+            por_chave = {l.get(chave): l for l in linhas}
+            gravadas = []
+            for nova in novas:
+                atual = por_chave.get(nova.get(chave))
+                if atual is not None:
+                    atual.update(nova)
+                    gravadas.append(atual)
+                else:
+                    linhas.append(nova)
+                    por_chave[nova.get(chave)] = nova
+                    gravadas.append(nova)
+            self._banco.carimbar(self._tabela, gravadas)
+            return RespostaMemoria(deepcopy(gravadas))
+
+        if self._operacao == "delete":
+            removidas = self._linhas_filtradas(linhas)
+            ids = {id(l) for l in removidas}
+            linhas[:] = [l for l in linhas if id(l) not in ids]
+            self._banco.registrar_exclusao(self._tabela, removidas)
+            return RespostaMemoria(deepcopy(removidas))
+
+        raise ValueError(f"Operação não suportada: {self._operacao}")
+
+
+class ChamadaRpcMemoria:
+    """Chamada de função do banco (equivalente a `client.rpc(nome, params)`)."""
+
+    def __init__(self, banco, nome, params):
+        self._banco = banco
+        self._nome = nome
+        self._params = params or {}
+
+    def execute(self):
+        return self._banco._executar(self)
+
+    def _executar_em(self, tabelas):
+        func = self._banco.rpcs.get(self._nome)
+        if func is None:
+            raise APIError({
+                "code": "PGRST202",
+                "message": f"Could not find the function public.{self._nome} in the schema cache",
+            })
+        return RespostaMemoria(func(self._banco, **self._params))
+
+
+class BancoMemoria:
+    """
+    Substituto local do cliente Supabase.
+
+    Todas as requisições são serializadas por um lock, o que reproduz a
+    atomicidade de cada comando no Postgres e permite testes com threads.
+    `latencia` (segundos) simula o tempo de rede de cada requisição e
+    `marcas_dagua=True` simula as migrações 007 e 011 (ID_LOG sequencial nos
+    logs, ALTERADO_EM em pedidos, clientes e estoque_salmao e a tabela
+    `exclusoes`) e `datas_nativas=True` a 008 (DATA_ENTREGA e CRIADO_EM em
+    pedidos).
+    """
+
+    def __init__(self, tabelas=None, chaves=None, rpcs=None, latencia=0.0, marcas_dagua=False,
+                 datas_nativas=False):
+        self.tabelas = deepcopy(tabelas) if tabelas else {}
+        self.chaves = dict(_CHAVES_PADRAO, **(chaves or {}))
+        self.rpcs = dict(_RPCS if rpcs is None else rpcs)
+        self.latencia = latencia
+        self.marcas_dagua = marcas_dagua
+        self.datas_nativas = datas_nativas
+        self.requisicoes = 0
+        self.bytes_respostas = 0
+        self._lock = threading.RLock()
+
+    def table(self, nome):
+        return ConsultaMemoria(self, nome)
+
+    def rpc(self, nome, params=None):
+        return ChamadaRpcMemoria(self, nome, params)
+
+    def carimbar(self, tabela, linhas, inseridas=False):
+        """Preenche ID_LOG/ALTERADO_EM nas linhas gravadas, como os defaults e triggers da 007/011."""
+        if not self.marcas_dagua:
+            return
+        identidade = _IDENTIDADES.get(tabela)
+        if identidade and inseridas:
+            existentes = self.tabelas.get(tabela, [])
+            proximo = max((l.get(identidade) or 0 for l in existentes), default=0) + 1
+            for linha in linhas:
+                if linha.get(identidade) is None:
+                    linha[identidade] = proximo
+                    proximo += 1
+        carimbo = _CARIMBOS.get(tabela)
+        if carimbo:
+            agora = datetime.now(timezone.utc).isoformat()
+            for linha in linhas:
+                linha[carimbo] = agora
+
+    def registrar_exclusao(self, tabela, linhas):
+        """Grava as chaves das linhas excluídas em `exclusoes`, como o trigger da 011."""
+        if not self.marcas_dagua or tabela not in _EXCLUSOES_REGISTRADAS or not linhas:
+            return
+        chave = self.chaves[tabela]
+        exclusoes = [{"tabela": tabela, "chave": l.get(chave)} for l in linhas]
+        self.carimbar("exclusoes", exclusoes, inseridas=True)
+        self.tabelas.setdefault("exclusoes", []).extend(exclusoes)
+
+    def verificar_colunas(self, tabela, colunas):
+        """Sem `marcas_dagua`/`datas_nativas`, as colunas da 007/008/011 não existem (erro 42703)."""
+        if tabela == "exclusoes" and not self.marcas_dagua:
+            raise APIError({"code": "42P01", "message": 'relation "exclusoes" does not exist'})
+        ausentes = set()
+        if not self.marcas_dagua:
+            ausentes |= {_IDENTIDADES.get(tabela), _CARIMBOS.get(tabela)}
+        if not self.datas_nativas:
+            ausentes |= set(_COLUNAS_DATAS.get(tabela, ()))
+        for coluna in colunas:
+            if coluna in ausentes:
+                raise APIError({"code": "42703", "message": f"column {tabela}.{coluna} does not exist"})
+
+    def registrar_escrita(self, *tabelas):
+        """Incrementa a versão das tabelas em `versoes_dados`, se ela existir."""
+        versoes = self.tabelas.get("versoes_dados")
+        if versoes is None:
+            return
+        for tabela in tabelas:
+            linha = next((v for v in versoes if v["tabela"] == tabela), None)
+            if linha is None:
+                versoes.append({"tabela": tabela, "versao": 1})
+            else:
+                linha["versao"] += 1
+
+    def _executar(self, consulta):
+        if self.latencia:
+            time.sleep(self.latencia)
+        with self._lock:
+            self.requisicoes += 1
+            resposta = consulta._executar_em(self.tabelas)
+            self.bytes_respostas += len(json.dumps(resposta.data, default=str).encode("utf-8"))
+            return resposta
+
+
+# ============================================================
+# RPCs (mesma semântica das funções SQL em migrations/)
+# ============================================================
+
+@_rpc("reservar_ids")
+def _reservar_ids(banco, p_tabela, p_quantidade=1):
+    contadores = banco.tabelas.setdefault("contadores_id", [])
+    linha = next((c for c in contadores if c["tabela"] == p_tabela), None)
+    if linha is None:
+        linha = {"tabela": p_tabela, "ultimo_id": 0}
+        contadores.append(linha)
+    linha["ultimo_id"] += max(int(p_quantidade), 1)
+    return linha["ultimo_id"]
+
+
+@_rpc("arquivar_tags")
+def _arquivar_tags(banco, p_tags, p_usuario, p_data_hora):
+    tags = {int(t) for t in p_tags}
+    estoque = banco.tabelas.setdefault("estoque_salmao", [])
+    subtags = banco.tabelas.setdefault("estoque_subtags", [])
+
+    banco.registrar_escrita("estoque_salmao", "estoque_salmao_backup",
+                            "estoque_subtags", "estoque_subtags_backup", "logs")
+    pais = [l for l in estoque if l.get("Tag") in tags]
+    banco.tabelas.setdefault("estoque_salmao_backup", []).extend(deepcopy(pais))
+    filhas = [l for l in subtags if l.get("ID_Pai") in tags]
+    banco.tabelas.setdefault("estoque_subtags_backup", []).extend(deepcopy(filhas))
+    subtags[:] = [l for l in subtags if l.get("ID_Pai") not in tags]
+
+    for linha in pais:
+        linha.update({"Status": None, "Calibre": None, "Peso": 0.0, "Cliente": None,
+                      "Fornecedor": None, "Validade": None})
+    banco.carimbar("estoque_salmao", pais)
+    logs = [{
+        "DATA_HORA": p_data_hora,
+        "USUARIO": p_usuario,
+        "CAMPO": "ARQUIVAMENTO_RESET",
+        "VALOR_ANTIGO": f"TAG-{t}",
+        "VALOR_NOVO": "Reset Total (Status None)",
+    } for t in p_tags]
+    banco.carimbar("logs", logs, inseridas=True)
+    banco.tabelas.setdefault("logs", []).extend(logs)
+    return len(pais)
+
+
+@_rpc("atualizar_pedidos")
+def _atualizar_pedidos(banco, p_alteracoes):
+    por_id = {int(a["ID_PEDIDO"]): {c: v for c, v in a.items() if c != "ID_PEDIDO"} for a in p_alteracoes}
+    banco.verificar_colunas("pedidos", {c for campos in por_id.values() for c in campos})
+    atualizados = [p for p in banco.tabelas.get("pedidos", []) if p.get("ID_PEDIDO") in por_id]
+    for pedido in atualizados:
+        pedido.update(por_id[pedido["ID_PEDIDO"]])
+    if atualizados:
+        banco.registrar_escrita("pedidos")
+        banco.carimbar("pedidos", atualizados)
+    return [{"ID_PEDIDO": p["ID_PEDIDO"]} for p in atualizados]
+
+
+@_rpc("resumo_status_salmao")
+def _resumo_status_salmao(banco):
+    contagens = {}
+    for linha in banco.tabelas.get("estoque_salmao", []):
+        contagens[linha.get("Status")] = contagens.get(linha.get("Status"), 0) + 1
+    return {
+        "status": [{"status": s, "quantidade": q} for s, q in contagens.items()],
+        "historico": len(banco.tabelas.get("estoque_salmao_backup", [])),
+    }
+
+
+@_rpc("valores_filtros_pedidos")
+def _valores_filtros_pedidos(banco):
+    pedidos = banco.tabelas.get("pedidos", [])
+
+    def distintos(coluna):
+        return sorted({str(p[coluna]) for p in pedidos if p.get(coluna) is not None and str(p[coluna]).strip()})
+
+    return {"cidades": distintos("CIDADE"), "rotas": distintos("ROTA")}
+
+
+@_rpc("preencher_datas_pedidos")
+def _preencher_datas_pedidos(banco, p_apos=0, p_lote=5000):
+    banco.verificar_colunas("pedidos", _COLUNAS_DATAS["pedidos"])
+    pedidos = banco.tabelas.get("pedidos", [])
+    lote = sorted((p for p in pedidos if p["ID_PEDIDO"] > int(p_apos)), key=lambda p: p["ID_PEDIDO"])[:int(p_lote)]
+    if not lote:
+        return {"ultimo": None, "atualizados": 0}
+    atualizados = 0
+    for pedido in lote:
+        if pedido.get("DATA_ENTREGA") is None or pedido.get("CRIADO_EM") is None:
+            pedido["DATA_ENTREGA"] = pedido.get("DATA_ENTREGA") or data_br_iso(pedido.get("DIA DA ENTREGA"))
+            pedido["CRIADO_EM"] = pedido.get("CRIADO_EM") or carimbo_br_iso(pedido.get("CARIMBO DE DATA/HORA"))
+            banco.carimbar("pedidos", [pedido])
+            atualizados += 1
+    if atualizados:
+        banco.registrar_escrita("pedidos")
+    return {"ultimo": lote[-1]["ID_PEDIDO"], "atualizados": atualizados}
+
+
+@_rpc("resumo_dashboard")
+def _resumo_dashboard(banco, p_inicio=None, p_fim=None, p_top=5):
+    # Agrega direto de `pedidos`: o trigger da 009 mantém resumo_pedidos igual a isso
+    def contar(contagens, chave):
+        chave = "" if chave is None else str(chave).strip(" \t\r\n")  # chave_resumo da 009
+        if chave:
+            contagens[chave] = contagens.get(chave, 0) + 1
+
+    total, status, pagamento, dias, clientes = 0, {}, {}, {}, {}
+    for pedido in banco.tabelas.get("pedidos", []):
+        data = pedido.get("DATA_ENTREGA") or data_br_iso(pedido.get("DIA DA ENTREGA"))
+        if (p_inicio or p_fim) and data is None:
+            continue
+        if (p_inicio and data < p_inicio) or (p_fim and data > p_fim):
+            continue
+        total += 1
+        contar(status, pedido.get("STATUS"))
+        contar(pagamento, pedido.get("PAGAMENTO"))
+        contar(dias, data)
+        contar(clientes, pedido.get("NOME CLIENTE"))
+    top = sorted(clientes.items(), key=lambda c: (-c[1], c[0]))[:int(p_top)]
+    return {"total": total, "status": status, "pagamento": pagamento, "dias": dict(sorted(dias.items())),
+            "clientes": [list(c) for c in top]}
@@ -0,0 +1,392 @@
+"""
+Modelo de leitura local (SQLite) de pedidos, clientes e estoque_salmao.
+
+Os caches do Streamlit morrem a cada reinício/deploy e os primeiros acessos
+recarregavam as tabelas inteiras do Supabase. Aqui cada tabela tem uma cópia
+em disco (MODELO_LOCAL_ARQUIVO) junto com a versão (`versoes_dados`) e a
+marca d'água da última sincronização:
+
+    - versão igual à guardada: lê do disco, sem ir ao Supabase;
+    - versão diferente: busca só o que mudou desde a marca d'água, o maior
+      ALTERADO_EM visto (migrations 007 e 011): as linhas com ALTERADO_EM
+      maior e as chaves gravadas em `exclusoes` depois dele;
+    - sem a marca: recarrega a tabela, em lotes.
+
+A busca no Supabase é feita fora do lock dos dados: enquanto uma tabela
+sincroniza, as leituras seguem respondendo com a cópia anterior.
+
+Sem `versoes_dados` (003) ou sem as marcas da 007/011 o modelo fica desligado
+e as leituras vão direto ao Supabase: sem versão a cada escrita, a versão muda
+a cada minuto, e sem marca cada mudança recarregaria a tabela inteira.
+
+As linhas ficam guardadas como o JSON devolvido pelo PostgREST, então as
+leituras daqui montam os mesmos DataFrames das consultas diretas.
+"""
+import json
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import streamlit as st
+from postgrest.exceptions import APIError
+
+from core.config import MODELO_LOCAL_ARQUIVO
+from services.database.cache import obter_versao_planilha, registrar_leitor
+from services.database.client import get_banco_substituto, get_db_client
+from services.logging_module import logger
+
+# Linhas por requisição ao buscar em lotes
+_LOTE = 1000
+# Margem na marca ALTERADO_EM: transações que começaram antes da última
+# sincronização e terminaram depois têm carimbo anterior à marca
+_MARGEM_CARIMBO = timedelta(minutes=2)
+_CARIMBO = "ALTERADO_EM"
+_CARIMBO_INICIAL = "1970-01-01T00:00:00+00:00"
+# Formato do arquivo SQLite (PRAGMA user_version)
+_VERSAO_ESQUEMA = 3
+# Tabela/coluna inexistente (Postgres e PostgREST)
+_OBJETO_INEXISTENTE = {"42P01", "42703", "PGRST204", "PGRST205"}
+# Sem as migrações, de quanto em quanto tempo verificar de novo (aplicadas depois)
+_REVERIFICAR_MIGRACOES_SEGUNDOS = 600
+_MIGRACOES = {}
+
+
+@dataclass(frozen=True)
+class Espelho:
+    """Como sincronizar uma tabela: chave primária (a marca d'água é ALTERADO_EM)."""
+
+    chave: str
+
+
+TABELAS = {
+    "pedidos": Espelho("ID_PEDIDO"),
+    "clientes": Espelho("Código"),
+    "estoque_salmao": Espelho("Tag"),
+}
+
+
+def paginas(consulta, chave, lote=_LOTE, unica=True):
+    """
+    Páginas (listas de linhas) de `consulta()` (nova a cada chamada), em ordem
+    de `chave`, paginando por keyset. Só uma página fica em memória por vez.
+
+    Com `unica=False` a chave pode se repetir (ex.: Tag no histórico do
+    salmão): uma página nunca termina no meio de um valor, então nenhuma linha
+    se perde nem se repete entre páginas.
+    """
+    ultimo = None
+    while True:
+        query = consulta()
+        if ultimo is not None:
+            query = query.gt(chave, ultimo)
+        pagina = query.order(chave).limit(lote).execute().data or []
+        if len(pagina) < lote:
+            if pagina:
+                yield pagina
+            return
+        fronteira = pagina[-1][chave]
+        if not unica:
+            completas = [l for l in pagina if l[chave] != fronteira]
+            # Todas as linhas do valor da fronteira, numa consulta só
+            completas += consulta().eq(chave, fronteira).execute().data or []
+            pagina = completas
+        yield pagina
+        ultimo = fronteira
+
+
+def _em_lotes(consulta, chave, lote=_LOTE):
+    """Todas as linhas de `consulta()` (nova a cada chamada), paginando por `chave`."""
+    return [linha for pagina in paginas(consulta, chave, lote) for linha in pagina]
+
+
+def marca_carimbo(client, tabela):
+    """Maior ALTERADO_EM de `tabela` (_CARIMBO_INICIAL se vazia), ou None sem as migrações."""
+    try:
+        resp = client.table(tabela).select(_CARIMBO).order(_CARIMBO, desc=True).limit(1).execute()
+    except Exception:
+        return None
+    if not resp.data:
+        return _CARIMBO_INICIAL
+    valor = resp.data[0].get(_CARIMBO)
+    return None if valor is None else str(valor)
+
+
+def _instante(carimbo):
+    return datetime.fromisoformat(carimbo)
+
+
+def delta_carimbo(client, tabela, chave, marca, colunas="*"):
+    """
+    Alterações de `tabela` desde a marca d'água (ALTERADO_EM, com margem):
+    linhas com ALTERADO_EM maior e chaves excluídas depois dela (`exclusoes`,
+    migração 011). Retorna (linhas, removidos, nova_marca); uma chave que
+    aparece nos dois fica com o evento mais recente.
+    """
+    desde = _recuar(marca)
+    if colunas != "*":
+        colunas = f'{colunas}, "{_CARIMBO}"'
+    linhas = _em_lotes(lambda: client.table(tabela).select(colunas).gt(_CARIMBO, desde), chave)
+    exclusoes = _em_lotes(
+        lambda: client.table("exclusoes").select(f'"ID_EXCLUSAO", chave, "{_CARIMBO}"')
+        .eq("tabela", tabela).gt(_CARIMBO, desde),
+        "ID_EXCLUSAO",
+    )
+
+    alteradas = {l[chave]: _instante(l[_CARIMBO]) for l in linhas}
+    excluidas = {}
+    for e in exclusoes:
+        instante = _instante(e[_CARIMBO])
+        if int(e["chave"]) not in excluidas or instante > excluidas[int(e["chave"])]:
+            excluidas[int(e["chave"])] = instante
+    # Excluída e inserida de novo: vale a linha; alterada e depois excluída: vale a exclusão
+    removidos = sorted(c for c, instante in excluidas.items() if c not in alteradas or instante >= alteradas[c])
+    linhas = [l for l in linhas if l[chave] not in set(removidos)]
+
+    carimbos = [l[_CARIMBO] for l in linhas] + [e[_CARIMBO] for e in exclusoes]
+    return linhas, removidos, max(carimbos + [marca], key=_instante)
+
+
+def _recuar(carimbo):
+    """
+    Marca ALTERADO_EM com a margem de segurança aplicada. Não passa da época:
+    é o carimbo das linhas anteriores à 011, que nunca chegam atrasadas.
+    """
+    return max(_instante(carimbo) - _MARGEM_CARIMBO, _instante(_CARIMBO_INICIAL)).isoformat()
+
+
+def sincronizacao_disponivel(client) -> bool:
+    """True se o banco tem `versoes_dados` (migração 003) e as marcas d'água da 007/011."""
+    agora = time.monotonic()
+    valor, instante = _MIGRACOES.get(client, (None, 0.0))
+    if valor or (valor is not None and agora - instante < _REVERIFICAR_MIGRACOES_SEGUNDOS):
+        return valor
+    marcas = [(tabela, _CARIMBO) for tabela in TABELAS] + [("exclusoes", _CARIMBO)]
+    try:
+        # A 003 cria uma linha por tabela: vazia = migração não aplicada
+        valor = bool(client.table("versoes_dados").select("tabela").limit(1).execute().data)
+        for tabela, coluna in marcas:
+            client.table(tabela).select(coluna).limit(1).execute()
+    except APIError as e:
+        if e.code not in _OBJETO_INEXISTENTE:
+            return False
+        valor = False
+    except Exception:
+        return False  # falha de rede: não guarda a resposta
+    _MIGRACOES[client] = (valor, agora)
+    return valor
+
+
+class ModeloLocal:
+    """Cópia local das tabelas em um arquivo SQLite (thread-safe)."""
+
+    def __init__(self, caminho):
+        if caminho != ":memory:":
+            Path(caminho).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(caminho, check_same_thread=False)
+        # _lock protege o SQLite (curto); _sincronizando serializa a
+        # sincronização de cada tabela, que busca no Supabase sem o _lock
+        self._lock = threading.RLock()
+        self._sincronizando = {tabela: threading.Lock() for tabela in TABELAS}
+        self._desatualizacoes = dict.fromkeys(TABELAS, 0)
+        with self._lock, self._conn:
+            if self._conn.execute("PRAGMA user_version").fetchone()[0] != _VERSAO_ESQUEMA:
+                # É só uma cópia: com outro formato, recomeça do zero
+                self._conn.execute("DROP TABLE IF EXISTS linhas")
+                self._conn.execute("DROP TABLE IF EXISTS sincronizacao")
+                self._conn.execute(f"PRAGMA user_version = {_VERSAO_ESQUEMA}")
+            # dados NULL = linha removida (mantida para o feed de alterações)
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS linhas ("
+                " tabela TEXT NOT NULL, chave NOT NULL, dados TEXT, seq INTEGER NOT NULL,"
+                " PRIMARY KEY (tabela, chave))"
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS linhas_seq_idx ON linhas (tabela, seq)")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sincronizacao ("
+                " tabela TEXT PRIMARY KEY, versao TEXT, marca TEXT, sincronizado_em TEXT,"
+                " geracao INTEGER NOT NULL DEFAULT 0, seq INTEGER NOT NULL DEFAULT 0)"
+            )
+
+    # --- Estado ---
+    def estado(self, tabela) -> dict:
+        """
+        Versão e marca d'água guardadas de `tabela` ({} se nunca sincronizada).
+        `geracao` muda a cada recarga completa e `seq` a cada sincronização.
+        """
+        with self._lock:
+            linha = self._conn.execute(
+                "SELECT versao, marca, geracao, seq FROM sincronizacao WHERE tabela = ?", (tabela,)
+            ).fetchone()
+        return dict(zip(("versao", "marca", "geracao", "seq"), linha)) if linha else {}
+
+    def marcar_desatualizada(self, *tabelas):
+        """Esquece a versão guardada (a próxima leitura sincroniza o delta)."""
+        with self._lock, self._conn:
+            for tabela in tabelas:
+                self._desatualizacoes[tabela] += 1
+            self._conn.executemany(
+                "UPDATE sincronizacao SET versao = NULL WHERE tabela = ?", [(t,) for t in tabelas]
+            )
+
+    # --- Sincronização ---
+    def sincronizar(self, client, tabela, versao) -> str:
+        """
+        Deixa `tabela` na `versao` informada. Retorna o que foi feito:
+        "atual" (nada), "delta" (só as alterações) ou "completa" (recarga).
+        """
+        espelho = TABELAS[tabela]
+        versao = str(versao)
+        with self._sincronizando[tabela]:
+            with self._lock:
+                estado = self.estado(tabela)
+                desatualizacoes = self._desatualizacoes[tabela]
+            if estado.get("versao") == versao:
+                return "atual"
+
+            # Rede sem o _lock: leituras e outras tabelas não esperam
+            if estado.get("marca") is not None:
+                modo = "delta"
+                linhas, removidos, marca = delta_carimbo(client, tabela, espelho.chave, estado["marca"])
+            else:
+                modo = "completa"
+                # A marca é lida antes: o que mudar durante a recarga entra no próximo delta
+                marca = marca_carimbo(client, tabela)
+                linhas, removidos = _em_lotes(lambda: client.table(tabela).select("*"), espelho.chave), []
+
+            with self._lock, self._conn:
+                geracao, seq = estado.get("geracao", 0), estado.get("seq", 0) + 1
+                if modo == "completa":
+                    geracao += 1
+                    self._conn.execute("DELETE FROM linhas WHERE tabela = ?", (tabela,))
+                self._conn.executemany(
+                    "UPDATE linhas SET dados = NULL, seq = ? WHERE tabela = ? AND chave = ?",
+                    [(seq, tabela, c) for c in removidos],
+                )
+                self._gravar(tabela, espelho, linhas, seq)
+                # Uma escrita deste processo no meio da busca pode não ter vindo
+                if self._desatualizacoes[tabela] != desatualizacoes:
+                    versao = None
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO sincronizacao VALUES (?, ?, ?, ?, ?, ?)",
+                    (tabela, versao, marca, datetime.now().isoformat(timespec="seconds"), geracao, seq),
+                )
+            return modo
+
+    def _gravar(self, tabela, espelho, linhas, seq):
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO linhas (tabela, chave, dados, seq) VALUES (?, ?, ?, ?)",
+            [(tabela, l[espelho.chave], json.dumps(l, default=str), seq) for l in linhas],
+        )
+
+    def alteracoes(self, tabela, geracao, seq, colunas=None):
+        """
+        Feed local de alterações: linhas gravadas depois da sincronização `seq`.
+
+        Retorna (linhas, chaves_removidas, (geracao, seq) atual), ou None se
+        houve recarga completa desde `geracao` (quem lê deve reler tudo).
+        """
+        with self._lock:
+            estado = self.estado(tabela)
+            if not estado or estado["geracao"] != geracao:
+                return None
+            alteradas = self._conn.execute(
+                "SELECT chave, dados FROM linhas WHERE tabela = ? AND seq > ?", (tabela, seq)
+            ).fetchall()
+        linhas = [json.loads(d) for _, d in alteradas if d is not None]
+        if colunas is not None:
+            linhas = [{c: l.get(c) for c in colunas} for l in linhas]
+        removidas = [c for c, d in alteradas if d is None]
+        return linhas, removidas, (estado["geracao"], estado["seq"])
+
+    # --- Leitura ---
+    def linhas(self, tabela, colunas=None, de=None, ate=None, desc=False, limite=None) -> list:
+        """
+        Linhas de `tabela` ordenadas pela chave, como o PostgREST as devolveria.
+        `de`/`ate` limitam a chave (inclusive); `colunas` projeta cada linha.
+        """
+        sql = "SELECT dados FROM linhas WHERE tabela = ? AND dados IS NOT NULL"
+        params = [tabela]
+        if de is not None:
+            sql += " AND chave >= ?"
+            params.append(de)
+        if ate is not None:
+            sql += " AND chave <= ?"
+            params.append(ate)
+        sql += " ORDER BY chave DESC" if desc else " ORDER BY chave"
+        if limite is not None:
+            sql += " LIMIT ?"
+            params.append(int(limite))
+        with self._lock:
+            dados = [json.loads(d) for (d,) in self._conn.execute(sql, params)]
+        if colunas is not None:
+            dados = [{c: l.get(c) for c in colunas} for l in dados]
+        return dados
+
+
+@st.cache_resource
+def _criar_modelo_local():
+    return ModeloLocal(MODELO_LOCAL_ARQUIVO)
+
+
+# Modelo definido por `usar_modelo_local` (testes); None = o do arquivo configurado
+_modelo_substituto = None
+
+
+@contextmanager
+def usar_modelo_local(modelo):
+    """Usa `modelo` como modelo local enquanto o bloco estiver ativo."""
+    global _modelo_substituto
+    anterior = _modelo_substituto
+    _modelo_substituto = modelo
+    try:
+        yield modelo
+    finally:
+        _modelo_substituto = anterior
+
+
+def get_modelo_local():
+    """Modelo local ativo, ou None (desativado ou com um banco substituto sem modelo)."""
+    if _modelo_substituto is not None:
+        return _modelo_substituto
+    if not MODELO_LOCAL_ARQUIVO or get_banco_substituto() is not None:
+        return None
+    if not sincronizacao_disponivel(get_db_client()):
+        return None
+    return _criar_modelo_local()
+
+
+def modelo_sincronizado(tabela):
+    """
+    Modelo local com `tabela` em dia com o banco, ou None se não houver modelo
+    ou a sincronização falhar (a leitura então vai direto ao Supabase).
+    """
+    modelo = get_modelo_local()
+    if modelo is None:
+        return None
+    try:
+        (versao,) = obter_versao_planilha().de(tabela)
+        modelo.sincronizar(get_db_client(), tabela, versao)
+        return modelo
+    except Exception as e:
+        logger.aviso("modelo_sincronizado", f"{tabela}: {e}")
+        return None
+
+
+class _Desatualizar:
+    """Escritas deste processo marcam a tabela para sincronizar na próxima leitura."""
+
+    def __init__(self, tabela):
+        self.tabela = tabela
+
+    def clear(self):
+        modelo = get_modelo_local()
+        if modelo is not None:
+            modelo.marcar_desatualizada(self.tabela)
+
+
+for _tabela in TABELAS:
+    registrar_leitor(f"{__name__}.{_tabela}", _Desatualizar(_tabela), _tabela)
@@ -1,59 +1,298 @@
 """
 Operações de pedidos.
 """
+import threading
+import time
+import weakref
+
 import pandas as pd
 import streamlit as st
-from datetime import datetime
+from datetime import datetime, timedelta
+
+from postgrest.exceptions import APIError
 
 from core.config import FUSO_BR
-from services.database.client import get_db_client, get_max_id
-from services.database.clientes import listar_clientes, get_metricas
+from services.database.cache import altera_tabelas, cache_por_versao
+from services.database.client import get_db_client, montar_pagina, RPC_INEXISTENTE
+from services.database.esquemas import carregar, select_do_esquema, tipar
+from services.database.ids import proximo_id
+from services.database.modelo_local import _em_lotes, delta_carimbo, marca_carimbo, modelo_sincronizado
 from services.utils import limpar_texto
 
 # Limites para performance
 _LIMITE_PEDIDOS_FILTROS = 5000
 _LIMITE_DASHBOARD = 5000
 
+# Datas nativas da migração 008; um banco sem elas é testado de novo a cada 10 min
+_REVERIFICAR_DATAS_SEGUNDOS = 600
+_DATAS_NATIVAS = weakref.WeakKeyDictionary()
+# Sem a migração, o período vira uma lista de dias em texto (até um ano)
+_DIAS_PERIODO_TEXTO = 366
+_ERRO_PERIODO_TEXTO = (
+    "Sem a migração 008 o período precisa ter data inicial e final e no máximo "
+    f"{_DIAS_PERIODO_TEXTO} dias. Ajuste o período ou aplique a migração."
+)
+
+# Colunas que o operador pode editar e colunas do relatório de atualização
+_COLUNAS_EDITAVEIS = ["STATUS", "PAGAMENTO", "NR PEDIDO", "OBSERVAÇÃO"]
+_COLUNAS_RELATORIO = ["ID_PEDIDO", "RESULTADO", "CAMPOS", "ERRO"]
+
+
+def datas_nativas(client) -> bool:
+    """True se `pedidos` já tem DATA_ENTREGA e CRIADO_EM (migração 008)."""
+    agora = time.monotonic()
+    valor, instante = _DATAS_NATIVAS.get(client, (None, 0.0))
+    if valor or (valor is not None and agora - instante < _REVERIFICAR_DATAS_SEGUNDOS):
+        return valor
+    try:
+        client.table("pedidos").select("DATA_ENTREGA").limit(1).execute()
+        valor = True
+    except APIError as e:
+        if e.code != "42703":
+            return False
+        valor = False
+    except Exception:
+        return False  # falha de rede: não guarda a resposta
+    _DATAS_NATIVAS[client] = (valor, agora)
+    return valor
+
+
+def _valores_validos(valores):
+    return sorted({str(x) for x in valores if x and str(x).strip() != ''})
+
 
-@st.cache_data(ttl=300, show_spinner=False)
+def _filtros_da_rpc(dados):
+    dados = dados or {}
+    return _valores_validos(dados.get("cidades") or []), _valores_validos(dados.get("rotas") or [])
+
+
+def _consulta_filtros_recentes(client):
+    """Sem a RPC: cidades e rotas dos últimos pedidos."""
+    return client.table("pedidos")\
+        .select("CIDADE, ROTA")\
+        .order("ID_PEDIDO", desc=True)\
+        .limit(_LIMITE_PEDIDOS_FILTROS)
+
+
+def _filtros_das_linhas(linhas):
+    if not linhas:
+        return [], []
+    df = pd.DataFrame(linhas)
+    return _valores_validos(df["CIDADE"].unique()), _valores_validos(df["ROTA"].unique())
+
+
+@cache_por_versao("pedidos", em_erro=lambda: ([], []), ttl=3600, show_spinner=False)
 def listar_dados_filtros():
+    """
+    Cidades e rotas de todos os pedidos, para os filtros da gestão.
+
+    A RPC `valores_filtros_pedidos` faz o SELECT DISTINCT no servidor: uma
+    resposta pequena e completa. Sem a migração, usa os últimos pedidos.
+    """
     client = get_db_client()
     try:
-        response = (
-            client.table("pedidos")
-            .select("CIDADE, ROTA")
-            .order("ID_PEDIDO", desc=True)
-            .limit(_LIMITE_PEDIDOS_FILTROS)
-            .execute()
-        )
-        if response.data:
-            df = pd.DataFrame(response.data)
-            cidades = sorted([str(x) for x in df["CIDADE"].unique() if x and str(x).strip() != ''])
-            rotas = sorted([str(x) for x in df["ROTA"].unique() if x and str(x).strip() != ''])
-            return cidades, rotas
+        return _filtros_da_rpc(client.rpc("valores_filtros_pedidos", {}).execute().data)
+    except APIError as e:
+        if e.code != RPC_INEXISTENTE:
+            raise
+    return _filtros_das_linhas(_consulta_filtros_recentes(client).execute().data)
+
+
+_COLUNAS_VISUALIZACAO = ["ID_PEDIDO", "STATUS", "PAGAMENTO", "DIA DA ENTREGA", "NOME CLIENTE"]
+_SELECT_VISUALIZACAO = select_do_esquema("pedidos", _COLUNAS_VISUALIZACAO)
+
+
+def _consulta_visualizacao(client, limite):
+    return client.table("pedidos").select(_SELECT_VISUALIZACAO).order("ID_PEDIDO", desc=True).limit(limite)
+
+
+class _InstantaneoVisualizacao:
+    """
+    Último resultado de `buscar_pedidos_visualizacao`, atualizado por delta.
+
+    `fonte` é de onde vieram os dados (o modelo local ou o cliente do banco) e
+    `marca` até onde as alterações já foram aplicadas: (geracao, seq) do feed
+    do modelo local, ou o maior ALTERADO_EM quando a leitura vai direto ao banco.
+    """
+
+    def __init__(self, limite):
+        self.limite = limite
+        self.df = None
+        self.fonte = None
+        self.marca = None
+        self.lock = threading.Lock()
+
+    def substituir(self, linhas, fonte, marca):
+        self.df = carregar(linhas, "pedidos", _COLUNAS_VISUALIZACAO)
+        self.fonte, self.marca = fonte, marca
+
+    def aplicar(self, linhas, removidos, marca):
+        """Troca as linhas alteradas, inclui as novas e mantém os `limite` pedidos mais novos."""
+        alterados = {int(l["ID_PEDIDO"]) for l in linhas} | {int(i) for i in removidos}
+        if alterados:
+            mantidos = self.df[~self.df["ID_PEDIDO"].isin(alterados)]
+            novos = carregar(linhas, "pedidos", _COLUNAS_VISUALIZACAO)
+            # concat de categorias diferentes vira object: tipa de novo
+            self.df = tipar(
+                pd.concat([mantidos, novos], ignore_index=True)
+                .sort_values("ID_PEDIDO", ascending=False)
+                .head(self.limite)
+                .reset_index(drop=True),
+                "pedidos",
+            )
+        self.marca = marca
+
+    def atualizar(self):
+        modelo = modelo_sincronizado("pedidos")
+        if modelo is not None:
+            delta = None
+            if self.fonte is modelo:
+                delta = modelo.alteracoes("pedidos", *self.marca, colunas=_COLUNAS_VISUALIZACAO)
+            if delta is not None:
+                self.aplicar(*delta)
+            else:
+                # Estado antes das linhas: o que entrar no meio é reaplicado depois
+                estado = modelo.estado("pedidos")
+                linhas = modelo.linhas("pedidos", colunas=_COLUNAS_VISUALIZACAO, desc=True, limite=self.limite)
+                self.substituir(linhas, modelo, (estado["geracao"], estado["seq"]))
+            return
+
+        client = get_db_client()
+        if self.fonte is client and self.marca is not None:
+            self.aplicar(*delta_carimbo(client, "pedidos", "ID_PEDIDO", self.marca, colunas=_SELECT_VISUALIZACAO))
+            return
+        # Sem ALTERADO_EM (migração 011), cada atualização relê a janela inteira;
+        # a marca só é procurada na primeira leitura de cada fonte
+        marca = marca_carimbo(client, "pedidos") if self.fonte is not client else None
+        self.substituir(_consulta_visualizacao(client, self.limite).execute().data or [], client, marca)
+
+
+_INSTANTANEOS = {}
+_LOCK_INSTANTANEOS = threading.Lock()
+
+
+@cache_por_versao("pedidos", em_erro=pd.DataFrame, ttl=3600, show_spinner=False)
+def buscar_pedidos_visualizacao(limite=_LIMITE_DASHBOARD):
+    """
+    Pedidos mais recentes para o dashboard e o Novo Pedido.
+
+    O resultado anterior fica guardado no processo; quando `pedidos` muda, só
+    os pedidos novos e os editados (pelos logs) são buscados e mesclados.
+    """
+    with _LOCK_INSTANTANEOS:
+        instantaneo = _INSTANTANEOS.setdefault(limite, _InstantaneoVisualizacao(limite))
+    try:
+        with instantaneo.lock:
+            instantaneo.atualizar()
+            if not instantaneo.df.empty:
+                return instantaneo.df.copy()
     except Exception:
-        pass
-    return [], []
+        instantaneo.fonte = None  # recomeça do zero na próxima leitura
+        raise
+    return pd.DataFrame()
+
+
+def _filtrar_periodo(df, data_inicio, data_fim):
+    """Filtro de período em pandas, para quando o banco não pode fazê-lo."""
+    entrega = df["DIA DA ENTREGA"].dt.date
+    if data_inicio is not None:
+        df = df[entrega >= pd.Timestamp(data_inicio).date()]
+    if data_fim is not None:
+        df = df[entrega <= pd.Timestamp(data_fim).date()]
+    return df.reset_index(drop=True)
+
+
+def _consulta_periodo(client, periodo):
+    query = client.table("pedidos").select(_SELECT_VISUALIZACAO)
+    return _aplicar_filtros(query, (periodo,)) if periodo else query
+
+
+def _pedidos_do_periodo(data_inicio, data_fim):
+    """
+    Todos os pedidos com entrega entre `data_inicio` e `data_fim` (inclusive;
+    None = sem limite), sem teto de linhas.
+
+    O período vai para a consulta (DATA_ENTREGA, migração 008); quando não dá
+    para expressá-lo no banco, ou com o modelo local, o filtro é feito aqui.
+    """
+    modelo = modelo_sincronizado("pedidos")
+    if modelo is not None:
+        linhas, periodo = modelo.linhas("pedidos", colunas=_COLUNAS_VISUALIZACAO), None
+    else:
+        client = get_db_client()
+        try:
+            periodo = _periodo(client, data_inicio, data_fim)
+        except ValueError:
+            periodo = None  # não cabe na consulta: lê tudo e filtra aqui
+        linhas = _em_lotes(lambda: _consulta_periodo(client, periodo), "ID_PEDIDO")
+    df = carregar(linhas, "pedidos", _COLUNAS_VISUALIZACAO)
+    if periodo is None and (data_inicio is not None or data_fim is not None):
+        df = _filtrar_periodo(df, data_inicio, data_fim)
+    return df
+
+
+# Mesmos caracteres do `chave_resumo` (btrim) da migração 009
+_ESPACOS_RESUMO = " \t\r\n"
+
+
+def _texto(serie):
+    return serie.astype(object).fillna("").astype(str).str.strip(_ESPACOS_RESUMO)
+
+
+def _resumo_do_df(df, top_clientes):
+    """
+    Mesmo formato da RPC `resumo_dashboard`, calculado a partir das linhas.
+
+    Uma única passada (value_counts das quatro chaves juntas) monta o mesmo
+    resumo da tabela `resumo_pedidos`; os totais saem desse resumo pequeno.
+    """
+    if df.empty:
+        return {"total": 0, "status": {}, "pagamento": {}, "dias": {}, "clientes": []}
+
+    resumo = pd.DataFrame({
+        "DIA": df["DIA DA ENTREGA"].dt.strftime("%Y-%m-%d").fillna(""),
+        "STATUS": _texto(df["STATUS"]),
+        "PAGAMENTO": _texto(df["PAGAMENTO"]),
+        "CLIENTE": _texto(df["NOME CLIENTE"]),
+    }).value_counts().reset_index(name="QTD")
+
+    def contagens(coluna):
+        por_chave = resumo.groupby(coluna, sort=True)["QTD"].sum()
+        return {k: int(v) for k, v in por_chave.items() if k != ""}
+
+    clientes = sorted(contagens("CLIENTE").items(), key=lambda c: (-c[1], c[0]))
+    return {
+        "total": int(resumo["QTD"].sum()),
+        "status": contagens("STATUS"),
+        "pagamento": contagens("PAGAMENTO"),
+        "dias": contagens("DIA"),
+        "clientes": [list(c) for c in clientes[:top_clientes]],
+    }
+
 
+def resumo_pedidos(data_inicio=None, data_fim=None, top_clientes=5):
+    """
+    Totais dos indicadores no período (None = sem limite), sem cache:
+        {"total": 120, "status": {"PENDENTE": 80, ...}, "pagamento": {...},
+         "dias": {"2026-03-01": 12, ...}, "clientes": [["CLIENTE A", 9], ...]}
 
-@st.cache_data(ttl=300, show_spinner=False)
-def buscar_pedidos_visualizacao(_hash_versao=None, _limite=None):
-    limite = _limite if _limite is not None else _LIMITE_DASHBOARD
+    A RPC `resumo_dashboard` soma a tabela `resumo_pedidos`, mantida por
+    trigger a cada escrita (migração 009): a resposta tem o tamanho do
+    gráfico, não do histórico. Sem a migração, agrega os pedidos do período.
+    Falhas de leitura sobem para quem chamou.
+    """
     client = get_db_client()
     try:
-        cols = 'ID_PEDIDO, STATUS, PAGAMENTO, "DIA DA ENTREGA", "NOME CLIENTE"'
-        response = (
-            client.table("pedidos")
-            .select(cols)
-            .order("ID_PEDIDO", desc=True)
-            .limit(limite)
-            .execute()
-        )
-        if response.data:
-            return pd.DataFrame(response.data)
-    except Exception:
-        pass
-    return pd.DataFrame()
+        params = {
+            "p_inicio": data_inicio.isoformat() if data_inicio else None,
+            "p_fim": data_fim.isoformat() if data_fim else None,
+            "p_top": top_clientes,
+        }
+        return client.rpc("resumo_dashboard", params).execute().data
+    except APIError as e:
+        if e.code != RPC_INEXISTENTE:
+            raise
+    return _resumo_do_df(_pedidos_do_periodo(data_inicio, data_fim), top_clientes)
 
 
 def obter_resumo_historico(nome_cliente, limite=5):
@@ -95,21 +334,19 @@ def obter_resumo_historico(nome_cliente, limite=5):
         return []
 
 
+@altera_tabelas("pedidos", "logs")
 def salvar_pedido(nome, descricao, data_entrega, pagamento_escolhido, status_escolhido, observacao="", nr_pedido="", usuario_logado="Sistema"):
     client = get_db_client()
-    get_metricas.clear()
-    listar_clientes.clear()
-    buscar_pedidos_visualizacao.clear()
-    listar_dados_filtros.clear()
 
     nome_final = limpar_texto(nome)
     obs_final = limpar_texto(observacao)
     nr_final = limpar_texto(nr_pedido)
     desc_final = descricao.strip()
     data_entrega_str = data_entrega.strftime("%d/%m/%Y")
-    data_log = datetime.now(FUSO_BR).strftime("%d/%m/%Y %H:%M:%S")
+    agora = datetime.now(FUSO_BR)
+    data_log = agora.strftime("%d/%m/%Y %H:%M:%S")
 
-    novo_id = get_max_id("pedidos", "ID_PEDIDO") + 1
+    novo_id = proximo_id("pedidos", "ID_PEDIDO")
 
     cod_cliente = None
     cidade_dest = "NÃO DEFINIDO"
@@ -139,6 +376,9 @@ def salvar_pedido(nome, descricao, data_entrega, pagamento_escolhido, status_esc
         "CIDADE": cidade_dest,
         "ROTA": rota_dest
     }
+    if datas_nativas(client):
+        dados_pedido["DATA_ENTREGA"] = data_entrega.strftime("%Y-%m-%d")
+        dados_pedido["CRIADO_EM"] = agora.isoformat()
 
     try:
         client.table("pedidos").insert(dados_pedido).execute()
@@ -154,92 +394,335 @@ def salvar_pedido(nome, descricao, data_entrega, pagamento_escolhido, status_esc
         raise Exception(f"Erro ao salvar no Supabase: {e}")
 
 
+def preencher_datas_pedidos(client, lote=5000, ao_avancar=None):
+    """
+    Preenche DATA_ENTREGA/CRIADO_EM dos pedidos antigos em lotes (RPC da
+    migração 008), do menor ao maior ID_PEDIDO. `ao_avancar(ultimo, atualizados)`
+    é chamado após cada lote. Retorna o total de pedidos atualizados.
+    """
+    apos, total = 0, 0
+    while True:
+        resultado = client.rpc("preencher_datas_pedidos", {"p_apos": apos, "p_lote": lote}).execute().data or {}
+        if resultado.get("ultimo") is None:
+            return total
+        apos = int(resultado["ultimo"])
+        total += int(resultado.get("atualizados") or 0)
+        if ao_avancar:
+            ao_avancar(apos, total)
+
+
+def _gravar_alteracoes(client, alteracoes):
+    """
+    Grava {ID_PEDIDO: {coluna: valor novo}} e retorna (ids gravados, {erro: ids}).
+
+    A RPC `atualizar_pedidos` (migração 010) faz tudo em um UPDATE, com os
+    campos de cada pedido. Sem ela, um update por combinação de valores novos.
+    """
+    try:
+        params = {"p_alteracoes": [{"ID_PEDIDO": i, **campos} for i, campos in alteracoes.items()]}
+        resp = client.rpc("atualizar_pedidos", params).execute()
+        return {int(l["ID_PEDIDO"]) for l in resp.data or []}, {}
+    except APIError as e:
+        if e.code != RPC_INEXISTENTE:
+            return set(), {str(e): list(alteracoes)}
+    except Exception as e:
+        return set(), {str(e): list(alteracoes)}
+
+    grupos = {}
+    for id_pedido, campos in alteracoes.items():
+        grupos.setdefault(tuple(campos.items()), []).append(id_pedido)
+    gravados, erros = set(), {}
+    for valores, ids in grupos.items():
+        try:
+            resp = client.table("pedidos").update(dict(valores)).in_("ID_PEDIDO", ids).execute()
+        except Exception as e:
+            erros.setdefault(str(e), []).extend(ids)
+            continue
+        gravados |= {int(l["ID_PEDIDO"]) for l in resp.data or []}
+    return gravados, erros
+
+
+@altera_tabelas("pedidos", "logs")
 def atualizar_pedidos_editaveis(df_editado, usuario_logado="Sistema"):
+    """
+    Grava em lote as edições de STATUS, PAGAMENTO, NR PEDIDO e OBSERVAÇÃO.
+
+    Faz uma busca única dos pedidos (in_ ID_PEDIDO), compara as colunas de forma
+    vetorizada, grava só os campos alterados de todos os pedidos em uma chamada
+    (`_gravar_alteracoes`) e faz um insert com todos os logs: três requisições,
+    independente da quantidade de linhas.
+
+    Retorna um DataFrame com uma linha por pedido: ID_PEDIDO, RESULTADO
+    ("atualizado", "sem_alteracao", "nao_encontrado" ou "erro"), CAMPOS e ERRO.
+    """
     client = get_db_client()
     if df_editado.empty:
-        return
-
-    buscar_pedidos_visualizacao.clear()
-    colunas_check = ["STATUS", "PAGAMENTO", "NR PEDIDO", "OBSERVAÇÃO"]
+        return pd.DataFrame(columns=_COLUNAS_RELATORIO)
 
     if "ID_PEDIDO" not in df_editado.columns:
         st.error("ID_PEDIDO não encontrado na edição.")
-        return
+        return pd.DataFrame(columns=_COLUNAS_RELATORIO)
 
     timestamp = datetime.now(FUSO_BR).strftime("%d/%m/%Y %H:%M:%S")
+    colunas = [c for c in _COLUNAS_EDITAVEIS if c in df_editado.columns]
+
+    novos = df_editado[["ID_PEDIDO"] + colunas].copy()
+    novos["ID_PEDIDO"] = pd.to_numeric(novos["ID_PEDIDO"], errors="coerce")
+    invalidos = novos[novos["ID_PEDIDO"].isna()]
+    novos = novos.dropna(subset=["ID_PEDIDO"]).drop_duplicates("ID_PEDIDO", keep="last")
+    novos["ID_PEDIDO"] = novos["ID_PEDIDO"].astype(int)
+
+    relatorio = pd.DataFrame({
+        "ID_PEDIDO": novos["ID_PEDIDO"].tolist(),
+        "RESULTADO": "sem_alteracao",
+        "CAMPOS": "",
+        "ERRO": "",
+    })
+    if not invalidos.empty:
+        relatorio = pd.concat([relatorio, pd.DataFrame({
+            "ID_PEDIDO": df_editado.loc[invalidos.index, "ID_PEDIDO"].tolist(),
+            "RESULTADO": "erro",
+            "CAMPOS": "",
+            "ERRO": "ID_PEDIDO inválido",
+        })], ignore_index=True)
+    if novos.empty:
+        return relatorio
+
+    validos = relatorio["RESULTADO"] != "erro"
+
+    # 1. Estado atual de todos os pedidos editados (uma requisição)
+    try:
+        cols = 'ID_PEDIDO, STATUS, PAGAMENTO, "NR PEDIDO", OBSERVAÇÃO'
+        resp = client.table("pedidos").select(cols).in_("ID_PEDIDO", novos["ID_PEDIDO"].tolist()).execute()
+    except Exception as e:
+        relatorio.loc[validos, ["RESULTADO", "ERRO"]] = ["erro", str(e)]
+        return relatorio
+
+    atuais = pd.DataFrame(resp.data or [], columns=["ID_PEDIDO"] + _COLUNAS_EDITAVEIS)
+    atuais["ID_PEDIDO"] = pd.to_numeric(atuais["ID_PEDIDO"], errors="coerce")
+    base = novos.merge(atuais, on="ID_PEDIDO", how="left", suffixes=("", "_ATUAL"), indicator=True)
+    encontrado = base["_merge"] == "both"
+    relatorio.loc[validos & ~relatorio["ID_PEDIDO"].isin(base.loc[encontrado, "ID_PEDIDO"]), "RESULTADO"] = "nao_encontrado"
+
+    # 2. Diff vetorizado (mesmas regras da edição linha a linha)
+    mudou = {}
+    textos_novos = {}
+    textos_antigos = {}
+    for col in colunas:
+        novo = base[col].where(base[col].notna(), "").astype(str).str.strip()
+        if col in ["STATUS", "PAGAMENTO"]:
+            novo = novo.str.upper()
+        antigo = base[f"{col}_ATUAL"].where(base[f"{col}_ATUAL"].notna(), "").astype(str)
+        alterado = encontrado & (novo != antigo)
+        if col == "NR PEDIDO":
+            # NR PEDIDO só pode ser definido se estiver vazio no banco
+            alterado &= antigo.str.strip() == ""
+        mudou[col] = alterado
+        textos_novos[col] = novo
+        textos_antigos[col] = antigo
+
+    linhas_alteradas = pd.concat(mudou, axis=1).any(axis=1) if mudou else pd.Series(False, index=base.index)
+    if not linhas_alteradas.any():
+        return relatorio
+
+    # 3. Só os campos alterados de cada pedido: o que outra pessoa mudou nos
+    # demais campos desde a leitura fica intacto
+    alteracoes = {
+        int(base.at[idx, "ID_PEDIDO"]): {col: textos_novos[col].at[idx] for col in colunas if mudou[col].at[idx]}
+        for idx in base.index[linhas_alteradas]
+    }
 
-    for _, row in df_editado.iterrows():
-        pid = row["ID_PEDIDO"]
-        try:
-            cols = 'ID_PEDIDO, STATUS, PAGAMENTO, "NR PEDIDO", OBSERVAÇÃO'
-            resp = client.table("pedidos").select(cols).eq("ID_PEDIDO", pid).execute()
-            if not resp.data:
-                continue
-
-            atual_db = resp.data[0]
-            updates = {}
-            logs_batch = []
-
-            for col in colunas_check:
-                if col in row:
-                    val_novo = str(row[col]) if row[col] is not None else ""
-                    val_novo = val_novo.strip()
-                    if col in ["STATUS", "PAGAMENTO"]:
-                        val_novo = val_novo.upper()
-                    val_antigo = str(atual_db.get(col, ""))
-                    val_antigo_limpo = val_antigo.strip()
-
-                    if col == "NR PEDIDO" and val_antigo_limpo != "":
-                        continue
-
-                    if val_novo != val_antigo:
-                        updates[col] = val_novo
-                        logs_batch.append({
-                            "DATA_HORA": timestamp,
-                            "ID_PEDIDO": pid,
-                            "USUARIO": usuario_logado,
-                            "CAMPO": col,
-                            "VALOR_ANTIGO": val_antigo,
-                            "VALOR_NOVO": val_novo
-                        })
-
-            if updates:
-                client.table("pedidos").update(updates).eq("ID_PEDIDO", pid).execute()
-                if logs_batch:
-                    client.table("logs").insert(logs_batch).execute()
-        except Exception as e:
-            print(f"Erro ao atualizar pedido {pid}: {e}")
-
-
-def buscar_pedidos_paginado(pagina_atual=1, tamanho_pagina=20, filtros=None):
+    ids_alterados = base.loc[linhas_alteradas, "ID_PEDIDO"]
+    no_relatorio = relatorio["ID_PEDIDO"].isin(ids_alterados) & validos
+    campos = pd.Series("", index=base.index)
+    for col in colunas:
+        campos = campos + mudou[col].map({True: f"{col},", False: ""})
+    campos = campos.str.rstrip(",")
+    relatorio.loc[no_relatorio, "CAMPOS"] = relatorio.loc[no_relatorio, "ID_PEDIDO"].map(
+        dict(zip(base["ID_PEDIDO"], campos))
+    )
+
+    gravados, erros = _gravar_alteracoes(client, alteracoes)
+    for erro, ids in erros.items():
+        relatorio.loc[relatorio["ID_PEDIDO"].isin(ids) & validos, ["RESULTADO", "ERRO"]] = ["erro", erro]
+    # excluído entre a leitura e a gravação: o update não o recria
+    sumidos = set(alteracoes) - gravados - {i for ids in erros.values() for i in ids}
+    relatorio.loc[relatorio["ID_PEDIDO"].isin(sumidos) & validos, ["RESULTADO", "CAMPOS"]] = ["nao_encontrado", ""]
+    no_relatorio &= relatorio["ID_PEDIDO"].isin(gravados)
+    relatorio.loc[no_relatorio, "RESULTADO"] = "atualizado"
+    if not gravados:
+        return relatorio
+
+    # 4. Um insert com todos os logs
+    logs_batch = []
+    gravado = base["ID_PEDIDO"].isin(gravados)
+    for col in colunas:
+        for idx in base.index[mudou[col] & gravado]:
+            logs_batch.append({
+                "DATA_HORA": timestamp,
+                "ID_PEDIDO": int(base.at[idx, "ID_PEDIDO"]),
+                "USUARIO": usuario_logado,
+                "CAMPO": col,
+                "VALOR_ANTIGO": textos_antigos[col].at[idx],
+                "VALOR_NOVO": textos_novos[col].at[idx],
+            })
+    try:
+        client.table("logs").insert(logs_batch).execute()
+    except Exception as e:
+        relatorio.loc[no_relatorio, "ERRO"] = f"Log não registrado: {e}"
+
+    return relatorio
+
+
+# Filtros da tela de gestão -> coluna em pedidos
+_COLUNAS_FILTRO = {"status": "STATUS", "cidade": "CIDADE", "rota": "ROTA"}
+_COLUNAS_PAGINA = [
+    "ID_PEDIDO", "COD CLIENTE", "NOME CLIENTE", "CIDADE",
+    "STATUS", "DIA DA ENTREGA", "PEDIDO", "PAGAMENTO",
+    "NR PEDIDO", "OBSERVAÇÃO", "ROTA"
+]
+# Linhas por requisição ao exportar o resultado filtrado
+_LOTE_EXPORTACAO = 1000
+
+
+def _periodo(client, data_inicio=None, data_fim=None):
+    """
+    Filtro de período de entrega para a assinatura, ou None sem período.
+
+    Com a migração 008 vira um intervalo em DATA_ENTREGA (aberto de um lado se
+    só uma data for dada). Sem ela, a lista de dias em "DIA DA ENTREGA", o que
+    só serve para intervalos fechados de até um ano; fora disso, ValueError
+    (o filtro nunca é descartado em silêncio).
+    """
+    if data_inicio is None and data_fim is None:
+        return None
+    inicio = pd.Timestamp(data_inicio).date() if data_inicio is not None else None
+    fim = pd.Timestamp(data_fim).date() if data_fim is not None else None
+    if datas_nativas(client):
+        return ("periodo", (inicio and inicio.isoformat(), fim and fim.isoformat()))
+    if inicio is None or fim is None or not 0 <= (fim - inicio).days <= _DIAS_PERIODO_TEXTO:
+        raise ValueError(_ERRO_PERIODO_TEXTO)
+    return ("dias", tuple(
+        (inicio + timedelta(days=d)).strftime("%d/%m/%Y") for d in range((fim - inicio).days + 1)
+    ))
+
+
+def erro_periodo(data_inicio=None, data_fim=None):
+    """Mensagem para o usuário se o período não puder ser filtrado no banco, senão None."""
+    try:
+        _periodo(get_db_client(), data_inicio, data_fim)
+    except ValueError as e:
+        return str(e)
+    return None
+
+
+def _assinatura_filtros(filtros, periodo=None):
+    """Forma canônica e hasheável dos filtros (a ordem da seleção não importa)."""
+    assinatura = tuple(
+        (chave, tuple(sorted(str(v) for v in filtros[chave])))
+        for chave in sorted(filtros or {})
+        if chave in _COLUNAS_FILTRO and filtros[chave]
+    )
+    return assinatura + (periodo,) if periodo else assinatura
+
+
+def _aplicar_filtros(query, assinatura):
+    for chave, valores in assinatura:
+        if chave == "periodo":
+            inicio, fim = valores
+            if inicio:
+                query = query.gte("DATA_ENTREGA", inicio)
+            if fim:
+                query = query.lte("DATA_ENTREGA", fim)
+        elif chave == "dias":
+            query = query.in_("DIA DA ENTREGA", list(valores))
+        else:
+            query = query.in_(_COLUNAS_FILTRO[chave], list(valores))
+    return query
+
+
+def _consulta_contagem_pedidos(client, assinatura):
+    query = client.table("pedidos").select("ID_PEDIDO", count="exact", head=True)
+    return _aplicar_filtros(query, assinatura)
+
+
+@cache_por_versao("pedidos", em_erro=int, ttl=3600, show_spinner=False)
+def contar_pedidos(assinatura=()):
+    """Total de pedidos para uma assinatura de filtros (uma contagem por versão)."""
+    return _consulta_contagem_pedidos(get_db_client(), assinatura).execute().count or 0
+
+
+def _consulta_pagina_pedidos(client, assinatura, tamanho_pagina, apos, antes):
+    """Consulta keyset em ID_PEDIDO; uma linha a mais indica se existe próxima página."""
+    query = _aplicar_filtros(client.table("pedidos").select(select_do_esquema("pedidos", _COLUNAS_PAGINA)), assinatura)
+    if antes is not None:
+        query = query.gt("ID_PEDIDO", int(antes)).order("ID_PEDIDO", desc=False)
+    else:
+        if apos is not None:
+            query = query.lt("ID_PEDIDO", int(apos))
+        query = query.order("ID_PEDIDO", desc=True)
+    return query.limit(tamanho_pagina + 1)
+
+
+def _pagina_pedidos(linhas, tamanho_pagina, apos, antes):
+    linhas, cursores = montar_pagina(linhas, tamanho_pagina, apos, antes, lambda l: int(l["ID_PEDIDO"]))
+    return carregar(linhas, "pedidos", _COLUNAS_PAGINA), cursores
+
+
+@cache_por_versao("pedidos", ttl=3600, show_spinner=False)
+def _buscar_pagina_pedidos(assinatura, tamanho_pagina, apos, antes):
+    """Página por cursor; fica em cache até `pedidos` mudar (permite pré-carregar)."""
+    linhas = _consulta_pagina_pedidos(get_db_client(), assinatura, tamanho_pagina, apos, antes).execute().data or []
+    return _pagina_pedidos(linhas, tamanho_pagina, apos, antes)
+
+
+def buscar_pedidos_paginado(tamanho_pagina=20, filtros=None, apos=None, antes=None, data_inicio=None, data_fim=None,
+                            versao=None):
+    """
+    Página de pedidos por cursor (keyset) em ID_PEDIDO, do mais novo ao mais antigo.
+
+    `apos`: ID_PEDIDO da última linha da página atual (avança).
+    `antes`: ID_PEDIDO da primeira linha da página atual (volta).
+    Sem cursor, retorna a primeira página.
+    `data_inicio`/`data_fim`: período de entrega (inclusive), filtrado no banco.
+
+    Retorna (df, total_registros, cursores), onde cursores é
+    {"anterior": id ou None, "proxima": id ou None} para as páginas vizinhas.
+    O total é contado uma vez por combinação de filtros e versão dos dados
+    (`versao`, se já obtida no rerun). Período que não pode ser filtrado no
+    banco devolve a página vazia; o aviso é da página (`erro_periodo`).
+    """
     client = get_db_client()
-    inicio = (pagina_atual - 1) * tamanho_pagina
-    fim = inicio + tamanho_pagina - 1
 
     try:
-        cols = 'ID_PEDIDO, "COD CLIENTE", "NOME CLIENTE", CIDADE, STATUS, "DIA DA ENTREGA", PEDIDO, PAGAMENTO, "NR PEDIDO", OBSERVAÇÃO, ROTA'
-        query = client.table("pedidos").select(cols, count="exact")
-
-        if filtros:
-            if filtros.get("status") and len(filtros["status"]) > 0:
-                query = query.in_("STATUS", filtros["status"])
-            if filtros.get("cidade") and len(filtros["cidade"]) > 0:
-                query = query.in_("CIDADE", filtros["cidade"])
-            if filtros.get("rota") and len(filtros["rota"]) > 0:
-                query = query.in_("ROTA", filtros["rota"])
-
-        response = query.order("ID_PEDIDO", desc=True).range(inicio, fim).execute()
-        total_registros = response.count if response.count is not None else 0
-        df = pd.DataFrame(response.data)
-
-        if df.empty:
-            df = pd.DataFrame(columns=[
-                "ID_PEDIDO", "COD CLIENTE", "NOME CLIENTE", "CIDADE",
-                "STATUS", "DIA DA ENTREGA", "PEDIDO", "PAGAMENTO",
-                "NR PEDIDO", "OBSERVAÇÃO", "ROTA"
-            ])
-
-        return df, total_registros
+        assinatura = _assinatura_filtros(filtros, _periodo(client, data_inicio, data_fim))
+        df, cursores = _buscar_pagina_pedidos(assinatura, tamanho_pagina, apos, antes, versao=versao)
+        return df, contar_pedidos(assinatura, versao=versao), cursores
+    except ValueError:
+        return pd.DataFrame(), 0, {"anterior": None, "proxima": None}
     except Exception as e:
         st.error(f"Erro na paginação: {e}")
-        return pd.DataFrame(), 0
+        return pd.DataFrame(), 0, {"anterior": None, "proxima": None}
+
+
+def lotes_pedidos(filtros=None, data_inicio=None, data_fim=None, lote=_LOTE_EXPORTACAO):
+    """
+    Todos os pedidos que atendem aos filtros da gestão (mesmos argumentos de
+    `buscar_pedidos_paginado`), do mais novo ao mais antigo, em DataFrames de
+    até `lote` linhas. Keyset em ID_PEDIDO: cada lote é uma consulta e só ele
+    fica em memória, então serve para exportar o resultado inteiro.
+    ValueError se o período não puder ser filtrado no banco (`erro_periodo`).
+    """
+    client = get_db_client()
+    assinatura = _assinatura_filtros(filtros, _periodo(client, data_inicio, data_fim))
+    apos = None
+    while True:
+        query = _aplicar_filtros(client.table("pedidos").select(select_do_esquema("pedidos", _COLUNAS_PAGINA)), assinatura)
+        if apos is not None:
+            query = query.lt("ID_PEDIDO", apos)
+        linhas = query.order("ID_PEDIDO", desc=True).limit(lote).execute().data or []
+        if linhas:
+            yield carregar(linhas, "pedidos", _COLUNAS_PAGINA)
+        if len(linhas) < lote:
+            return
+        apos = linhas[-1]["ID_PEDIDO"]
@@ -3,60 +3,73 @@ Operações de estoque de salmão.
 """
 import pandas as pd
 import streamlit as st
+from collections import Counter
 from datetime import datetime
 
+from postgrest.exceptions import APIError
+
 from core.config import FUSO_BR
-from services.database.client import get_db_client
+from services.database.cache import altera_tabelas, cache_por_versao
+from services.database.client import consulta_contagem, get_db_client, RPC_INEXISTENTE
+from services.database.esquemas import carregar, select_do_esquema
+from services.database.modelo_local import modelo_sincronizado, paginas
 from services.utils import limpar_texto
 from services.monitor_performance import MonitorPerformance
 
 
-@st.cache_data(ttl=30, show_spinner=False)
+def _consulta_faixa_tags(client, tabela, tag_inicio, tag_fim):
+    return client.table(tabela)\
+        .select(select_do_esquema(tabela))\
+        .gte("Tag", tag_inicio)\
+        .lte("Tag", tag_fim)\
+        .order("Tag")
+
+
+def _df_estoque(linhas):
+    if not linhas:
+        return pd.DataFrame()
+    df = carregar(linhas, "estoque_salmao")
+    df["Tag"] = df["Tag"].fillna(0)
+    df["Peso"] = df["Peso"].fillna(0.0)
+    return df
+
+
+@cache_por_versao("estoque_salmao", em_erro=pd.DataFrame, ttl=3600, show_spinner=False)
 @MonitorPerformance.monitorar(nome_funcao="get_estoque_filtrado")
 def get_estoque_filtrado(tag_inicio, tag_fim):
+    modelo = modelo_sincronizado("estoque_salmao")
+    if modelo is not None:
+        return _df_estoque(modelo.linhas("estoque_salmao", de=int(tag_inicio), ate=int(tag_fim)))
     client = get_db_client()
-    try:
-        response = client.table("estoque_salmao")\
-            .select("*")\
-            .gte("Tag", tag_inicio)\
-            .lte("Tag", tag_fim)\
-            .order("Tag")\
-            .execute()
-
-        if response.data:
-            df = pd.DataFrame(response.data)
-            df["Tag"] = pd.to_numeric(df["Tag"], errors='coerce').fillna(0).astype(int)
-            df["Peso"] = pd.to_numeric(df["Peso"], errors='coerce').fillna(0.0)
-            return df
-        return pd.DataFrame()
-    except Exception:
-        return pd.DataFrame()
+    return _df_estoque(_consulta_faixa_tags(client, "estoque_salmao", tag_inicio, tag_fim).execute().data)
 
 
 def get_estoque_backup_filtrado(tag_inicio, tag_fim):
     client = get_db_client()
     try:
-        response = client.table("estoque_salmao_backup")\
-            .select("*")\
-            .gte("Tag", tag_inicio)\
-            .lte("Tag", tag_fim)\
-            .order("Tag")\
-            .execute()
-
-        if response.data:
-            df = pd.DataFrame(response.data)
-            df["Tag"] = pd.to_numeric(df["Tag"], errors='coerce').fillna(0).astype(int)
-            df["Peso"] = pd.to_numeric(df["Peso"], errors='coerce').fillna(0.0)
-            return df
-        return pd.DataFrame()
+        return _df_estoque(_consulta_faixa_tags(client, "estoque_salmao_backup", tag_inicio, tag_fim).execute().data)
     except Exception:
         return pd.DataFrame()
 
 
+def lotes_historico_salmao(lote=1000):
+    """
+    Todo o histórico arquivado (`estoque_salmao_backup`) em DataFrames de
+    cerca de `lote` linhas, em ordem de Tag, para exportação. A mesma tag pode
+    ter sido arquivada várias vezes: as páginas não cortam uma tag ao meio.
+    """
+    client = get_db_client()
+
+    def consulta():
+        return client.table("estoque_salmao_backup").select(select_do_esquema("estoque_salmao_backup"))
+
+    for pagina in paginas(consulta, "Tag", lote, unica=False):
+        yield carregar(pagina, "estoque_salmao_backup")
+
+
+@altera_tabelas("estoque_salmao", "logs")
 def salvar_alteracoes_estoque(df_novo, usuario_logado):
     client = get_db_client()
-    get_estoque_filtrado.clear()
-    get_resumo_global_salmao.clear()
 
     timestamp = datetime.now(FUSO_BR).strftime("%d/%m/%Y %H:%M:%S")
     registros_para_atualizar = []
@@ -93,6 +106,7 @@ def salvar_alteracoes_estoque(df_novo, usuario_logado):
     return len(registros_para_atualizar)
 
 
+@altera_tabelas("estoque_subtags", "logs")
 def registrar_subtag(id_pai, letra, cliente, peso, status, usuario_logado):
     client = get_db_client()
     dados = {
@@ -124,12 +138,12 @@ def buscar_subtags_por_tag(tag_pai_id):
     client = get_db_client()
     try:
         response = client.table("estoque_subtags")\
-            .select("*")\
+            .select(select_do_esquema("estoque_subtags"))\
             .eq("ID_Pai", int(tag_pai_id))\
             .order("Letra")\
             .execute()
         if response.data:
-            return pd.DataFrame(response.data)
+            return carregar(response.data, "estoque_subtags")
     except Exception:
         pass
     return pd.DataFrame()
@@ -149,72 +163,121 @@ def get_consumo_tag(tag_pai_id):
         return [], 0.0
 
 
-@st.cache_data(ttl=60, show_spinner=False)
+def _resumo_por_status(contagens, qtd_historico):
+    """Monta a tupla do cabeçalho a partir de {Status bruto: quantidade}."""
+    por_status = {}
+    for status, qtd in contagens.items():
+        # Mesma normalização de antes: vazio = Livre, "gerado " = Gerado
+        chave = "Livre" if status is None else str(status).strip().capitalize()
+        por_status[chave] = por_status.get(chave, 0) + int(qtd)
+
+    total = sum(por_status.values())
+    if not total:
+        return 0, 0, qtd_historico, 0, 0, 0
+    return (
+        total,
+        por_status.get("Livre", 0),
+        por_status.get("Gerado", 0) + qtd_historico,
+        por_status.get("Orçamento", 0),
+        por_status.get("Reservado", 0),
+        por_status.get("Aberto", 0)
+    )
+
+
+def _contagens_da_rpc(dados):
+    """Resposta de `resumo_status_salmao` -> ({Status: quantidade}, histórico)."""
+    dados = dados or {}
+    contagens = {l["status"]: l["quantidade"] for l in dados.get("status") or []}
+    return contagens, int(dados.get("historico") or 0)
+
+
+def _contar_status_no_cliente(client):
+    """Sem a migração: baixa a coluna Status e conta localmente."""
+    response = client.table("estoque_salmao").select("Status").execute()
+    resp_backup = consulta_contagem(client, "estoque_salmao_backup", "Tag").execute()
+    return Counter(l.get("Status") for l in response.data or []), resp_backup.count or 0
+
+
+@cache_por_versao("estoque_salmao", "estoque_salmao_backup", em_erro=lambda: (0, 0, 0, 0, 0, 0), ttl=3600,
+                  show_spinner=False)
 def get_resumo_global_salmao():
+    """
+    Totais do cabeçalho do salmão: (total, livre, gerado + histórico, orçamento,
+    reservado, aberto).
+
+    A RPC `resumo_status_salmao` agrupa por Status no servidor e devolve poucos
+    pares (status, quantidade) mais o total do histórico, em uma requisição.
+    """
     client = get_db_client()
     try:
-        response = client.table("estoque_salmao").select("Status").execute()
-        dados = response.data
-        resp_backup = client.table("estoque_salmao_backup").select("Tag", count="exact", head=True).execute()
-        qtd_historico = resp_backup.count if resp_backup.count is not None else 0
-
-        if not dados:
-            return 0, 0, qtd_historico, 0, 0, 0
-
-        df = pd.DataFrame(dados)
-        s = df["Status"].fillna("Livre").astype(str).str.strip().str.capitalize()
-        ativos_gerado = len(s[s == "Gerado"])
-        total_gerado_real = ativos_gerado + qtd_historico
-
-        return (
-            len(df),
-            len(s[s == "Livre"]),
-            total_gerado_real,
-            len(s[s == "Orçamento"]),
-            len(s[s == "Reservado"]),
-            len(s[s == "Aberto"])
-        )
-    except Exception:
-        return 0, 0, 0, 0, 0, 0
-
-
+        resp = client.rpc("resumo_status_salmao", {}).execute()
+        contagens, qtd_historico = _contagens_da_rpc(resp.data)
+    except APIError as e:
+        if e.code != RPC_INEXISTENTE:
+            raise
+        contagens, qtd_historico = _contar_status_no_cliente(client)
+    return _resumo_por_status(contagens, qtd_historico)
+
+
+# Campos limpos quando a tag volta a ficar disponível
+_DADOS_RESET_TAG = {
+    "Status": None,
+    "Calibre": None,
+    "Peso": 0.0,
+    "Cliente": None,
+    "Fornecedor": None,
+    "Validade": None
+}
+
+
+def _arquivar_tags_em_lote(client, tags, usuario_logado, timestamp):
+    """Mesmo fluxo da RPC `arquivar_tags`, feito pelo cliente em poucas requisições."""
+    resp_pai = client.table("estoque_salmao").select("*").in_("Tag", tags).execute()
+    if resp_pai.data:
+        client.table("estoque_salmao_backup").insert(resp_pai.data).execute()
+
+    resp_sub = client.table("estoque_subtags").select("*").in_("ID_Pai", tags).execute()
+    if resp_sub.data:
+        client.table("estoque_subtags_backup").insert(resp_sub.data).execute()
+        client.table("estoque_subtags").delete().in_("ID_Pai", tags).execute()
+
+    client.table("estoque_salmao").update(_DADOS_RESET_TAG).in_("Tag", tags).execute()
+    client.table("logs").insert([{
+        "DATA_HORA": timestamp,
+        "USUARIO": usuario_logado,
+        "CAMPO": "ARQUIVAMENTO_RESET",
+        "VALOR_ANTIGO": f"TAG-{tag_id}",
+        "VALOR_NOVO": "Reset Total (Status None)"
+    } for tag_id in tags]).execute()
+
+
+@altera_tabelas("estoque_salmao", "estoque_salmao_backup", "estoque_subtags", "estoque_subtags_backup", "logs")
 def arquivar_tags_geradas(ids_tags, usuario_logado="Sistema"):
+    """
+    Move as tags (e suas subtags) para o backup e limpa as tags para novo uso.
+
+    Preferencialmente roda inteiro no servidor, em uma transação (RPC `arquivar_tags`).
+    Sem a migração, faz o mesmo processo em lote pelo cliente: o custo é fixo
+    (até 7 requisições) para qualquer quantidade de tags.
+    """
     if not ids_tags:
         return
 
     client = get_db_client()
     timestamp = datetime.now(FUSO_BR).strftime("%d/%m/%Y %H:%M:%S")
-    dados_reset = {
-        "Status": None,
-        "Calibre": None,
-        "Peso": 0.0,
-        "Cliente": None,
-        "Fornecedor": None,
-        "Validade": None
-    }
+    tags = sorted({int(t) for t in ids_tags})
 
     try:
-        for tag_id in ids_tags:
-            resp_pai = client.table("estoque_salmao").select("*").eq("Tag", int(tag_id)).execute()
-            if resp_pai.data:
-                dados_pai = resp_pai.data[0]
-                client.table("estoque_salmao_backup").insert(dados_pai).execute()
-
-            resp_sub = client.table("estoque_subtags").select("*").eq("ID_Pai", int(tag_id)).execute()
-            if resp_sub.data:
-                client.table("estoque_subtags_backup").insert(resp_sub.data).execute()
-                client.table("estoque_subtags").delete().eq("ID_Pai", int(tag_id)).execute()
-
-            client.table("estoque_salmao").update(dados_reset).eq("Tag", int(tag_id)).execute()
-            client.table("logs").insert({
-                "DATA_HORA": timestamp,
-                "USUARIO": usuario_logado,
-                "CAMPO": "ARQUIVAMENTO_RESET",
-                "VALOR_ANTIGO": f"TAG-{tag_id}",
-                "VALOR_NOVO": "Reset Total (Status None)"
+        try:
+            client.rpc("arquivar_tags", {
+                "p_tags": tags,
+                "p_usuario": usuario_logado,
+                "p_data_hora": timestamp,
             }).execute()
-
-        get_estoque_filtrado.clear()
+        except APIError as e:
+            if e.code != RPC_INEXISTENTE:
+                raise
+            _arquivar_tags_em_lote(client, tags, usuario_logado, timestamp)
         return True
     except Exception as e:
         st.error(f"Erro ao processar: {e}")
@@ -0,0 +1,163 @@
+"""
+Exportação de planilhas a partir de lotes de linhas (XLSX ou CSV).
+
+As leituras de exportação entregam DataFrames em lotes (keyset no banco);
+cada lote é escrito assim que chega e descartado. O XLSX usa o modo
+`constant_memory` do xlsxwriter, que grava uma linha por vez em arquivo
+temporário, então só o lote atual fica em memória. Para resultados muito
+grandes o CSV é mais rápido de gerar e de abrir.
+
+Arquivos que podem ser preparados antes do clique (ex.: estoque de salmão
+com histórico) são gerados em segundo plano por `em_segundo_plano`, fora da
+renderização; o Future do trabalho entrega o arquivo pronto.
+
+Históricos inteiros (todos os pedidos, todas as tags arquivadas) vão direto
+para um arquivo temporário em disco com `exportar_em_arquivo`: a memória
+fica igual com 10 mil ou 1 milhão de linhas.
+"""
+import io
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import xlsxwriter
+
+FORMATOS = {
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+_FORMATO_DATA_XLSX = "dd/mm/yyyy"
+_FORMATO_DATA_CSV = "%d/%m/%Y"
+# Arquivos temporários de exportação mais velhos que isso são apagados
+_VALIDADE_ARQUIVOS_SEGUNDOS = 3600
+_PASTA_ARQUIVOS = os.path.join(tempfile.gettempdir(), "jt_pescados_exportacoes")
+
+
+def _valores(lote):
+    """Lote como object, com None no lugar de NA/NaT (célula vazia)."""
+    valores = lote.astype(object)
+    return valores.where(lote.notna(), None)
+
+
+def escrever_xlsx(lotes, destino, aba="Dados") -> int:
+    """Escreve os lotes em `destino` (caminho ou arquivo binário). Retorna as linhas escritas."""
+    livro = xlsxwriter.Workbook(destino, {
+        "constant_memory": True,
+        "default_date_format": _FORMATO_DATA_XLSX,
+        "in_memory": False,
+    })
+    try:
+        planilha = livro.add_worksheet(aba)
+        negrito = livro.add_format({"bold": True})
+        linha = 0
+        for lote in lotes:
+            if linha == 0:
+                planilha.write_row(0, 0, [str(c) for c in lote.columns], negrito)
+                linha = 1
+            for valores in _valores(lote).itertuples(index=False):
+                planilha.write_row(linha, 0, valores)
+                linha += 1
+    finally:
+        livro.close()
+    return max(linha - 1, 0)
+
+
+def escrever_csv(lotes, destino) -> int:
+    """
+    Escreve os lotes em `destino` (arquivo texto). Separador ";", vírgula decimal e BOM UTF-8,
+    para o Excel em português abrir acentos e colunas corretamente.
+    """
+    destino.write("\ufeff")
+    total = 0
+    for lote in lotes:
+        lote.to_csv(destino, sep=";", decimal=",", index=False, header=total == 0, date_format=_FORMATO_DATA_CSV)
+        total += len(lote)
+    return total
+
+
+def exportar(lotes, formato="xlsx", aba="Dados") -> bytes:
+    """Arquivo `formato` ("xlsx", "csv" ou "parquet") com as linhas de todos os lotes."""
+    if formato == "parquet":
+        # Parquet é colunar: os lotes são unidos antes (mantém os tipos do esquema)
+        buffer = io.BytesIO()
+        pd.concat(list(lotes), ignore_index=True).to_parquet(buffer, index=False)
+        return buffer.getvalue()
+    if formato == "csv":
+        texto = io.StringIO()
+        escrever_csv(lotes, texto)
+        return texto.getvalue().encode("utf-8")
+    buffer = io.BytesIO()
+    escrever_xlsx(lotes, buffer, aba)
+    return buffer.getvalue()
+
+
+def _limpar_arquivos_antigos():
+    limite = time.time() - _VALIDADE_ARQUIVOS_SEGUNDOS
+    for nome in os.listdir(_PASTA_ARQUIVOS):
+        caminho = os.path.join(_PASTA_ARQUIVOS, nome)
+        try:
+            if os.path.getmtime(caminho) < limite:
+                os.remove(caminho)
+        except OSError:
+            pass  # já apagado por outra sessão
+
+
+def exportar_em_arquivo(lotes, formato="xlsx", aba="Dados") -> str:
+    """
+    Como `exportar` ("xlsx" ou "csv"), mas gravando cada lote direto em um
+    arquivo temporário; devolve o caminho. Só o lote atual fica em memória.
+    """
+    os.makedirs(_PASTA_ARQUIVOS, exist_ok=True)
+    _limpar_arquivos_antigos()
+    descritor, caminho = tempfile.mkstemp(suffix=f".{formato}", dir=_PASTA_ARQUIVOS)
+    try:
+        if formato == "csv":
+            with open(descritor, "w", encoding="utf-8", newline="") as arquivo:
+                escrever_csv(lotes, arquivo)
+        else:
+            os.close(descritor)
+            escrever_xlsx(lotes, caminho, aba)
+    except Exception:
+        os.remove(caminho)
+        raise
+    return caminho
+
+
+def descartar_arquivo(caminho):
+    """Apaga um arquivo de `exportar_em_arquivo` que não será mais oferecido."""
+    try:
+        os.remove(caminho)
+    except (OSError, TypeError):
+        pass
+
+
+# ============================================================
+# Geração em segundo plano
+# ============================================================
+
+_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="exportacao")
+_trabalhos = OrderedDict()
+_MAX_TRABALHOS = 32
+_lock = threading.Lock()
+
+
+def em_segundo_plano(chave, gerar, refazer=False):
+    """
+    Future com o resultado de `gerar()`. Pedidos com a mesma `chave` (de
+    qualquer sessão) compartilham o trabalho. Um trabalho que falhou continua
+    guardado, para quem pediu mostrar o erro, até ser pedido com `refazer=True`.
+    """
+    with _lock:
+        futuro = _trabalhos.get(chave)
+        if futuro is None or (refazer and futuro.done() and futuro.exception() is not None):
+            futuro = _executor.submit(gerar)
+            _trabalhos[chave] = futuro
+        _trabalhos.move_to_end(chave)
+        while len(_trabalhos) > _MAX_TRABALHOS:
+            _trabalhos.popitem(last=False)
+    return futuro
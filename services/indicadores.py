@@ -0,0 +1,72 @@
+"""
+Indicadores do dashboard, calculados uma vez por período e versão dos pedidos.
+
+`obter_indicadores` transforma o resumo de pedidos do período (RPC
+`resumo_dashboard` ou a agregação local equivalente) em um `Indicadores`
+imutável com tudo o que a página desenha: pizza de status, barras de
+pagamento, saúde da operação, chips de "aguardando", evolução diária e top
+clientes. O resultado fica no cache do processo, compartilhado por todas as
+sessões; a página só renderiza.
+"""
+from dataclasses import dataclass
+from datetime import date
+
+from services.database.cache import cache_por_versao
+from services.database.pedidos import resumo_pedidos
+
+# Status que contam como "aguardando processo", na ordem dos chips
+STATUS_AGUARDANDO = (
+    ("Orçamento", "ORÇAMENTO"),
+    ("Reservado", "RESERVADO"),
+    ("Não Gerado", "NÃO GERADO"),
+    ("Pendente", "PENDENTE"),
+    ("Gerado", "GERADO"),
+)
+STATUS_ENTREGUE = "ENTREGUE"
+
+
+@dataclass(frozen=True)
+class Indicadores:
+    """Totais do período. Pares são (rótulo, quantidade)."""
+
+    total: int = 0
+    status: tuple = ()          # maior -> menor
+    pagamento: tuple = ()       # menor -> maior (barras horizontais)
+    dias: tuple = ()            # (date, quantidade) em ordem de data
+    clientes: tuple = ()        # top clientes, maior -> menor
+    entregues: int = 0
+    aguardando: tuple = ()      # (rótulo, status, quantidade) de STATUS_AGUARDANDO
+    total_aguardando: int = 0
+
+    @property
+    def pct_saude(self) -> float:
+        return self.entregues / self.total * 100 if self.total else 0.0
+
+
+def calcular_indicadores(resumo) -> Indicadores:
+    """`Indicadores` a partir do dict de `resumo_pedidos` (None/vazio -> zerado)."""
+    if not resumo or not resumo.get("total"):
+        return Indicadores()
+
+    status = resumo.get("status") or {}
+    aguardando = tuple((rotulo, s, int(status.get(s, 0))) for rotulo, s in STATUS_AGUARDANDO)
+    return Indicadores(
+        total=int(resumo["total"]),
+        status=tuple(sorted(((s, int(q)) for s, q in status.items()), key=lambda p: (-p[1], p[0]))),
+        pagamento=tuple(sorted(((p, int(q)) for p, q in (resumo.get("pagamento") or {}).items()),
+                               key=lambda p: (p[1], p[0]))),
+        dias=tuple(sorted((date.fromisoformat(d), int(q)) for d, q in (resumo.get("dias") or {}).items())),
+        clientes=tuple((str(c), int(q)) for c, q in resumo.get("clientes") or []),
+        entregues=int(status.get(STATUS_ENTREGUE, 0)),
+        aguardando=aguardando,
+        total_aguardando=sum(q for _, _, q in aguardando),
+    )
+
+
+@cache_por_versao("pedidos", em_erro=lambda: None, ttl=3600, show_spinner=False)
+def obter_indicadores(data_inicio=None, data_fim=None, top_clientes=5):
+    """
+    Indicadores dos pedidos com entrega entre `data_inicio` e `data_fim`
+    (None = sem limite). None se a leitura falhar (sem ir para o cache).
+    """
+    return calcular_indicadores(resumo_pedidos(data_inicio, data_fim, top_clientes))
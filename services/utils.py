@@ -1,6 +1,6 @@
 import streamlit as st
 from datetime import datetime
-from core.config import DIAS_ALERTA_AMARELO, DIAS_ALERTA_VERMELHO
+from core.config import DIAS_ALERTA_AMARELO, DIAS_ALERTA_VERMELHO, FUSO_BR
 
 def limpar_texto(texto):
     """
@@ -11,6 +11,20 @@ def limpar_texto(texto):
         return ""
     return str(texto).strip().upper()
 
+def data_br_iso(texto):
+    """'dd/mm/aaaa' -> 'aaaa-mm-dd' (formato de uma coluna DATE), ou None se inválida."""
+    try:
+        return datetime.strptime(str(texto).strip(), "%d/%m/%Y").date().isoformat()
+    except (TypeError, ValueError):
+        return None
+
+def carimbo_br_iso(texto):
+    """'dd/mm/aaaa hh:mm:ss' no horário de Brasília -> ISO com fuso (TIMESTAMPTZ), ou None."""
+    try:
+        return FUSO_BR.localize(datetime.strptime(str(texto).strip(), "%d/%m/%Y %H:%M:%S")).isoformat()
+    except (TypeError, ValueError):
+        return None
+
 def calcular_status_validade(data_str):
     """
     Analisa uma data (DD/MM/YYYY) e retorna o nível de alerta:
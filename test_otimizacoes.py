@@ -1,57 +0,0 @@
-#!/usr/bin/env python3
-# -*- coding: utf-8 -*-
-"""Teste das otimizações implementadas no database.py"""
-
-import re
-
-print("=" * 60)
-print("🧪 TESTE DE OTIMIZAÇÕES - JT PESCADOS")
-print("=" * 60)
-print()
-
-# Ler o arquivo database.py
-with open('services/database.py', 'r', encoding='utf-8') as f:
-    content = f.read()
-
-# Verificações
-checks = {
-    "✅ TTL listar_clientes = 3600": "@st.cache_data(ttl=3600)\ndef listar_clientes",
-    "✅ TTL listar_dados_filtros = 1800": "@st.cache_data(ttl=1800)\ndef listar_dados_filtros",
-    "✅ TTL get_metricas = 3600": "@st.cache_data(ttl=3600)\ndef get_metricas",
-    "✅ TTL get_estoque_filtrado = 120": "@st.cache_data(ttl=120, show_spinner=False)\ndef get_estoque_filtrado",
-    "✅ get_metricas otimizado (sem count=exact)": "limit(10000).execute()",
-    "✅ Removido get_metricas.clear() de salvar_pedido": "buscar_pedidos_visualizacao.clear()  # novo pedido precisa ser exibido",
-    "✅ Removido get_metricas.clear() de criar_novo_cliente": "listar_clientes.clear()  # novo cliente precisa estar",
-    "✅ Query otimizada autenticar_usuario": 'select("NOME, PERFIL")',
-    "✅ Query otimizada obter_resumo_historico": 'cols = \'ID_PEDIDO, "DIA DA ENTREGA", STATUS, PEDIDO, OBSERVAÇÃO, PAGAMENTO\'',
-    "✅ Query otimizada get_consumo_tag": 'select("Letra, Peso")',
-}
-
-print("📋 Resultados das Verificações:")
-print()
-
-passed = 0
-for check, pattern in checks.items():
-    if pattern in content:
-        print(f"{check}")
-        passed += 1
-    else:
-        print(f"❌ {check.replace('✅', '')}")
-
-print()
-print("=" * 60)
-print(f"📊 RESULTADO: {passed}/{len(checks)} otimizações implementadas")
-print("=" * 60)
-
-if passed == len(checks):
-    print()
-    print("🎉 PERFEITO! Todas as otimizações estão funcionando!")
-    print()
-    print("📈 Melhorias esperadas:")
-    print("   • Tempo de carregamento: ⬇️  30-40%")
-    print("   • Requisições ao BD: ⬇️  50-60%")
-    print("   • Tráfego de dados: ⬇️  50-70%")
-    print()
-    print("✨ Sistema otimizado com sucesso!")
-else:
-    print(f"⚠️  {len(checks) - passed} item(ns) ainda precisam ser verificados")
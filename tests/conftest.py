@@ -0,0 +1,10 @@
+"""
+Configuração comum dos testes.
+Os testes usam o BancoMemoria; as credenciais abaixo só satisfazem o core.config.
+"""
+import os
+
+os.environ.setdefault("SUPABASE_URL", "http://localhost:54321")
+os.environ.setdefault("SUPABASE_KEY", "chave-de-teste")
+# Sem cópia local em disco: testes do modelo local usam `usar_modelo_local`
+os.environ.setdefault("MODELO_LOCAL_ARQUIVO", "")
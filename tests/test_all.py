@@ -4,11 +4,22 @@ Execute com: pytest tests/
 """
 
 import pytest
+import threading
+import time
+import pandas as pd
 from datetime import date, datetime, timedelta
+import streamlit as st
 from services.auth import GerenciadorSenha, gerenciador_senha
 from services.validators import PedidoInput, ClienteInput, SalmaoInput, SubtagInput, validar_entrada
 from services.rate_limiter import RateLimiter, verificar_rate_limit_login
 from pydantic import ValidationError
+import services.database as db
+import services.database.assincrono as adb
+from services.database.esquemas import carregar
+from services.database.ids import AlocadorIds
+from services.database.memoria import BancoMemoria
+from services.database.modelo_local import ModeloLocal, usar_modelo_local
+from services.database.pedidos import resumo_pedidos
 
 
 # ============================================================
@@ -240,6 +251,1136 @@ class TestIntegracao:
         assert permitido is True
 
 
+# ============================================================
+# TESTES DA CAMADA DE DADOS (BANCO EM MEMÓRIA)
+# ============================================================
+
+class TestAlocadorIds:
+    """Testes da alocação de IDs por blocos."""
+
+    def test_threads_nunca_repetem_id(self):
+        """Dois processos (alocadores) e várias threads não geram IDs repetidos."""
+        banco = BancoMemoria({"contadores_id": [{"tabela": "pedidos", "ultimo_id": 100}]})
+        alocadores = [AlocadorIds(tamanho_bloco=5), AlocadorIds(tamanho_bloco=5)]
+        gerados = []
+        lock = threading.Lock()
+
+        def trabalhar(alocador):
+            for _ in range(25):
+                novo = alocador.proximo("pedidos", "ID_PEDIDO")
+                with lock:
+                    gerados.append(novo)
+
+        with db.usar_banco(banco):
+            threads = [threading.Thread(target=trabalhar, args=(alocadores[i % 2],)) for i in range(16)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        assert len(gerados) == 400
+        assert len(set(gerados)) == 400
+        assert min(gerados) == 101
+        assert banco.requisicoes == 400 // 5  # uma ida ao banco por bloco
+
+    def test_sem_migracao_usa_maior_id(self):
+        """Sem a RPC reservar_ids, volta ao comportamento antigo (maior ID + 1)."""
+        banco = BancoMemoria({"pedidos": [{"ID_PEDIDO": 7}]}, rpcs={})
+        with db.usar_banco(banco):
+            assert AlocadorIds(tamanho_bloco=10).proximo("pedidos", "ID_PEDIDO") == 8
+
+    def test_salvar_pedido_concorrente(self, banco_pedidos):
+        """Pedidos salvos ao mesmo tempo recebem IDs distintos."""
+        def salvar(i):
+            db.salvar_pedido("CLIENTE A", f"Item {i}", date.today(), "PIX", "PENDENTE", usuario_logado="teste")
+
+        with db.usar_banco(banco_pedidos):
+            threads = [threading.Thread(target=salvar, args=(i,)) for i in range(20)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        ids = [p["ID_PEDIDO"] for p in banco_pedidos.tabelas["pedidos"]]
+        assert len(ids) == 20
+        assert len(set(ids)) == 20
+
+
+class TestAtualizacaoPedidosEmLote:
+    """Testes da gravação em lote das edições de pedidos."""
+
+    def test_requisicoes_constantes_e_relatorio(self):
+        """Centenas de linhas, com valores diferentes por linha, custam 3 requisições."""
+        pedidos = [
+            {"ID_PEDIDO": i, "STATUS": "PENDENTE", "PAGAMENTO": "PIX", "NR PEDIDO": "", "OBSERVAÇÃO": ""}
+            for i in range(1, 301)
+        ]
+        pedidos[0]["NR PEDIDO"] = "999"
+        banco = BancoMemoria({"pedidos": pedidos, "logs": []})
+
+        edicao = pd.DataFrame(pedidos)
+        edicao.loc[edicao["ID_PEDIDO"] % 2 == 0, "STATUS"] = "entregue"
+        edicao.loc[0, "NR PEDIDO"] = "123"  # travado: já tinha NR
+        multiplos_de_3 = edicao["ID_PEDIDO"] % 3 == 0
+        edicao.loc[multiplos_de_3, "OBSERVAÇÃO"] = "entrega " + edicao.loc[multiplos_de_3, "ID_PEDIDO"].astype(str)
+        edicao = pd.concat([edicao, pd.DataFrame([{"ID_PEDIDO": 5000, "STATUS": "GERADO"}])], ignore_index=True)
+
+        with db.usar_banco(banco):
+            relatorio = db.atualizar_pedidos_editaveis(edicao, usuario_logado="teste")
+
+        assert banco.requisicoes == 3
+        resultados = relatorio.set_index("ID_PEDIDO")["RESULTADO"]
+        assert (resultados[resultados.index % 2 == 0].drop(5000) == "atualizado").all()
+        assert resultados[1] == "sem_alteracao"
+        assert resultados[5000] == "nao_encontrado"
+
+        por_id = {p["ID_PEDIDO"]: p for p in banco.tabelas["pedidos"]}
+        assert por_id[2]["STATUS"] == "ENTREGUE"
+        assert por_id[2]["PAGAMENTO"] == "PIX"
+        assert por_id[1]["NR PEDIDO"] == "999"
+        assert por_id[9]["OBSERVAÇÃO"] == "entrega 9" and por_id[9]["STATUS"] == "PENDENTE"
+        assert len(banco.tabelas["logs"]) == 150 + 100
+
+    def test_nr_pedido_vazio_pode_ser_definido(self):
+        """NR PEDIDO vazio no banco é gravado e registrado no log."""
+        banco = BancoMemoria({
+            "pedidos": [{"ID_PEDIDO": 1, "STATUS": "PENDENTE", "PAGAMENTO": "PIX", "NR PEDIDO": None, "OBSERVAÇÃO": None}],
+            "logs": [],
+        })
+        edicao = pd.DataFrame([{"ID_PEDIDO": 1, "STATUS": "PENDENTE", "PAGAMENTO": "PIX", "NR PEDIDO": " 77 ", "OBSERVAÇÃO": ""}])
+
+        with db.usar_banco(banco):
+            relatorio = db.atualizar_pedidos_editaveis(edicao)
+
+        assert relatorio.iloc[0]["CAMPOS"] == "NR PEDIDO"
+        assert banco.tabelas["pedidos"][0]["NR PEDIDO"] == "77"
+        assert banco.tabelas["pedidos"][0]["OBSERVAÇÃO"] is None
+        assert [l["CAMPO"] for l in banco.tabelas["logs"]] == ["NR PEDIDO"]
+
+    @pytest.mark.parametrize("rpcs, requisicoes", [
+        (None, 3),  # leitura + RPC atualizar_pedidos + logs
+        ({}, 5),    # leitura + RPC ausente + 2 grupos de valores + logs
+    ])
+    def test_grava_so_campos_alterados(self, rpcs, requisicoes):
+        """Edições de outra pessoa entre a leitura e a gravação são preservadas e nada é recriado."""
+
+        class BancoConcorrente(BancoMemoria):
+            def _executar(self, consulta):
+                resposta = super()._executar(consulta)
+                if self.requisicoes == 1:  # logo após a leitura dos pedidos
+                    pedidos = self.tabelas["pedidos"]
+                    pedidos[1]["PAGAMENTO"] = "BOLETO"
+                    pedidos[:] = [p for p in pedidos if p["ID_PEDIDO"] != 4]
+                return resposta
+
+        banco = BancoConcorrente({"pedidos": [
+            {"ID_PEDIDO": i, "STATUS": "PENDENTE", "PAGAMENTO": "PIX", "NR PEDIDO": "", "OBSERVAÇÃO": ""}
+            for i in range(1, 5)
+        ], "logs": []}, rpcs=rpcs)
+        edicao = pd.DataFrame([
+            {"ID_PEDIDO": 2, "STATUS": "ENTREGUE", "PAGAMENTO": "PIX"},
+            {"ID_PEDIDO": 3, "STATUS": "ENTREGUE", "PAGAMENTO": "PIX"},
+            {"ID_PEDIDO": 4, "STATUS": "ENTREGUE", "PAGAMENTO": "PIX"},
+            {"ID_PEDIDO": 1, "STATUS": "GERADO", "PAGAMENTO": "PIX"},
+        ])
+
+        with db.usar_banco(banco):
+            relatorio = db.atualizar_pedidos_editaveis(edicao)
+
+        assert banco.requisicoes == requisicoes
+        por_id = {p["ID_PEDIDO"]: p for p in banco.tabelas["pedidos"]}
+        assert por_id[2]["STATUS"] == "ENTREGUE" and por_id[2]["PAGAMENTO"] == "BOLETO"
+        assert por_id[1]["STATUS"] == "GERADO"
+        assert 4 not in por_id
+        resultados = relatorio.set_index("ID_PEDIDO")["RESULTADO"]
+        assert resultados[4] == "nao_encontrado"
+        assert (resultados[[1, 2, 3]] == "atualizado").all()
+        assert sorted(l["ID_PEDIDO"] for l in banco.tabelas["logs"]) == [1, 2, 3]
+
+
+class TestArquivamentoTags:
+    """Testes do arquivamento em lote das tags geradas."""
+
+    @staticmethod
+    def _banco(rpcs=None):
+        estoque = [{"Tag": t, "Status": "Gerado", "Calibre": "10/12", "Peso": 5.0, "Cliente": "X",
+                    "Fornecedor": "F", "Validade": "01/01/2030"} for t in range(1, 201)]
+        subtags = [{"ID_Pai": t, "Letra": l, "Peso": 1.0} for t in range(1, 201) for l in "AB"]
+        return BancoMemoria(
+            {"estoque_salmao": estoque, "estoque_subtags": subtags, "logs": []},
+            rpcs=rpcs,
+        )
+
+    def _verificar(self, banco):
+        assert len(banco.tabelas["estoque_salmao_backup"]) == 200
+        assert len(banco.tabelas["estoque_subtags_backup"]) == 400
+        assert banco.tabelas["estoque_subtags"] == []
+        assert all(l["Status"] is None and l["Peso"] == 0.0 for l in banco.tabelas["estoque_salmao"])
+        assert len(banco.tabelas["logs"]) == 200
+
+    def test_rpc_uma_requisicao(self):
+        """Com a migração, 200 tags são arquivadas em uma única requisição."""
+        banco = self._banco()
+        with db.usar_banco(banco):
+            assert db.arquivar_tags_geradas(list(range(1, 201)), "teste") is True
+        assert banco.requisicoes == 1
+        self._verificar(banco)
+
+    def test_sem_rpc_requisicoes_fixas(self):
+        """Sem a migração, o fluxo em lote usa um número fixo de requisições."""
+        banco = self._banco(rpcs={})
+        with db.usar_banco(banco):
+            assert db.arquivar_tags_geradas(list(range(1, 201)), "teste") is True
+        assert banco.requisicoes == 1 + 7  # RPC ausente + pipeline
+        self._verificar(banco)
+
+    def test_migracoes_mantem_colunas_do_backup(self):
+        """Toda coluna que uma migração adiciona ao estoque também vai para o backup."""
+        import re
+        from pathlib import Path
+
+        colunas = {}
+        for arquivo in sorted(Path(__file__).resolve().parent.parent.glob("migrations/*.sql")):
+            for tabela, coluna in re.findall(
+                r'ALTER TABLE (\w+) ADD COLUMN IF NOT EXISTS "([^"]+)"', arquivo.read_text(encoding="utf-8")
+            ):
+                colunas.setdefault(tabela, set()).add(coluna)
+
+        assert "ALTERADO_EM" in colunas["estoque_salmao"]
+        for origem in ("estoque_salmao", "estoque_subtags"):
+            assert colunas.get(origem, set()) <= colunas.get(f"{origem}_backup", set())
+
+
+class TestCachePorVersao:
+    """Testes do cache de leituras pela versão das tabelas."""
+
+    @staticmethod
+    def _banco():
+        return BancoMemoria({
+            "clientes": [{"Código": 1, "Cliente": "CLIENTE A", "Nome Cidade": "SÃO CARLOS", "ROTA": "ROTA 1"}],
+            "pedidos": [{"ID_PEDIDO": 1, "STATUS": "PENDENTE", "PAGAMENTO": "PIX",
+                         "NR PEDIDO": "", "OBSERVAÇÃO": ""}],
+            "logs": [],
+            "versoes_dados": [{"tabela": "clientes", "versao": 0}, {"tabela": "pedidos", "versao": 0}],
+        })
+
+    def test_releitura_so_quando_a_tabela_muda(self):
+        """Editar pedidos invalida as leituras de pedidos, não a de clientes."""
+        banco = self._banco()
+        with db.usar_banco(banco):
+            versao = db.obter_versao_planilha()
+            db.listar_clientes(versao=versao)
+            db.buscar_pedidos_visualizacao(versao=versao)
+            antes = banco.requisicoes
+            db.listar_clientes(versao=versao)
+            db.buscar_pedidos_visualizacao(versao=versao)
+            assert banco.requisicoes == antes  # mesma versão: tudo do cache
+
+            edicao = pd.DataFrame([{"ID_PEDIDO": 1, "STATUS": "ENTREGUE"}])
+            db.atualizar_pedidos_editaveis(edicao)
+            nova = db.obter_versao_planilha()
+            assert nova.de("clientes") == versao.de("clientes")
+            assert nova.de("pedidos") != versao.de("pedidos")
+
+            antes = banco.requisicoes
+            db.listar_clientes(versao=nova)
+            assert banco.requisicoes == antes
+            df = db.buscar_pedidos_visualizacao(versao=nova)
+            assert banco.requisicoes == antes + 1
+            assert df.iloc[0]["STATUS"] == "ENTREGUE"
+
+    def test_sem_tabela_de_versoes(self):
+        """Sem a migração, a versão vale para todas as tabelas e o app segue funcionando."""
+        banco = BancoMemoria({"clientes": [{"Código": 1, "Cliente": "CLIENTE A"}]})
+        with db.usar_banco(banco):
+            versao = db.obter_versao_planilha()
+            assert dict(versao.contadores).keys() == {"*"}
+            assert len(db.listar_clientes(versao=versao)) == 1
+
+    def test_falha_nao_fica_em_cache(self):
+        """Uma leitura que falha devolve o valor vazio, mas a próxima volta ao banco."""
+        class BancoInstavel(BancoMemoria):
+            fora_do_ar = False
+
+            def _executar(self, consulta):
+                if self.fora_do_ar:
+                    raise ConnectionError("banco fora do ar")
+                return super()._executar(consulta)
+
+        banco = BancoInstavel(self._banco().tabelas)
+        with db.usar_banco(banco):
+            versao = db.obter_versao_planilha()
+            banco.fora_do_ar = True
+            assert db.listar_clientes(versao=versao) == []
+            assert db.get_metricas(versao=versao) == (0, 0)
+            assert db.listar_dados_filtros(versao=versao) == ([], [])
+            assert db.buscar_pedidos_visualizacao(versao=versao).empty
+
+            banco.fora_do_ar = False
+            assert db.listar_clientes(versao=versao) == ["CLIENTE A"]
+            assert db.get_metricas(versao=versao) == (1, 1)
+            assert len(db.buscar_pedidos_visualizacao(versao=versao)) == 1
+
+
+class TestInvalidacaoPorTabela:
+    """Testes do registro tabela -> caches usado pelas escritas."""
+
+    def test_registro_de_dependencias(self):
+        """Cada escrita declara as tabelas e alcança só os leitores delas."""
+        from services.database.cache import leitores_de
+
+        assert db.salvar_pedido.tabelas == ("pedidos", "logs")
+        leitores = leitores_de(*db.arquivar_tags_geradas.tabelas)
+        assert db.get_resumo_global_salmao in leitores
+        assert db.get_estoque_filtrado in leitores
+        assert db.listar_clientes not in leitores
+
+    def test_escrita_preserva_caches_de_outras_tabelas(self, banco_pedidos):
+        """Sem a tabela de versões, salvar pedido limpa só os caches de pedidos."""
+        with db.usar_banco(banco_pedidos):
+            db.listar_clientes()
+            db.buscar_pedidos_visualizacao()
+            db.salvar_pedido("CLIENTE A", "Item", date.today(), "PIX", "PENDENTE")
+
+            versao = db.obter_versao_planilha()
+            antes = banco_pedidos.requisicoes
+            assert db.listar_clientes(versao=versao) == ["CLIENTE A"]
+            assert banco_pedidos.requisicoes == antes
+            assert len(db.buscar_pedidos_visualizacao(versao=versao)) == 1
+            assert banco_pedidos.requisicoes == antes + 1
+
+
+class TestPaginacaoPorCursor:
+    """Testes da paginação keyset de pedidos e clientes."""
+
+    @staticmethod
+    def _percorrer(buscar, **kwargs):
+        """Avança até o fim e volta ao início, devolvendo as páginas vistas."""
+        idas, voltas = [], []
+        df, _, cursores = buscar(**kwargs)
+        idas.append(df)
+        while cursores["proxima"] is not None:
+            df, _, cursores = buscar(apos=cursores["proxima"], **kwargs)
+            idas.append(df)
+        voltas.append(df)
+        while cursores["anterior"] is not None:
+            df, _, cursores = buscar(antes=cursores["anterior"], **kwargs)
+            voltas.append(df)
+        return idas, voltas[::-1]
+
+    def test_pedidos_ida_e_volta(self):
+        """As páginas por cursor batem com a ordem completa, nos dois sentidos."""
+        pedidos = [{"ID_PEDIDO": i, "STATUS": "PENDENTE" if i % 3 else "ENTREGUE", "CIDADE": "X", "ROTA": "R"}
+                   for i in range(1, 48)]
+        banco = BancoMemoria({"pedidos": pedidos})
+        with db.usar_banco(banco):
+            idas, voltas = self._percorrer(db.buscar_pedidos_paginado, tamanho_pagina=10,
+                                           filtros={"status": ["PENDENTE"]})
+            _, total, _ = db.buscar_pedidos_paginado(tamanho_pagina=10, filtros={"status": ["PENDENTE"]})
+
+        esperado = sorted((p["ID_PEDIDO"] for p in pedidos if p["STATUS"] == "PENDENTE"), reverse=True)
+        assert total == len(esperado)
+        assert [i for df in idas for i in df["ID_PEDIDO"]] == esperado
+        assert [list(df["ID_PEDIDO"]) for df in voltas] == [list(df["ID_PEDIDO"]) for df in idas]
+
+    def test_contagem_uma_vez_por_filtro(self):
+        """Trocar de página não repete a contagem; outro filtro conta de novo."""
+        banco = BancoMemoria({"pedidos": [{"ID_PEDIDO": i, "STATUS": "PENDENTE"} for i in range(1, 31)]})
+        with db.usar_banco(banco):
+            versao = db.obter_versao_planilha()
+            assert db.contar_pedidos((("status", ("PENDENTE",)),), versao=versao) == 30
+            antes = banco.requisicoes
+            db.buscar_pedidos_paginado(tamanho_pagina=10, filtros={"status": ["PENDENTE"]})
+            db.buscar_pedidos_paginado(tamanho_pagina=10, filtros={"status": ["PENDENTE"]}, apos=21)
+            assert banco.requisicoes == antes + 2
+            db.buscar_pedidos_paginado(tamanho_pagina=10, filtros={"status": ["ENTREGUE"]})
+            assert banco.requisicoes == antes + 4
+
+    def test_clientes_nomes_repetidos_e_vazios(self):
+        """O cursor composto (Cliente, Código) não pula nem repete clientes."""
+        nomes = ['ANA', 'ANA', 'BETO, "O GRANDE" (SP)', None, 'CARLA', 'ANA', None, 'ZECA']
+        clientes = [{"Código": i, "Cliente": n} for i, n in enumerate(nomes * 3, start=1)]
+        banco = BancoMemoria({"clientes": clientes})
+        with db.usar_banco(banco):
+            idas, voltas = self._percorrer(db.buscar_clientes_paginado, tamanho_pagina=4)
+
+        esperado = [c["Código"] for c in sorted(clientes, key=lambda c: (c["Cliente"] is None, c["Cliente"] or "", c["Código"]))]
+        assert [c for df in idas for c in df["Código"]] == esperado
+        assert [list(df["Código"]) for df in voltas] == [list(df["Código"]) for df in idas]
+
+
+class TestResumoSalmao:
+    """Testes do resumo do salmão agregado no servidor."""
+
+    @staticmethod
+    def _banco(rpcs=None):
+        status = [None, "Livre", "gerado ", "Gerado", "Aberto", "Orçamento", "Reservado", "Livre"]
+        return BancoMemoria({
+            "estoque_salmao": [{"Tag": t, "Status": s} for t, s in enumerate(status * 50, start=1)],
+            "estoque_salmao_backup": [{"Tag": t} for t in range(1, 11)],
+        }, rpcs=rpcs)
+
+    def test_rpc_igual_ao_calculo_local(self):
+        """A RPC devolve poucos bytes e o mesmo resumo do cálculo antigo."""
+        banco_rpc, banco_local = self._banco(), self._banco(rpcs={})
+        with db.usar_banco(banco_rpc):
+            resumo_rpc = db.get_resumo_global_salmao()
+        db.get_resumo_global_salmao.clear()
+        with db.usar_banco(banco_local):
+            resumo_local = db.get_resumo_global_salmao()
+
+        assert resumo_rpc == resumo_local == (400, 150, 110, 50, 50, 50)
+        assert banco_rpc.bytes_respostas < banco_local.bytes_respostas / 10
+
+
+class TestMetricas:
+    """Testes dos totais da barra lateral."""
+
+    def test_totais_exatos_em_paralelo(self):
+        """Conta além de 1000 linhas, sem baixar dados, com as consultas em paralelo."""
+        banco = BancoMemoria({
+            "clientes": [{"Código": i} for i in range(1, 1501)],
+            "pedidos": [{"ID_PEDIDO": i} for i in range(1, 2501)],
+        }, latencia=0.1)
+        versao = db.VersaoDados((("*", 1),))
+        with db.usar_banco(banco):
+            inicio = time.perf_counter()
+            assert db.get_metricas(versao=versao) == (1500, 2500)
+            duracao = time.perf_counter() - inicio
+
+        assert banco.requisicoes == 2
+        assert banco.bytes_respostas <= 10  # só `[]` nas duas respostas
+        assert duracao < 0.18  # em série levaria 0.2s
+
+
+class TestFiltrosPedidos:
+    """Testes das opções de cidade e rota dos filtros de pedidos."""
+
+    def test_inclui_valores_de_pedidos_antigos(self):
+        """A RPC devolve cidades que só aparecem em pedidos antigos, numa resposta pequena."""
+        pedidos = [{"ID_PEDIDO": i, "CIDADE": "SÃO CARLOS", "ROTA": "ROTA 1"} for i in range(1, 6002)]
+        pedidos[0].update({"CIDADE": "ARARAQUARA", "ROTA": "ROTA 9"})
+        pedidos[1].update({"CIDADE": "  ", "ROTA": None})
+        banco = BancoMemoria({"pedidos": pedidos})
+
+        with db.usar_banco(banco):
+            cidades, rotas = db.listar_dados_filtros()
+
+        assert cidades == ["ARARAQUARA", "SÃO CARLOS"]
+        assert rotas == ["ROTA 1", "ROTA 9"]
+        assert banco.bytes_respostas < 200
+
+
+class TestPoolConexoes:
+    """Testes do pool HTTP instrumentado do cliente Supabase."""
+
+    def test_contadores_de_conexao(self, servidor_http):
+        """Requisições em sequência reaproveitam a conexão; as simultâneas aparecem no pico."""
+        from services.database.conexoes import EstatisticasConexao, criar_sessao_http
+
+        estatisticas = EstatisticasConexao()
+        with criar_sessao_http(servidor_http, {}, estatisticas) as sessao:
+            for _ in range(5):
+                assert sessao.get("/pedidos").json() == []
+            resumo = estatisticas.resumo()
+            assert resumo["conexoes_abertas"] == 1
+            assert resumo["conexoes_reutilizadas"] == 4
+
+            threads = [threading.Thread(target=sessao.get, args=("/lento",)) for _ in range(4)]
+            for t in threads:
+                t.start()
+            for t in threads:
+                t.join()
+
+        resumo = estatisticas.resumo()
+        assert resumo["requisicoes"] == 9
+        assert resumo["em_andamento"] == 0
+        assert resumo["pico_em_andamento"] > 1
+
+
+class TestCamadaAssincrona:
+    """Testes das leituras em paralelo (pool de threads limitado)."""
+
+    @staticmethod
+    def _banco(latencia=0.0):
+        pedidos = [{"ID_PEDIDO": i, "STATUS": "PENDENTE", "CIDADE": f"CIDADE {i % 3}", "ROTA": "R"}
+                   for i in range(1, 46)]
+        return BancoMemoria({
+            "pedidos": pedidos,
+            "clientes": [{"Código": i, "Cliente": f"CLIENTE {i:02d}"} for i in range(1, 31)],
+        }, latencia=latencia)
+
+    def test_mesmo_resultado_da_versao_sincrona(self):
+        """As leituras assíncronas reaproveitam as consultas e o tratamento das síncronas."""
+        banco = self._banco()
+        with db.usar_banco(banco):
+            futuros = (
+                adb.listar_dados_filtros(),
+                adb.buscar_pedidos_paginado(tamanho_pagina=10, apos=30),
+                adb.buscar_clientes_paginado(tamanho_pagina=10),
+            )
+            filtros, pagina, clientes = (f.result() for f in futuros)
+            assert filtros == db.listar_dados_filtros()
+            df, total, cursores = db.buscar_pedidos_paginado(tamanho_pagina=10, apos=30)
+            assert pagina[0].equals(df) and pagina[1:] == (total, cursores)
+            df_cli, total_cli, cursores_cli = db.buscar_clientes_paginado(tamanho_pagina=10)
+            assert clientes[0].equals(df_cli) and clientes[1:] == (total_cli, cursores_cli)
+
+    def test_consultas_independentes_em_paralelo(self):
+        """O tempo da página é o da consulta mais lenta, não a soma."""
+        banco = self._banco(latencia=0.1)
+        versao = db.VersaoDados((("*", 1),))
+        with db.usar_banco(banco):
+            inicio = time.perf_counter()
+            futuros = (
+                adb.get_metricas(versao=versao),
+                adb.listar_dados_filtros(versao=versao),
+                adb.buscar_pedidos_paginado(versao=versao),
+            )
+            for futuro in futuros:
+                futuro.result()
+            duracao = time.perf_counter() - inicio
+
+        assert banco.requisicoes == 5  # 2 contagens, filtros, página e total
+        assert duracao < 0.3  # em série levaria 0.5s
+
+    def test_pool_limitado(self):
+        """Muitas leituras de uma vez esperam na fila em vez de abrir uma thread cada."""
+        from services.database.assincrono import _MAX_LEITURAS
+
+        threads = set()
+
+        def leitura():
+            threads.add(threading.current_thread().name)
+            time.sleep(0.01)
+
+        futuros = [adb._executor.submit(adb.com_contexto(leitura)) for _ in range(4 * _MAX_LEITURAS)]
+        for futuro in futuros:
+            futuro.result()
+        assert len(threads) <= _MAX_LEITURAS
+
+    def test_escrita_invalida_cache_assincrono(self, banco_pedidos):
+        """O registro de invalidação também alcança as leituras assíncronas."""
+        with db.usar_banco(banco_pedidos):
+            assert adb.get_metricas().result() == (1, 0)
+            db.salvar_pedido("CLIENTE A", "Item", date.today(), "PIX", "PENDENTE")
+            assert adb.get_metricas().result() == (1, 1)
+
+
+class TestModeloLocal:
+    """Testes do modelo de leitura local com sincronização incremental."""
+
+    @staticmethod
+    def _banco(marcas_dagua=True, qtd_pedidos=2500):
+        pedidos = [{"ID_PEDIDO": i, "STATUS": "PENDENTE", "PAGAMENTO": "PIX", "NR PEDIDO": "",
+                    "OBSERVAÇÃO": "", "DIA DA ENTREGA": "01/01/2026", "NOME CLIENTE": "CLIENTE A"}
+                   for i in range(1, qtd_pedidos + 1)]
+        banco = BancoMemoria({
+            "versoes_dados": [], "pedidos": pedidos, "logs": [],
+            "clientes": [{"Código": 1, "Cliente": "CLIENTE A", "Nome Cidade": "SÃO CARLOS", "ROTA": "ROTA 1"}],
+            "estoque_salmao": [{"Tag": t, "Status": "Livre", "Peso": 10.0} for t in range(1, 51)],
+            "contadores_id": [{"tabela": "pedidos", "ultimo_id": qtd_pedidos}, {"tabela": "clientes", "ultimo_id": 1}],
+        }, marcas_dagua=marcas_dagua)
+        if marcas_dagua:
+            # Linhas anteriores à migração recebem o carimbo padrão da coluna (pedidos: a época, 011)
+            for tabela in ("clientes", "estoque_salmao"):
+                banco.carimbar(tabela, banco.tabelas[tabela])
+            for pedido in banco.tabelas["pedidos"]:
+                pedido["ALTERADO_EM"] = "1970-01-01T00:00:00+00:00"
+        return banco
+
+    @staticmethod
+    def _sincronizar(modelo, banco, tabela):
+        with db.usar_banco(banco):
+            (versao,) = db.obter_versao_planilha().de(tabela)
+            db.obter_versao_planilha.clear()
+            return modelo.sincronizar(banco, tabela, versao)
+
+    def test_delta_de_pedidos_por_carimbo(self):
+        """Após a carga inicial, só os pedidos com ALTERADO_EM novo são buscados."""
+        banco = self._banco()
+        modelo = ModeloLocal(":memory:")
+        assert self._sincronizar(modelo, banco, "pedidos") == "completa"
+
+        with db.usar_banco(banco):
+            db.salvar_pedido("CLIENTE A", "Item", date.today(), "PIX", "PENDENTE")
+            db.atualizar_pedidos_editaveis(pd.DataFrame([{"ID_PEDIDO": 7, "STATUS": "ENTREGUE"}]))
+
+        requisicoes, bytes_antes = banco.requisicoes, banco.bytes_respostas
+        assert self._sincronizar(modelo, banco, "pedidos") == "delta"
+        assert banco.requisicoes - requisicoes == 3  # versão, linhas alteradas e exclusões
+        assert banco.bytes_respostas - bytes_antes < 2000
+
+        locais = {l["ID_PEDIDO"]: l for l in modelo.linhas("pedidos")}
+        assert len(locais) == 2501
+        assert locais[7]["STATUS"] == "ENTREGUE"
+        assert locais[2501]["NOME CLIENTE"] == "CLIENTE A"
+
+    def test_exclusoes_e_edicoes_sem_log(self):
+        """Exclusões saem da cópia local e edições que não gravam log também chegam."""
+        banco = self._banco(qtd_pedidos=10)
+        modelo = ModeloLocal(":memory:")
+        for tabela in ("pedidos", "clientes"):
+            assert self._sincronizar(modelo, banco, tabela) == "completa"
+
+        banco.table("pedidos").update({"STATUS": "GERADO"}).eq("ID_PEDIDO", 5).execute()
+        banco.table("pedidos").delete().in_("ID_PEDIDO", [3, 4]).execute()
+        banco.table("pedidos").insert({"ID_PEDIDO": 4, "STATUS": "ORÇAMENTO"}).execute()  # excluído e recriado
+        banco.table("clientes").delete().eq("Código", 1).execute()
+
+        for tabela in ("pedidos", "clientes"):
+            assert self._sincronizar(modelo, banco, tabela) == "delta"
+        locais = {l["ID_PEDIDO"]: l for l in modelo.linhas("pedidos")}
+        assert sorted(locais) == [1, 2, 4, 5, 6, 7, 8, 9, 10]
+        assert locais[5]["STATUS"] == "GERADO" and locais[4]["STATUS"] == "ORÇAMENTO"
+        assert modelo.linhas("clientes") == []
+        _, removidas, _ = modelo.alteracoes("pedidos", 1, 1)
+        assert removidas == [3]
+
+    def test_leitura_nao_espera_sincronizacao(self):
+        """A busca no banco é feita fora do lock: quem lê usa a cópia anterior enquanto isso."""
+        banco = self._banco(qtd_pedidos=10)
+        modelo = ModeloLocal(":memory:")
+        self._sincronizar(modelo, banco, "pedidos")
+        banco.table("pedidos").update({"STATUS": "GERADO"}).eq("ID_PEDIDO", 5).execute()
+        banco.latencia = 0.3
+
+        sincronizacao = threading.Thread(target=modelo.sincronizar, args=(banco, "pedidos", "nova"))
+        sincronizacao.start()
+        time.sleep(0.1)
+        inicio = time.perf_counter()
+        assert modelo.linhas("pedidos", de=5, ate=5)[0]["STATUS"] == "PENDENTE"
+        assert time.perf_counter() - inicio < 0.1
+        assert sincronizacao.is_alive()
+        sincronizacao.join()
+        assert modelo.linhas("pedidos", de=5, ate=5)[0]["STATUS"] == "GERADO"
+
+    def test_carimbo_em_clientes_e_estoque(self):
+        """Clientes e estoque usam ALTERADO_EM como marca d'água."""
+        banco = self._banco()
+        modelo = ModeloLocal(":memory:")
+        for tabela in ("clientes", "estoque_salmao"):
+            assert self._sincronizar(modelo, banco, tabela) == "completa"
+
+        with db.usar_banco(banco):
+            db.criar_novo_cliente("CLIENTE B", "ARARAQUARA")
+            db.salvar_alteracoes_estoque(pd.DataFrame([{"Tag": 3, "Status": "gerado"}]), "teste")
+
+        for tabela in ("clientes", "estoque_salmao"):
+            assert self._sincronizar(modelo, banco, tabela) == "delta"
+        assert [c["Cliente"] for c in modelo.linhas("clientes")] == ["CLIENTE A", "CLIENTE B"]
+        assert modelo.linhas("estoque_salmao", de=3, ate=3)[0]["Status"] == "Gerado"
+
+    def test_sobrevive_ao_reinicio(self, tmp_path):
+        """Com a versão inalterada, um processo novo lê do disco sem buscar dados."""
+        banco = self._banco()
+        arquivo = str(tmp_path / "modelo.sqlite")
+        self._sincronizar(ModeloLocal(arquivo), banco, "pedidos")
+
+        requisicoes = banco.requisicoes
+        with db.usar_banco(banco), usar_modelo_local(ModeloLocal(arquivo)):
+            df = db.buscar_pedidos_visualizacao()
+        assert banco.requisicoes - requisicoes == 1  # só a versão
+        assert len(df) == 2500 and df["ID_PEDIDO"].iloc[0] == 2500
+
+        with db.usar_banco(banco):
+            db.buscar_pedidos_visualizacao.clear()
+            assert df.equals(db.buscar_pedidos_visualizacao())
+
+    def test_escrita_local_sincroniza_sem_versoes(self):
+        """Sem versoes_dados, uma escrita do processo ainda força a sincronização."""
+        banco = self._banco()
+        del banco.tabelas["versoes_dados"]
+        with db.usar_banco(banco), usar_modelo_local(ModeloLocal(":memory:")):
+            assert db.listar_clientes() == ["CLIENTE A"]
+            db.criar_novo_cliente("CLIENTE B", "ARARAQUARA")
+            assert db.listar_clientes() == ["CLIENTE A", "CLIENTE B"]
+
+    def test_sem_migracao_recarrega_completa(self):
+        """Sem ALTERADO_EM, cada versão nova recarrega a tabela em lotes."""
+        banco = self._banco(marcas_dagua=False)
+        modelo = ModeloLocal(":memory:")
+        assert self._sincronizar(modelo, banco, "pedidos") == "completa"
+        with db.usar_banco(banco):
+            db.salvar_pedido("CLIENTE A", "Item", date.today(), "PIX", "PENDENTE")
+        assert self._sincronizar(modelo, banco, "pedidos") == "completa"
+        assert len(modelo.linhas("pedidos")) == 2501
+
+    def test_desligado_sem_migracoes(self):
+        """O modelo só é usado com versoes_dados (003) e as marcas d'água (007/011)."""
+        from services.database.modelo_local import sincronizacao_disponivel
+
+        versoes = [{"tabela": "pedidos", "versao": 1}]
+        sem_007 = self._banco(marcas_dagua=False)
+        sem_007.tabelas["versoes_dados"] = versoes
+        sem_003 = self._banco()
+        completo = self._banco()
+        completo.tabelas["versoes_dados"] = versoes
+
+        assert sincronizacao_disponivel(sem_007) is False
+        assert sincronizacao_disponivel(sem_003) is False
+        assert sincronizacao_disponivel(completo) is True
+        requisicoes = completo.requisicoes
+        assert sincronizacao_disponivel(completo) is True
+        assert completo.requisicoes == requisicoes  # resposta guardada
+
+
+class TestVisualizacaoIncremental:
+    """Testes da atualização por delta de `buscar_pedidos_visualizacao`."""
+
+    @staticmethod
+    def _esperado(banco, limite):
+        from services.database.pedidos import _COLUNAS_VISUALIZACAO, _consulta_visualizacao
+        return carregar(_consulta_visualizacao(banco, limite).execute().data, "pedidos", _COLUNAS_VISUALIZACAO)
+
+    @staticmethod
+    def _editar(banco):
+        with db.usar_banco(banco):
+            db.salvar_pedido("CLIENTE A", "Item", date.today(), "PIX", "PENDENTE")
+            db.atualizar_pedidos_editaveis(pd.DataFrame([{"ID_PEDIDO": 4990, "STATUS": "ENTREGUE"}]))
+
+    def test_so_o_delta_e_buscado(self):
+        """Depois da primeira leitura, só pedidos novos e editados trafegam."""
+        banco = TestModeloLocal._banco(qtd_pedidos=5000)
+        with db.usar_banco(banco):
+            db.buscar_pedidos_visualizacao()
+            carga_inicial = banco.bytes_respostas
+
+        self._editar(banco)
+        bytes_antes = banco.bytes_respostas
+        with db.usar_banco(banco):
+            df = db.buscar_pedidos_visualizacao()
+        assert banco.bytes_respostas - bytes_antes < carga_inicial / 100
+        assert df.equals(self._esperado(banco, 5000))
+        assert df.iloc[0]["ID_PEDIDO"] == 5001
+        assert df.set_index("ID_PEDIDO").at[4990, "STATUS"] == "ENTREGUE"
+
+    def test_janela_mantem_os_mais_novos(self):
+        """Com limite, pedidos novos empurram os antigos e edições fora da janela não entram."""
+        banco = TestModeloLocal._banco(qtd_pedidos=5000)
+        with db.usar_banco(banco):
+            db.buscar_pedidos_visualizacao(limite=5)
+            db.salvar_pedido("CLIENTE A", "Item", date.today(), "PIX", "PENDENTE")
+            db.atualizar_pedidos_editaveis(pd.DataFrame([{"ID_PEDIDO": 10, "STATUS": "ENTREGUE"}]))
+            df = db.buscar_pedidos_visualizacao(limite=5)
+        assert df["ID_PEDIDO"].tolist() == [5001, 5000, 4999, 4998, 4997]
+        assert df.equals(self._esperado(banco, 5))
+
+    def test_feed_do_modelo_local(self):
+        """Com o modelo local, o delta vem do feed de alterações do SQLite."""
+        banco = TestModeloLocal._banco(qtd_pedidos=5000)
+        modelo = ModeloLocal(":memory:")
+        with db.usar_banco(banco), usar_modelo_local(modelo):
+            db.buscar_pedidos_visualizacao()
+            self._editar(banco)
+            df = db.buscar_pedidos_visualizacao()
+        assert df.equals(self._esperado(banco, 5000))
+        linhas, removidas, marca = modelo.alteracoes("pedidos", 1, 1)
+        assert sorted(l["ID_PEDIDO"] for l in linhas) == [4990, 5001] and removidas == []
+        assert marca == (1, 2)
+
+
+class TestEsquemas:
+    """Testes do carregamento tipado (services/database/esquemas.py)."""
+
+    @staticmethod
+    def _pedidos(qtd):
+        status = ["PENDENTE", "ENTREGUE", "GERADO", "ORÇAMENTO"]
+        return [{"ID_PEDIDO": i, "COD CLIENTE": i % 40, "NOME CLIENTE": f"CLIENTE {i % 40}",
+                 "CIDADE": "SÃO CARLOS", "STATUS": status[i % 4], "DIA DA ENTREGA": f"{i % 28 + 1:02d}/01/2026",
+                 "PEDIDO": f"Item {i}", "PAGAMENTO": "PIX", "NR PEDIDO": None, "OBSERVAÇÃO": "",
+                 "ROTA": "ROTA 1"} for i in range(1, qtd + 1)]
+
+    def test_tipos_do_esquema(self):
+        df = carregar(self._pedidos(10) + [{"ID_PEDIDO": 11, "DIA DA ENTREGA": "sem data"}], "pedidos")
+        assert str(df["ID_PEDIDO"].dtype) == "Int32"
+        assert df["STATUS"].dtype == "category"
+        assert df["DIA DA ENTREGA"].dtype == "datetime64[ns]"
+        assert df["DIA DA ENTREGA"].iloc[0] == pd.Timestamp(2026, 1, 2)
+        assert pd.isna(df["DIA DA ENTREGA"].iloc[-1]) and pd.isna(df["COD CLIENTE"].iloc[-1])
+        # Idempotente: tipar de novo não muda nada
+        from services.database.esquemas import tipar
+        assert tipar(df.copy(), "pedidos").equals(df)
+
+    def test_ocupa_menos_memoria(self):
+        linhas = self._pedidos(5000)
+        antes = pd.DataFrame(linhas).memory_usage(deep=True).sum()
+        depois = carregar(linhas, "pedidos").memory_usage(deep=True).sum()
+        assert depois < antes / 2
+
+    def test_estoque_projeta_as_colunas(self):
+        """O estoque não usa mais select("*"): só as colunas do esquema chegam."""
+        estoque = [{"Tag": t, "Status": "Livre", "Calibre": "10/12", "Peso": 5.2, "Cliente": None,
+                    "Fornecedor": "F", "Validade": "01/01/2030", "Observacao_Interna": "x" * 200}
+                   for t in range(1, 101)]
+        banco = BancoMemoria({"estoque_salmao": estoque})
+        with db.usar_banco(banco):
+            df = db.get_estoque_filtrado(1, 50)
+        assert list(df.columns) == ["Tag", "Status", "Calibre", "Peso", "Cliente", "Fornecedor", "Validade"]
+        assert len(df) == 50 and df["Peso"].dtype == "float32"
+        assert banco.bytes_respostas < len(str(estoque[:50]))
+
+
+class TestDatasPedidos:
+    """Testes das datas nativas de pedidos (migração 008) e do filtro de período."""
+
+    @staticmethod
+    def _banco(datas_nativas):
+        pedidos = [{"ID_PEDIDO": i, "STATUS": "PENDENTE", "DIA DA ENTREGA": f"{i:02d}/03/2026",
+                    "CARIMBO DE DATA/HORA": f"{i:02d}/02/2026 08:30:00"} for i in range(1, 29)]
+        pedidos.append({"ID_PEDIDO": 29, "STATUS": "PENDENTE", "DIA DA ENTREGA": "31/02/2026"})
+        return BancoMemoria({"pedidos": pedidos, "clientes": [], "logs": [],
+                             "contadores_id": [{"tabela": "pedidos", "ultimo_id": 29}]},
+                            datas_nativas=datas_nativas)
+
+    def test_preenchimento_em_lotes(self):
+        from services.database.pedidos import preencher_datas_pedidos
+        banco = self._banco(datas_nativas=True)
+        lotes = []
+        assert preencher_datas_pedidos(banco, lote=10, ao_avancar=lambda u, t: lotes.append(u)) == 29
+        assert lotes == [10, 20, 29]
+        pedidos = {p["ID_PEDIDO"]: p for p in banco.tabelas["pedidos"]}
+        assert pedidos[5]["DATA_ENTREGA"] == "2026-03-05"
+        assert pedidos[5]["CRIADO_EM"] == "2026-02-05T08:30:00-03:00"
+        assert pedidos[29]["DATA_ENTREGA"] is None
+        # De novo, só o pedido com data inválida continua pendente
+        assert preencher_datas_pedidos(banco, lote=10) == 1
+
+    @pytest.mark.parametrize("datas_nativas", [True, False])
+    def test_salvar_pedido_mantem_as_datas(self, datas_nativas):
+        banco = self._banco(datas_nativas)
+        with db.usar_banco(banco):
+            db.salvar_pedido("CLIENTE A", "Item", date(2026, 3, 10), "PIX", "PENDENTE")
+        novo = banco.tabelas["pedidos"][-1]
+        assert novo["DIA DA ENTREGA"] == "10/03/2026"
+        assert novo.get("DATA_ENTREGA") == ("2026-03-10" if datas_nativas else None)
+
+    @pytest.mark.parametrize("datas_nativas", [True, False])
+    def test_periodo_filtrado_no_banco(self, datas_nativas):
+        """O período vai para a consulta (página e total), com ou sem a migração."""
+        from services.database.pedidos import _pedidos_do_periodo, preencher_datas_pedidos
+        banco = self._banco(datas_nativas)
+        if datas_nativas:
+            preencher_datas_pedidos(banco)
+        periodo = {"data_inicio": date(2026, 3, 5), "data_fim": date(2026, 3, 14)}
+        with db.usar_banco(banco):
+            df, total, cursores = db.buscar_pedidos_paginado(tamanho_pagina=6, **periodo)
+            df_async, total_async, _ = adb.buscar_pedidos_paginado(tamanho_pagina=6, **periodo).result()
+        assert total == total_async == 10
+        assert list(df["ID_PEDIDO"]) == list(df_async["ID_PEDIDO"]) == [14, 13, 12, 11, 10, 9]
+        assert cursores["proxima"] == 9
+
+    def test_periodo_sem_migracao_nao_e_descartado(self):
+        """Sem a 008, período aberto não vira "sem filtro": a leitura recusa e a tela avisa."""
+        banco = self._banco(datas_nativas=False)
+        desde = {"data_inicio": date(2026, 3, 20)}
+        with db.usar_banco(banco):
+            assert db.erro_periodo(**desde)
+            assert db.erro_periodo(date(2026, 3, 5), date(2026, 3, 14)) is None
+            df, total, _ = db.buscar_pedidos_paginado(**desde)
+            df_async, total_async, _ = adb.buscar_pedidos_paginado(**desde).result()
+            with pytest.raises(ValueError):
+                next(db.lotes_pedidos(**desde))
+        assert df.empty and df_async.empty and total == total_async == 0
+
+        with db.usar_banco(self._banco(datas_nativas=True)):
+            assert db.erro_periodo(**desde) is None
+
+    @pytest.mark.parametrize("datas_nativas", [True, False])
+    def test_indicadores_por_periodo(self, datas_nativas):
+        """O período vai para a consulta; "Tudo" traz todos os pedidos, sem teto."""
+        from services.database.pedidos import _pedidos_do_periodo, preencher_datas_pedidos
+        banco = self._banco(datas_nativas)
+        banco.tabelas["pedidos"] += [{"ID_PEDIDO": i, "STATUS": "ENTREGUE", "DIA DA ENTREGA": "01/01/2025"}
+                                     for i in range(30, 1530)]
+        if datas_nativas:
+            preencher_datas_pedidos(banco)
+        antes = banco.bytes_respostas
+        with db.usar_banco(banco):
+            dia = _pedidos_do_periodo(date(2026, 3, 7), date(2026, 3, 7))
+            bytes_dia = banco.bytes_respostas - antes
+            desde = _pedidos_do_periodo(date(2026, 3, 20), None)
+            tudo = _pedidos_do_periodo(None, None)
+        assert list(dia["ID_PEDIDO"]) == [7]
+        assert sorted(desde["ID_PEDIDO"]) == list(range(20, 29))
+        assert len(tudo) == 1529
+        if datas_nativas:
+            assert bytes_dia < 1000
+
+
+class TestResumoPedidos:
+    """Testes dos totais do dashboard (migração 009)."""
+
+    @staticmethod
+    def _banco(rpcs=None):
+        pedidos = [{"ID_PEDIDO": i, "STATUS": ["PENDENTE", "ENTREGUE", "GERADO"][i % 3],
+                    "PAGAMENTO": ["PIX", "BOLETO"][i % 2], "NOME CLIENTE": f"CLIENTE {i % 7}",
+                    "DIA DA ENTREGA": f"{i % 28 + 1:02d}/03/2026"} for i in range(1, 3001)]
+        pedidos.append({"ID_PEDIDO": 3001, "STATUS": "PENDENTE", "PAGAMENTO": "",
+                        "NOME CLIENTE": None, "DIA DA ENTREGA": "31/02/2026"})
+        return BancoMemoria({"pedidos": pedidos}, rpcs=rpcs)
+
+    @pytest.mark.parametrize("periodo", [(None, None), (date(2026, 3, 5), date(2026, 3, 11)),
+                                         (date(2026, 3, 20), None)])
+    def test_rpc_igual_ao_calculo_local(self, periodo):
+        with db.usar_banco(self._banco()):
+            resumo = resumo_pedidos(*periodo)
+        with db.usar_banco(self._banco(rpcs={})):
+            local = resumo_pedidos(*periodo)
+        assert resumo == local
+        assert sum(resumo["status"].values()) == resumo["total"]
+
+    def test_chaves_com_espacos(self):
+        """RPC e cálculo local juntam "PENDENTE " e "PENDENTE" no mesmo grupo."""
+        pedidos = [{"ID_PEDIDO": 1, "STATUS": "PENDENTE ", "PAGAMENTO": " PIX\t", "NOME CLIENTE": "CLIENTE A\n",
+                    "DIA DA ENTREGA": "01/03/2026"},
+                   {"ID_PEDIDO": 2, "STATUS": "PENDENTE", "PAGAMENTO": "PIX", "NOME CLIENTE": "CLIENTE A",
+                    "DIA DA ENTREGA": "01/03/2026"},
+                   {"ID_PEDIDO": 3, "STATUS": "  ", "PAGAMENTO": None, "NOME CLIENTE": "",
+                    "DIA DA ENTREGA": "02/03/2026"}]
+        with db.usar_banco(BancoMemoria({"pedidos": pedidos})):
+            resumo = resumo_pedidos()
+        with db.usar_banco(BancoMemoria({"pedidos": pedidos}, rpcs={})):
+            local = resumo_pedidos()
+        assert resumo == local
+        assert resumo["status"] == {"PENDENTE": 2} and resumo["pagamento"] == {"PIX": 2}
+        assert resumo["clientes"] == [["CLIENTE A", 2]] and resumo["total"] == 3
+
+    def test_historico_inteiro_em_resposta_pequena(self):
+        banco = self._banco()
+        with db.usar_banco(banco):
+            resumo = resumo_pedidos(top_clientes=3)
+        assert resumo["total"] == 3001
+        assert len(resumo["dias"]) == 28 and "2026-03-01" in resumo["dias"]
+        assert [c for c, _ in resumo["clientes"]] == ["CLIENTE 1", "CLIENTE 2", "CLIENTE 3"]
+        assert "" not in resumo["pagamento"]
+        assert banco.bytes_respostas < 2000
+
+
+class TestIndicadores:
+    """Testes dos indicadores do dashboard (services/indicadores.py)."""
+
+    def test_indicadores_do_periodo(self):
+        from dataclasses import FrozenInstanceError
+        from services.indicadores import obter_indicadores
+
+        banco = TestResumoPedidos._banco()
+        banco.tabelas["versoes_dados"] = [{"tabela": "pedidos", "versao": 1}]
+        with db.usar_banco(banco):
+            kpi = obter_indicadores(date(2026, 3, 1), date(2026, 3, 31))
+            requisicoes = banco.requisicoes
+            assert obter_indicadores(date(2026, 3, 1), date(2026, 3, 31)) == kpi
+            assert banco.requisicoes == requisicoes  # outra sessão: sai do cache
+
+        assert kpi.total == 3000
+        assert kpi.entregues == 1000 and kpi.pct_saude == pytest.approx(100 / 3)
+        assert dict(kpi.status) == {"PENDENTE": 1000, "ENTREGUE": 1000, "GERADO": 1000}
+        assert [q for _, q in kpi.pagamento] == sorted(q for _, q in kpi.pagamento)
+        assert kpi.dias[0] == (date(2026, 3, 1), 107)
+        assert kpi.total_aguardando == 2000
+        assert [s for _, s, _ in kpi.aguardando] == ["ORÇAMENTO", "RESERVADO", "NÃO GERADO", "PENDENTE", "GERADO"]
+        with pytest.raises(FrozenInstanceError):
+            kpi.total = 0
+
+    def test_sem_pedidos(self):
+        from services.indicadores import calcular_indicadores, Indicadores
+        assert calcular_indicadores(None) == calcular_indicadores({"total": 0}) == Indicadores()
+        assert Indicadores().pct_saude == 0
+
+
+class TestExportacao:
+    """Testes da exportação em lotes (services/exportacao.py)."""
+
+    @staticmethod
+    def _banco():
+        pedidos = [{"ID_PEDIDO": i, "STATUS": "PENDENTE" if i % 4 else "ENTREGUE", "CIDADE": "X", "ROTA": "R",
+                    "NOME CLIENTE": f"CLIENTE {i}", "DIA DA ENTREGA": f"{i % 28 + 1:02d}/03/2026"}
+                   for i in range(1, 2501)]
+        return BancoMemoria({"pedidos": pedidos})
+
+    def test_lotes_cobrem_todo_o_resultado(self):
+        banco = self._banco()
+        with db.usar_banco(banco):
+            lotes = list(db.lotes_pedidos({"status": ["PENDENTE"]}, lote=500))
+        assert banco.requisicoes == 4  # 1875 pedidos: o lote incompleto encerra
+        ids = [i for lote in lotes for i in lote["ID_PEDIDO"]]
+        assert ids == [i for i in range(2500, 0, -1) if i % 4]
+        assert max(len(lote) for lote in lotes) == 500
+
+    def test_csv_e_xlsx(self):
+        import io
+        import zipfile
+        from services.exportacao import exportar
+
+        with db.usar_banco(self._banco()):
+            csv = exportar(db.lotes_pedidos(lote=700), "csv")
+            xlsx = exportar(db.lotes_pedidos(lote=700), "xlsx", aba="Pedidos")
+
+        df = pd.read_csv(io.BytesIO(csv), sep=";", encoding="utf-8-sig")
+        assert len(df) == 2500 and df["ID_PEDIDO"].iloc[0] == 2500
+        assert df["DIA DA ENTREGA"].iloc[0] == "09/03/2026"
+        with zipfile.ZipFile(io.BytesIO(xlsx)) as arquivo:
+            planilha = arquivo.read("xl/worksheets/sheet1.xml").decode()
+        assert '<row r="2501"' in planilha and '<row r="2502"' not in planilha
+
+    def test_parquet_mantem_os_tipos(self):
+        import io
+        from services.exportacao import exportar
+        pytest.importorskip("pyarrow")  # dependência do Streamlit
+
+        with db.usar_banco(self._banco()):
+            dados = exportar(db.lotes_pedidos(lote=1000), "parquet")
+        df = pd.read_parquet(io.BytesIO(dados))
+        assert len(df) == 2500
+        assert str(df["ID_PEDIDO"].dtype) == "Int32"
+        assert str(df["DIA DA ENTREGA"].dtype).startswith("datetime64")
+
+    def test_trabalho_em_segundo_plano_compartilhado(self):
+        from services.exportacao import em_segundo_plano
+
+        chamadas = []
+        liberar = threading.Event()
+
+        def gerar():
+            chamadas.append(1)
+            liberar.wait(5)
+
+        primeiro = em_segundo_plano(("teste", 1), gerar)
+        segundo = em_segundo_plano(("teste", 1), gerar)
+        liberar.set()
+        primeiro.result(timeout=5)
+        assert primeiro is segundo and chamadas == [1]
+
+        def falhar():
+            raise RuntimeError("sem conexão")
+
+        with pytest.raises(RuntimeError):
+            em_segundo_plano(("teste", 2), falhar).result(timeout=5)
+        # A falha fica guardada para a página mostrar; só é refeita quando pedido
+        assert isinstance(em_segundo_plano(("teste", 2), gerar).exception(), RuntimeError)
+        em_segundo_plano(("teste", 2), gerar, refazer=True).result(timeout=5)
+        assert chamadas == [1, 1]
+
+
+class TestExportacaoHistorico:
+    """Testes da exportação do histórico inteiro, lote a lote em arquivo."""
+
+    def test_historico_salmao_sem_cortar_tags(self):
+        """A mesma tag arquivada várias vezes não se perde nem se repete entre páginas."""
+        backup = [{"Tag": t, "Status": "Gerado", "Peso": 1.0 + i, "Validade": "01/01/2027"}
+                  for t in range(1, 301) for i in range(t % 4 + 1)]
+        banco = BancoMemoria({"estoque_salmao_backup": backup})
+        with db.usar_banco(banco):
+            lotes = list(db.lotes_historico_salmao(lote=100))
+        tags = [t for lote in lotes for t in lote["Tag"]]
+        assert len(tags) == len(backup)
+        assert tags == sorted(l["Tag"] for l in backup)
+        assert len({l["Tag"].iloc[-1] for l in lotes}) == len(lotes)
+
+    @pytest.mark.parametrize("formato", ["csv", "xlsx"])
+    def test_arquivo_em_disco(self, formato):
+        import os
+        from services.exportacao import descartar_arquivo, exportar_em_arquivo
+
+        with db.usar_banco(TestExportacao._banco()):
+            caminho = exportar_em_arquivo(db.lotes_pedidos(lote=400), formato, aba="Pedidos")
+        try:
+            assert caminho.endswith(f".{formato}") and os.path.getsize(caminho) > 0
+            if formato == "csv":
+                assert len(pd.read_csv(caminho, sep=";", encoding="utf-8-sig")) == 2500
+        finally:
+            descartar_arquivo(caminho)
+        assert not os.path.exists(caminho)
+
+
+class TestTabelaStatus:
+    """Testes da tabela com marcador de status no lugar do Styler (ui/components.py)."""
+
+    def test_marcador_antes_do_status(self):
+        import ui.components as components
+        from core.config import ICONES_STATUS
+
+        df = pd.DataFrame({
+            "ID_PEDIDO": [1, 2, 3, 4],
+            "STATUS": ["ENTREGUE", " PENDENTE ", None, "DESCONHECIDO"],
+            "PAGAMENTO": ["PIX"] * 4,
+        })
+        df_tab = components.preparar_tabela_status(df, "STATUS", ICONES_STATUS)
+
+        assert list(df_tab.columns) == ["VER", "ID_PEDIDO", components.COLUNA_MARCADOR, "STATUS", "PAGAMENTO"]
+        assert list(df_tab[components.COLUNA_MARCADOR]) == ["🟢", "🟡", "", ""]
+        assert df_tab[components.COLUNA_MARCADOR].dtype == "category"
+        assert not df_tab["VER"].any()
+        assert list(df.columns) == ["ID_PEDIDO", "STATUS", "PAGAMENTO"]  # original intacto
+
+
+class TestAquecimento:
+    """Testes do pré-carregamento após o login (services/aquecimento.py)."""
+
+    @staticmethod
+    def _banco():
+        return BancoMemoria({
+            "versoes_dados": [{"tabela": t, "versao": 1} for t in ("clientes", "pedidos")],
+            "clientes": [{"Código": 1, "Cliente": "CLIENTE A", "Nome Cidade": "SÃO CARLOS", "ROTA": "ROTA 1"}],
+            "pedidos": [{"ID_PEDIDO": i, "STATUS": "PENDENTE", "CIDADE": "SÃO CARLOS", "ROTA": "ROTA 1"}
+                        for i in range(1, 31)],
+        })
+
+    @pytest.mark.parametrize("perfil", ["Admin", "Operador"])
+    def test_primeira_tela_sai_do_cache(self, perfil):
+        """Depois do aquecimento, as leituras da primeira tela não vão ao banco."""
+        from services.aquecimento import aquecer_caches, aguardar_aquecimento
+
+        banco = self._banco()
+        with db.usar_banco(banco):
+            assert aguardar_aquecimento(aquecer_caches(perfil), timeout=5)
+            requisicoes = banco.requisicoes
+
+            versao = db.obter_versao_planilha()
+            adb.get_metricas(versao=versao).result()
+            if perfil == "Admin":
+                assert not db.listar_clientes_rotas(versao=versao).empty
+                db.buscar_pedidos_visualizacao(versao=versao)
+            else:
+                adb.listar_dados_filtros().result()
+                adb.buscar_pedidos_paginado(tamanho_pagina=20, filtros={}).result()
+
+            assert banco.requisicoes == requisicoes
+
+    def test_leituras_com_contexto_da_sessao(self, monkeypatch):
+        """As threads do aquecimento usam o contexto do Streamlit de quem fez o login."""
+        import services.aquecimento as aquecimento
+        import services.database.assincrono as assincrono
+        from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+        contexto = object()
+        vistos = []
+        monkeypatch.setattr(assincrono, "get_script_run_ctx", lambda suppress_warning=False: contexto)
+        monkeypatch.setattr(aquecimento, "leituras_do_perfil", lambda perfil, versao: {
+            "leitura": lambda: vistos.append(get_script_run_ctx(suppress_warning=True)),
+        })
+        with db.usar_banco(self._banco()):
+            assert aquecimento.aguardar_aquecimento(aquecimento.aquecer_caches("Admin"))
+        assert vistos == [contexto]
+        # A thread do pool devolve o contexto ao terminar
+        assert aquecimento._executor.submit(get_script_run_ctx, True).result() is None
+
+    def test_falha_nao_interrompe_login(self, monkeypatch):
+        """Erro em uma leitura só é registrado; as demais seguem."""
+        import services.aquecimento as aquecimento
+
+        def falhar():
+            raise RuntimeError("sem conexão")
+
+        executadas = []
+        monkeypatch.setattr(aquecimento, "leituras_do_perfil", lambda perfil, versao: {
+            "falha": falhar, "ok": lambda: executadas.append(perfil),
+        })
+        with db.usar_banco(self._banco()):
+            assert aquecimento.aguardar_aquecimento(aquecimento.aquecer_caches("Admin"))
+        assert executadas == ["Admin"]
+
+
 # ============================================================
 # FIXTURES E UTILITÁRIOS
 # ============================================================
@@ -262,5 +1403,53 @@ def dados_pedido_valido():
     }
 
 
+@pytest.fixture(autouse=True)
+def limpar_caches_streamlit():
+    """Isola os testes: caches de dados e recursos (alocador de IDs) começam vazios."""
+    st.cache_data.clear()
+    st.cache_resource.clear()
+    db.invalidar_tabelas("pedidos", "clientes", "estoque_salmao", "estoque_salmao_backup")
+    yield
+
+
+@pytest.fixture
+def banco_pedidos():
+    """Banco em memória com um cliente e os contadores de ID."""
+    return BancoMemoria({
+        "clientes": [{"Código": 1, "Cliente": "CLIENTE A", "Nome Cidade": "SÃO CARLOS", "ROTA": "ROTA 1"}],
+        "pedidos": [],
+        "logs": [],
+        "contadores_id": [{"tabela": "pedidos", "ultimo_id": 0}, {"tabela": "clientes", "ultimo_id": 1}],
+    })
+
+
+@pytest.fixture
+def servidor_http():
+    """Servidor HTTP/1.1 local com keep-alive; `/lento` demora 0.2s para responder."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            if self.path == "/lento":
+                time.sleep(0.2)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"[]")
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=servidor.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{servidor.server_port}"
+    servidor.shutdown()
+    servidor.server_close()
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v", "--tb=short"])
@@ -1,10 +1,10 @@
+import pandas as pd
 import streamlit as st
-from ui.styles import PALETA_CORES
+from datetime import datetime
 
-try:
-    from streamlit_javascript import st_javascript  # type: ignore
-except Exception:
-    st_javascript = None
+import services.exportacao as exportacao
+import ui.viewport as viewport
+from ui.styles import PALETA_CORES
 
 
 def render_login_header():
@@ -134,36 +134,127 @@ def render_history_item(id_ped, data, status, descricao, pagamento):
 """, unsafe_allow_html=True)
 
 
-def render_pagination(pagina_atual, total_paginas, key_prefix="btn"):
+def render_pagination(pagina_atual, total_paginas, key_prefix="btn", tem_anterior=None, tem_proxima=None):
     """
     Renderiza controles de paginação.
+
+    Na paginação por cursor, `tem_anterior`/`tem_proxima` (vindos dos cursores
+    da consulta) decidem quais botões ficam ativos; o número da página é só
+    informativo.
     """
-    if total_paginas <= 1:
-        return 1
+    if tem_anterior is None:
+        tem_anterior = pagina_atual > 1
+    if tem_proxima is None:
+        tem_proxima = pagina_atual < total_paginas
+    if not tem_anterior and not tem_proxima:
+        return pagina_atual
 
     c_esq, c_prev, c_info, c_next, c_dir = st.columns([3, 1, 2, 1, 3], vertical_alignment="center")
 
     nova_pagina = pagina_atual
 
     with c_prev:
-        if st.button("◀ Anterior", key=f"{key_prefix}_prev", disabled=(pagina_atual <= 1), use_container_width=True):
+        if st.button("◀ Anterior", key=f"{key_prefix}_prev", disabled=not tem_anterior, use_container_width=True):
             nova_pagina = max(1, pagina_atual - 1)
 
     with c_info:
         st.markdown(
             f"<p style='text-align: center; margin: 0; color: #8b949e; font-size: 0.9em;'>"
-            f"Página <b>{pagina_atual}</b> de <b>{total_paginas}</b>"
+            f"Página <b>{pagina_atual}</b> de <b>{max(total_paginas, pagina_atual)}</b>"
             f"</p>",
             unsafe_allow_html=True
         )
 
     with c_next:
-        if st.button("Próxima ▶", key=f"{key_prefix}_next", disabled=(pagina_atual >= total_paginas), use_container_width=True):
-            nova_pagina = min(total_paginas, pagina_atual + 1)
+        if st.button("Próxima ▶", key=f"{key_prefix}_next", disabled=not tem_proxima, use_container_width=True):
+            nova_pagina = pagina_atual + 1
 
     return nova_pagina
 
 
+def render_pagination_cursor(chave_estado, cursores, total_paginas, key_prefix="btn"):
+    """
+    Controles de paginação por cursor.
+
+    `st.session_state[chave_estado]` guarda {"pagina", "apos", "antes"}: os
+    argumentos da próxima consulta. Retorna True se a página mudou.
+    """
+    estado = st.session_state[chave_estado]
+    nova_pagina = render_pagination(
+        estado["pagina"],
+        total_paginas,
+        key_prefix=key_prefix,
+        tem_anterior=cursores.get("anterior") is not None,
+        tem_proxima=cursores.get("proxima") is not None,
+    )
+    if nova_pagina == estado["pagina"]:
+        return False
+
+    if nova_pagina > estado["pagina"]:
+        estado = {"pagina": nova_pagina, "apos": cursores["proxima"], "antes": None}
+    elif nova_pagina == 1:
+        estado = estado_pagina_inicial()
+    else:
+        estado = {"pagina": nova_pagina, "apos": None, "antes": cursores["anterior"]}
+    st.session_state[chave_estado] = estado
+    return True
+
+
+def estado_pagina_inicial():
+    """Estado da paginação por cursor na primeira página."""
+    return {"pagina": 1, "apos": None, "antes": None}
+
+
+FORMATOS_EXPORTACAO = {"Excel": "xlsx", "CSV": "csv"}
+
+
+def render_exportacao(chave, gerar_lotes, nome_arquivo, *, aba="Dados", assinatura=None,
+                      formato_padrao="Excel", rotulo="Gerar arquivo"):
+    """
+    Exportação sob demanda: nada é gerado até o clique em `rotulo`. Aí
+    `gerar_lotes()` (iterador de DataFrames) é gravado lote a lote em um
+    arquivo temporário (services/exportacao.py) e oferecido para download.
+
+    `assinatura` identifica o que o arquivo representa (filtros, período...):
+    se mudar, o arquivo gerado é descartado.
+    """
+    formato = st.radio(
+        "Formato:", list(FORMATOS_EXPORTACAO), index=list(FORMATOS_EXPORTACAO).index(formato_padrao),
+        horizontal=True, key=f"{chave}_formato"
+    )
+    extensao = FORMATOS_EXPORTACAO[formato]
+    estado = f"{chave}_arquivo"
+
+    if st.button(rotulo, key=f"{chave}_gerar"):
+        with st.spinner("Gerando arquivo..."):
+            caminho = exportacao.exportar_em_arquivo(gerar_lotes(), extensao, aba)
+        anterior = st.session_state.get(estado)
+        if anterior:
+            exportacao.descartar_arquivo(anterior[2])
+        st.session_state[estado] = (assinatura, extensao, caminho)
+
+    gerado = st.session_state.get(estado)
+    if not gerado:
+        return
+    if (gerado[0], gerado[1]) != (assinatura, extensao):
+        exportacao.descartar_arquivo(gerado[2])
+        del st.session_state[estado]
+        return
+    try:
+        with open(gerado[2], "rb") as arquivo:
+            st.download_button(
+                label=f"⬇️ Baixar {formato}",
+                data=arquivo,
+                file_name=f"{nome_arquivo}_{datetime.now().strftime('%d-%m-%Y')}.{extensao}",
+                mime=exportacao.FORMATOS[extensao],
+                type="primary",
+                key=f"{chave}_baixar"
+            )
+    except FileNotFoundError:
+        # arquivo expirou (limpeza dos temporários): gera de novo no próximo clique
+        del st.session_state[estado]
+
+
 def render_error_details(msg_principal, exception_obj):
     """Padroniza a exibição de erros."""
     st.error(f"{msg_principal}: {exception_obj}")
@@ -232,6 +323,62 @@ def render_kv_row(label: str, value: str):
     )
 
 
+def texto_celula(valor, vazio: str = "") -> str:
+    """Valor de uma célula como texto: datas em dd/mm/aaaa e nulos (None/NaN/NaT/NA) como `vazio`."""
+    if valor is None or (pd.api.types.is_scalar(valor) and pd.isna(valor)):
+        return vazio
+    if isinstance(valor, pd.Timestamp):
+        return valor.strftime("%d/%m/%Y")
+    return str(valor)
+
+
+# Cards desenhados por vez; "Carregar mais" aumenta a janela
+CARDS_POR_JANELA = 20
+
+
+def textos_coluna(serie) -> pd.Series:
+    """`texto_celula` vetorizado: a coluna inteira como texto de uma vez."""
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie.dt.strftime("%d/%m/%Y").fillna("")
+    return serie.astype(object).where(serie.notna(), "").astype(str)
+
+
+def _escapar(textos):
+    return (textos.str.replace("&", "&amp;", regex=False)
+                  .str.replace("<", "&lt;", regex=False)
+                  .str.replace(">", "&gt;", regex=False)
+                  .str.replace('"', "&quot;", regex=False))
+
+
+def _cards_html(df, title_col, id_col, subtitle_cols, fields):
+    """(HTML de cada card, rótulo de cada card) montados coluna a coluna, sem iterar linhas."""
+    if title_col and title_col in df:
+        titulos = textos_coluna(df[title_col])
+    elif id_col and id_col in df:
+        titulos = "#" + textos_coluna(df[id_col])
+    else:
+        titulos = pd.Series([f"Item {i + 1}" for i in range(len(df))], index=df.index)
+
+    subtitulos = pd.Series("", index=df.index)
+    for col in subtitle_cols:
+        if col in df:
+            texto = textos_coluna(df[col]).str.strip()
+            separador = ((subtitulos != "") & (texto != "")).map({True: " • ", False: ""})
+            subtitulos = subtitulos + separador + texto
+
+    html = "<div class='lista-card'><div class='lista-card-titulo'>" + _escapar(titulos) + "</div>"
+    html = html + (subtitulos != "").map({True: "<div class='lista-card-sub'>", False: ""}) \
+        + _escapar(subtitulos) + (subtitulos != "").map({True: "</div>", False: ""})
+    for lbl, col in fields:
+        if col in df:
+            html = html + f"<div class='lista-card-campo'><span>{lbl}:</span><span>" \
+                + _escapar(textos_coluna(df[col])) + "</span></div>"
+    html = html + "</div>"
+
+    rotulos = titulos.where(subtitulos == "", titulos + " • " + subtitulos)
+    return html.tolist(), rotulos.tolist()
+
+
 def render_df_as_list_cards(
     df,
     *,
@@ -241,97 +388,114 @@ def render_df_as_list_cards(
     fields: list[tuple[str, str]] = None,
     action_label: str = "Ver",
     action_key_prefix: str = "card_action",
-    return_on_click: bool = True
+    return_on_click: bool = True,
+    janela: int = CARDS_POR_JANELA
 ):
     """
     Renderiza um DataFrame como LISTA (cards) — ideal para celular.
 
+    Só os primeiros `janela` cards são desenhados, todos em um único
+    st.markdown montado coluna a coluna; "Carregar mais" mostra a próxima
+    janela. A ação (ex.: "Ver") é um único seletor para a janela inteira,
+    não um botão por card: o número de elementos por rerun não cresce com a
+    quantidade de linhas.
+
     Parâmetros:
         df: pandas.DataFrame
         id_col: coluna que identifica unicamente (ex.: "ID", "Pedido_ID").
         title_col: coluna usada como título principal do card.
         subtitle_cols: colunas mostradas logo abaixo do título.
         fields: lista de tuplas (label, coluna) para exibir como "campo: valor".
-        action_label: rótulo do botão (ex.: "Ver", "Editar", "Abrir").
+        action_label: rótulo da ação (ex.: "Ver", "Editar", "Abrir"); None = sem ação.
         action_key_prefix: prefixo para keys do Streamlit.
-        return_on_click: se True, retorna o id/índice clicado.
+        return_on_click: se True, retorna o id/índice escolhido.
+        janela: cards por janela.
 
     Retorno:
-        - Se return_on_click=True: retorna o valor do id_col (ou o índice) do item clicado, ou None.
+        - Se return_on_click=True: retorna o valor do id_col (ou o índice) do item escolhido, ou None.
         - Se False: retorna None.
     """
     if df is None or len(df) == 0:
         st.info("Nenhum registro para exibir.")
         return None
 
-    subtitle_cols = subtitle_cols or []
-    fields = fields or []
+    chave_janela = f"{action_key_prefix}_janela"
+    chave_dados = f"{action_key_prefix}_dados"
+    chave_escolha = f"{action_key_prefix}_escolha"
+    chave_clicado = f"{action_key_prefix}_clicado"
+
+    # Outra lista (nova página, novo intervalo): volta para a primeira janela
+    ids = df[id_col] if id_col and id_col in df else pd.Series(df.index, index=df.index)
+    assinatura = (len(df), str(ids.iloc[0]), str(ids.iloc[-1]))
+    if st.session_state.get(chave_dados) != assinatura:
+        st.session_state[chave_dados] = assinatura
+        st.session_state[chave_janela] = janela
+
+    visiveis = df.iloc[:st.session_state[chave_janela]]
+    cards, rotulos = _cards_html(visiveis, title_col, id_col, subtitle_cols or [], fields or [])
+    ids_visiveis = ids.iloc[:len(visiveis)].tolist()
+
+    if action_label:
+        def _escolher():
+            posicao = st.session_state.get(chave_escolha)
+            if posicao is not None:
+                st.session_state[chave_clicado] = ids_visiveis[posicao]
+            st.session_state[chave_escolha] = None  # a próxima escolha volta a disparar
+
+        st.selectbox(
+            f"{action_label}:",
+            range(len(ids_visiveis)),
+            index=None,
+            format_func=lambda p: rotulos[p],
+            placeholder=f"Escolha um item para {action_label.lower()}...",
+            key=chave_escolha,
+            on_change=_escolher,
+        )
 
-    clicked_id = None
+    st.markdown("".join(cards), unsafe_allow_html=True)
 
-    for i, row in df.reset_index(drop=False).iterrows():
-        # Identificador único
-        if id_col and id_col in row:
-            item_id = row[id_col]
-        else:
-            # fallback: usa índice original, se existir
-            item_id = row.get("index", i)
-
-        # Título
-        if title_col and title_col in row:
-            title = str(row[title_col])
-        elif id_col and id_col in row:
-            title = f"#{row[id_col]}"
-        else:
-            title = f"Item {i+1}"
-
-        # Subtítulo
-        subtitle_parts = []
-        for col in subtitle_cols:
-            if col in row and str(row[col]).strip() != "":
-                subtitle_parts.append(str(row[col]))
-        subtitle = " • ".join(subtitle_parts)
-
-        # Card container
-        with st.container(border=True):
-            # ✅ Evita f-string aninhada com escapes (Python 3.11)
-            if subtitle:
-                subtitle_html = (
-                    f"<div style='color:#8b949e; font-size:0.95em;'>"
-                    f"{subtitle}"
-                    f"</div>"
-                )
-            else:
-                subtitle_html = ""
-
-            st.markdown(
-                f"<div style='display:flex; flex-direction:column; gap:4px;'>"
-                f"<div style='font-size:1.05em; font-weight:800; color:#f0f6fc;'>{title}</div>"
-                f"{subtitle_html}"
-                f"</div>",
-                unsafe_allow_html=True
-            )
-
-            # Campos
-            for lbl, col in fields:
-                if col in row:
-                    render_kv_row(lbl, str(row[col]))
+    restantes = len(df) - len(visiveis)
+    if restantes > 0:
+        def _carregar_mais():
+            st.session_state[chave_janela] += janela
 
-            # Ação
-            if action_label:
-                if st.button(action_label, key=f"{action_key_prefix}_{item_id}", use_container_width=True):
-                    clicked_id = item_id
+        st.button(
+            f"Carregar mais ({restantes} restantes)",
+            key=f"{action_key_prefix}_mais",
+            on_click=_carregar_mais,
+            use_container_width=True,
+        )
 
+    clicked_id = st.session_state.pop(chave_clicado, None)
     return clicked_id if return_on_click else None
 
 
-def is_mobile(breakpoint: int = 768) -> bool:
-    """Retorna True se a largura da tela for menor que breakpoint."""
-    if st_javascript is None:
-        return False  # fallback: assume desktop
+# Coluna com a cor do status nas tabelas (emoji); vai logo antes da coluna de status
+COLUNA_MARCADOR = "COR"
 
-    w = st_javascript("window.innerWidth")
-    try:
-        return int(w) < breakpoint
-    except Exception:
-        return False
+
+def marcadores_status(serie, icones, padrao: str = "") -> pd.Series:
+    """Marcador de cada status (`icones[status]`) como coluna categórica; status sem ícone -> `padrao`."""
+    return textos_coluna(serie).str.strip().map(icones).fillna(padrao).astype("category")
+
+
+@st.cache_data(show_spinner=False, max_entries=32)
+def preparar_tabela_status(df, coluna_status, icones, coluna_selecao="VER"):
+    """
+    Cópia de `df` pronta para o st.data_editor: caixa `coluna_selecao` na
+    frente e `COLUNA_MARCADOR` antes de `coluna_status`.
+
+    Substitui o `df.style.map(...)`: o Styler gerava CSS célula a célula e
+    mandava tudo junto com a tabela a cada rerun; o marcador é só mais uma
+    coluna de dados. Cacheado pelo conteúdo de `df`: uma vez por versão dos dados.
+    """
+    df_tab = df.copy()
+    df_tab.insert(df_tab.columns.get_loc(coluna_status), COLUNA_MARCADOR,
+                  marcadores_status(df_tab[coluna_status], icones))
+    df_tab.insert(0, coluna_selecao, False)
+    return df_tab
+
+
+def is_mobile(breakpoint: int = viewport.BREAKPOINT_MOBILE) -> bool:
+    """Retorna True se a largura da tela for menor que breakpoint (ver ui/viewport.py)."""
+    return viewport.is_mobile(breakpoint)
@@ -3,6 +3,7 @@ import time
 import math
 import services.database as db
 import ui.components as components
+import ui.viewport as viewport
 from ui.plotly_theme import aplicar_tema_plotly
 from services.validators import validar_entrada, ClienteInput
 from services.logging_module import LoggerStructurado
@@ -10,23 +11,6 @@ from services.logging_module import LoggerStructurado
 logger = LoggerStructurado("clientes_page")
 
 
-def _is_mobile(breakpoint: int = 768) -> bool:
-    """
-    Detecta mobile via JS (largura de tela).
-    - Requer: pip install streamlit-javascript
-    - Fallback: se não estiver instalado, assume desktop (tabela).
-    """
-    try:
-        from streamlit_javascript import st_javascript  # type: ignore
-        w = st_javascript("window.innerWidth")
-        try:
-            return int(w) < breakpoint
-        except Exception:
-            return False
-    except Exception:
-        return False
-
-
 def render_page(hash_dados, perfil):
     st.subheader("➕ Gestão de Clientes")
 
@@ -83,19 +67,21 @@ def lista_clientes_fragment():
     """
     Lista paginada de clientes. Interações (paginação, Voltar) reexecutam só este bloco.
     """
-    if "pag_atual_clientes" not in st.session_state:
-        st.session_state["pag_atual_clientes"] = 1
+    if not isinstance(st.session_state.get("pag_atual_clientes"), dict):
+        st.session_state["pag_atual_clientes"] = components.estado_pagina_inicial()
 
     TAMANHO_PAGINA = 20
-    df_clientes_view, total_registros = db.buscar_clientes_paginado(
-        st.session_state["pag_atual_clientes"],
-        TAMANHO_PAGINA
+    pagina = st.session_state["pag_atual_clientes"]
+    df_clientes_view, total_registros, cursores = db.buscar_clientes_paginado(
+        TAMANHO_PAGINA,
+        apos=pagina["apos"],
+        antes=pagina["antes"]
     )
     total_paginas = math.ceil(total_registros / TAMANHO_PAGINA) if TAMANHO_PAGINA > 0 else 1
 
     if not df_clientes_view.empty:
         st.caption(f"Total de registros na base: **{total_registros}**")
-        mobile = _is_mobile()
+        mobile = viewport.is_mobile()
 
         if not mobile:
             st.dataframe(
@@ -125,12 +111,11 @@ def lista_clientes_fragment():
                 action_key_prefix="cli_card"
             )
 
-        if total_paginas > 1:
+        if cursores["anterior"] is not None or cursores["proxima"] is not None:
             st.markdown("---")
-            nova_pagina = components.render_pagination(st.session_state["pag_atual_clientes"], total_paginas)
-            if nova_pagina != st.session_state["pag_atual_clientes"]:
-                st.session_state["pag_atual_clientes"] = nova_pagina
+            if components.render_pagination_cursor("pag_atual_clientes", cursores, total_paginas):
+                st.rerun(scope="fragment")
     else:
         st.info("Nenhum cliente encontrado nesta página.")
         if total_paginas > 0 and st.button("Voltar ao Início", key="cli_voltar_inicio"):
-            st.session_state["pag_atual_clientes"] = 1
+            st.session_state["pag_atual_clientes"] = components.estado_pagina_inicial()
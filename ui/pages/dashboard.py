@@ -1,29 +1,26 @@
 import streamlit as st
-import pandas as pd
 import plotly.express as px
-from datetime import datetime
+import pandas as pd
+from datetime import datetime, timedelta
 
-import services.database as db
+import services.indicadores as indicadores
 import ui.components as components
 import ui.styles as styles
-from core.config import PALETA_CORES
-
-
-def _is_mobile(breakpoint: int = 768) -> bool:
-    """
-    Detecta mobile via JS (largura de tela).
-    - Requer: pip install streamlit-javascript
-    - Fallback: se não estiver instalado, assume desktop (tabela).
-    """
-    try:
-        from streamlit_javascript import st_javascript  # type: ignore
-        w = st_javascript("window.innerWidth")
-        try:
-            return int(w) < breakpoint
-        except Exception:
-            return False
-    except Exception:
-        return False
+import ui.viewport as viewport
+from core.config import FUSO_BR, PALETA_CORES
+
+
+def _intervalo_do_periodo(filtro_tempo, hoje):
+    """(data_inicio, data_fim) de entrega do período escolhido; None = sem limite."""
+    if filtro_tempo == "Hoje":
+        return hoje, hoje
+    if filtro_tempo == "Últimos 7 Dias":
+        return hoje - timedelta(days=7), None
+    if filtro_tempo == "Mês Atual":
+        inicio = hoje.replace(day=1)
+        proximo_mes = (inicio + timedelta(days=32)).replace(day=1)
+        return inicio, proximo_mes - timedelta(days=1)
+    return None, None
 
 
 def render_page(hash_dados, perfil):
@@ -45,48 +42,30 @@ def render_page(hash_dados, perfil):
 
     st.markdown("---")
 
-    # OTIMIZAÇÃO: Usa a função com cache (TTL 5min) e Colunas Selecionadas (Leve)
-    df_bruto = db.buscar_pedidos_visualizacao()
-
-    if not df_bruto.empty:
-        df_dash = df_bruto.copy()
-        df_dash.columns = [c.upper().strip() for c in df_dash.columns]
-
-        col_dt = next((c for c in df_dash.columns if "ENTREGA" in c), None)
+    # OTIMIZAÇÃO: só os totais do período saem do banco (resumo mantido por
+    # trigger, migração 009) e os indicadores são calculados uma vez por
+    # período e versão dos dados, no cache compartilhado; aqui só se desenha.
+    data_inicio, data_fim = _intervalo_do_periodo(filtro_tempo, datetime.now(FUSO_BR).date())
+    kpi = indicadores.obter_indicadores(data_inicio, data_fim, versao=hash_dados)
 
-        if col_dt:
-            df_dash[col_dt] = pd.to_datetime(df_dash[col_dt], dayfirst=True, errors="coerce")
-            hoje = pd.Timestamp.now().normalize()
-
-            if filtro_tempo == "Hoje":
-                df_dash = df_dash[df_dash[col_dt] == hoje]
-            elif filtro_tempo == "Últimos 7 Dias":
-                df_dash = df_dash[df_dash[col_dt] >= (hoje - pd.Timedelta(days=7))]
-            elif filtro_tempo == "Mês Atual":
-                df_dash = df_dash[(df_dash[col_dt].dt.month == hoje.month) & (df_dash[col_dt].dt.year == hoje.year)]
-
-        total_pedidos = len(df_dash)
+    if kpi and kpi.total:
 
         # --- GRÁFICOS (PIZZA E BARRA) ---
         c_pizza, c_barra = st.columns(2)
         with c_pizza:
             with st.container(border=True):
                 st.markdown("#### Status dos Pedidos")
-                if "STATUS" in df_dash.columns:
-                    contagem_status = df_dash["STATUS"].value_counts().reset_index()
-                    contagem_status.columns = ["STATUS", "TOTAL"]
-
+                if kpi.status:
                     fig_status = px.pie(
-                        contagem_status,
-                        values="TOTAL",
-                        names="STATUS",
+                        values=[q for _, q in kpi.status],
+                        names=[s for s, _ in kpi.status],
                         hole=0.6,
-                        color="STATUS",
+                        color=[s for s, _ in kpi.status],
                         color_discrete_map=PALETA_CORES["STATUS"]
                     )
 
                     fig_status.add_annotation(
-                        text=f"<b>{total_pedidos}</b><br>PEDIDOS",
+                        text=f"<b>{kpi.total}</b><br>PEDIDOS",
                         showarrow=False,
                         font=dict(size=26, color="white")
                     )
@@ -115,10 +94,11 @@ def render_page(hash_dados, perfil):
         with c_barra:
             with st.container(border=True):
                 st.markdown("#### Preferência de Pagamento")
-                if "PAGAMENTO" in df_dash.columns:
-                    contagem_pg = df_dash["PAGAMENTO"].value_counts().reset_index()
-                    contagem_pg.columns = ["PAGAMENTO", "QTD"]
-                    contagem_pg = contagem_pg.sort_values("QTD", ascending=True)
+                if kpi.pagamento:
+                    contagem_pg = {
+                        "PAGAMENTO": [p for p, _ in kpi.pagamento],
+                        "QTD": [q for _, q in kpi.pagamento],
+                    }
 
                     fig_pg = px.bar(
                         contagem_pg, x="QTD", y="PAGAMENTO", orientation="h",
@@ -139,23 +119,12 @@ def render_page(hash_dados, perfil):
         c1, c2, c3 = st.columns(3)
 
         with c1:
-            entregues = len(df_dash[df_dash["STATUS"] == "ENTREGUE"]) if "STATUS" in df_dash.columns else 0
-            pct_saude = (entregues / total_pedidos * 100) if total_pedidos > 0 else 0
+            pct_saude = kpi.pct_saude
             classe_cor = "saude-baixa" if pct_saude < 50 else "saude-media" if pct_saude < 80 else "saude-alta"
             components.render_status_card("🩺 Saúde da Operação", f"{pct_saude:.1f}%", css_class=classe_cor)
 
         with c2:
-            if "STATUS" in df_dash.columns:
-                counts = df_dash["STATUS"].value_counts()
-
-                p_orcamento = int(counts.get("ORÇAMENTO", 0))
-                p_reservado = int(counts.get("RESERVADO", 0))
-                p_n_gerado = int(counts.get("NÃO GERADO", 0))
-                p_pendente = int(counts.get("PENDENTE", 0))
-                p_gerado = int(counts.get("GERADO", 0))
-
-                total_aguardando = p_orcamento + p_reservado + p_n_gerado + p_pendente + p_gerado
-
+            if kpi.status:
                 def make_chip(label, val, cor):
                     return (
                         f'<div class="status-chip">'
@@ -163,34 +132,31 @@ def render_page(hash_dados, perfil):
                         f'<span class="chip-label">{label}</span></div><span class="chip-val">{val}</span></div>'
                     )
 
-                help_html = (
-                    make_chip("Orçamento", p_orcamento, PALETA_CORES["STATUS"]["ORÇAMENTO"]) +
-                    make_chip("Reservado", p_reservado, PALETA_CORES["STATUS"]["RESERVADO"]) +
-                    make_chip("Não Gerado", p_n_gerado, PALETA_CORES["STATUS"]["NÃO GERADO"]) +
-                    make_chip("Pendente", p_pendente, PALETA_CORES["STATUS"]["PENDENTE"]) +
-                    make_chip("Gerado", p_gerado, PALETA_CORES["STATUS"]["GERADO"])
+                help_html = "".join(
+                    make_chip(rotulo, qtd, PALETA_CORES["STATUS"][status])
+                    for rotulo, status, qtd in kpi.aguardando
                 )
             else:
-                total_aguardando = 0
                 help_html = "Sem dados"
 
             components.render_status_card(
                 "⏳ Aguardando Processo",
-                total_aguardando,
+                kpi.total_aguardando,
                 inline_color="#FFA500",
                 help_text=help_html
             )
 
         with c3:
-            components.render_status_card("✅ Pedidos Entregues", entregues, inline_color="#28A745")
+            components.render_status_card("✅ Pedidos Entregues", kpi.entregues, inline_color="#28A745")
 
         # --- EVOLUÇÃO ---
         st.markdown("#### 📈 Evolução de Pedidos por Dia")
         with st.container(border=True):
-            if col_dt and not df_dash.empty:
-                evolucao_diaria = df_dash.groupby(df_dash[col_dt].dt.date).size().reset_index(name="QTD")
-                evolucao_diaria.columns = ["DATA", "QTD"]
-                evolucao_diaria = evolucao_diaria.sort_values("DATA")
+            if kpi.dias:
+                evolucao_diaria = {
+                    "DATA": [d for d, _ in kpi.dias],
+                    "QTD": [q for _, q in kpi.dias],
+                }
                 fig_evol = px.line(
                     evolucao_diaria, x="DATA", y="QTD", markers=True,
                     line_shape="spline", color_discrete_sequence=[cor_principal]
@@ -208,14 +174,12 @@ def render_page(hash_dados, perfil):
         # --- TOP CLIENTES ---
         st.markdown("#### 🏆 Top 5 Clientes do Período")
         with st.container(border=True):
-            if "NOME CLIENTE" in df_dash.columns:
-                top_clientes = df_dash["NOME CLIENTE"].value_counts().reset_index().head(5)
-                top_clientes.columns = ["CLIENTE", "QTD"]
-                top_clientes["CLIENTE"] = top_clientes["CLIENTE"].astype(str)
+            if kpi.clientes:
+                top_clientes = pd.DataFrame(kpi.clientes, columns=["CLIENTE", "QTD"])
 
-                max_pedidos = top_clientes["QTD"].max() if not top_clientes.empty else 1
+                max_pedidos = top_clientes["QTD"].max()
 
-                mobile = _is_mobile()
+                mobile = viewport.is_mobile()
 
                 # ✅ renderiza só um modo (nunca os dois)
                 if not mobile:
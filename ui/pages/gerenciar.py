@@ -1,39 +1,14 @@
+import functools
 import streamlit as st
 import time
 import math
-import io
 import pandas as pd
 
 import services.database as db
+import services.database.assincrono as adb
 import ui.components as components
-from datetime import datetime
-from core.config import LISTA_STATUS, LISTA_PAGAMENTO, PALETA_CORES
-
-
-def _is_mobile(breakpoint: int = 768) -> bool:
-    """
-    Detecta mobile via JS (largura de tela).
-    - Requer: pip install streamlit-javascript
-    - Fallback: se não estiver instalado, assume desktop (tabela).
-    """
-    try:
-        from streamlit_javascript import st_javascript  # type: ignore
-        w = st_javascript("window.innerWidth")
-        try:
-            return int(w) < breakpoint
-        except Exception:
-            return False
-    except Exception:
-        return False
-
-
-# --- FUNÇÃO AUXILIAR DE ESTILO (FORMATAÇÃO CONDICIONAL) ---
-def highlight_status(val):
-    val_limpo = str(val).strip()
-    cor = PALETA_CORES["STATUS"].get(val_limpo, None)
-    if cor:
-        return f'background-color: {cor}; color: black; font-weight: 600;'
-    return ''
+import ui.viewport as viewport
+from core.config import ICONES_STATUS, LIMITE_EXPORTACAO_XLSX, LISTA_STATUS, LISTA_PAGAMENTO, PALETA_CORES, TAMANHO_PAGINA_PEDIDOS
 
 
 def _tentar_navegar_para_edicao():
@@ -74,7 +49,7 @@ def mostrar_detalhes_pedido(row, perfil, nome_user):
     l1, l2 = st.columns(2)
     with l1:
         st.markdown("**📅 Entrega:**")
-        st.write(row.get('DIA DA ENTREGA', '-'))
+        st.write(components.texto_celula(row.get('DIA DA ENTREGA'), vazio='-'))
     with l2:
         st.markdown("**🚚 Rota:**")
         st.write(row.get('ROTA', '-'))
@@ -125,35 +100,74 @@ def mostrar_detalhes_pedido(row, perfil, nome_user):
             st.rerun()
 
 
+def painel_exportacao(filtros_db, data_inicio, data_fim, total_registros, assinatura):
+    """Botão de exportação: gera XLSX/CSV de todo o resultado filtrado só quando pedido."""
+    with st.popover("📥 Exportar Resultado"):
+        historico = st.toggle("Histórico completo (ignora os filtros)", key="gerenciar_exp_historico")
+        if historico:
+            gerar_lotes, rotulo = db.lotes_pedidos, "Gerar arquivo (todos os pedidos)"
+            assinatura = "historico"
+        else:
+            gerar_lotes = functools.partial(db.lotes_pedidos, filtros_db, data_inicio, data_fim)
+            rotulo = f"Gerar arquivo ({total_registros} pedidos)"
+        if total_registros > LIMITE_EXPORTACAO_XLSX:
+            st.caption(f"Mais de {LIMITE_EXPORTACAO_XLSX:,} pedidos: CSV gera e abre mais rápido.".replace(",", "."))
+        components.render_exportacao(
+            "gerenciar_exp", gerar_lotes, "pedidos_jt", aba="Pedidos", assinatura=assinatura,
+            formato_padrao="CSV" if historico or total_registros > LIMITE_EXPORTACAO_XLSX else "Excel",
+            rotulo=rotulo
+        )
+
+
 @st.fragment
 def tabela_gestao_interativa(perfil, nome_user):
-    opts_cid, opts_rota = db.listar_dados_filtros()
+    # Filtros escolhidos (estado dos widgets do rerun anterior): permitem buscar
+    # as opções dos filtros e a página ao mesmo tempo, antes de desenhar a tela
+    filtros_db = {}
+    for chave in ["status", "cidade", "rota"]:
+        selecao = st.session_state.get(f"gerenciar_f_{chave}")
+        if selecao:
+            filtros_db[chave] = selecao
+
+    # período só vale com as duas datas escolhidas
+    periodo = st.session_state.get("gerenciar_f_periodo") or ()
+    data_inicio, data_fim = periodo if len(periodo) == 2 else (None, None)
+
+    # filtros novos recomeçam da primeira página
+    assinatura = sorted((k, sorted(v)) for k, v in filtros_db.items()) + [("periodo", [data_inicio, data_fim])]
+    if st.session_state.get("pag_filtros_gerenciar") != assinatura:
+        st.session_state["pag_filtros_gerenciar"] = assinatura
+        st.session_state["pag_atual_gerenciar"] = components.estado_pagina_inicial()
+
+    TAMANHO_PAGINA = TAMANHO_PAGINA_PEDIDOS
+    pagina = st.session_state["pag_atual_gerenciar"]
+    futuro_filtros = adb.listar_dados_filtros()
+    futuro_pagina = adb.buscar_pedidos_paginado(
+        tamanho_pagina=TAMANHO_PAGINA,
+        filtros=filtros_db,
+        apos=pagina["apos"],
+        antes=pagina["antes"],
+        data_inicio=data_inicio,
+        data_fim=data_fim
+    )
+    (opts_cid, opts_rota), (df_gestao, total_registros, cursores) = futuro_filtros.result(), futuro_pagina.result()
 
     with st.expander("🔍 Filtros de Busca (Processamento no Servidor)", expanded=True):
         c_f1, c_f2, c_f3, c_f4 = st.columns(4)
         with c_f1:
-            f_status = st.multiselect("Status:", LISTA_STATUS)
+            st.multiselect("Status:", LISTA_STATUS, key="gerenciar_f_status")
         with c_f2:
-            f_data = st.date_input("Período (Filtro Local):", value=[], format="DD/MM/YYYY")
+            st.date_input("Período:", value=[], format="DD/MM/YYYY", key="gerenciar_f_periodo")
         with c_f3:
-            f_cidade = st.multiselect("Cidade:", opts_cid)
+            st.multiselect("Cidade:", opts_cid, key="gerenciar_f_cidade")
         with c_f4:
-            f_rota = st.multiselect("Rota:", opts_rota)
+            st.multiselect("Rota:", opts_rota, key="gerenciar_f_rota")
 
-    filtros_db = {}
-    if f_status:
-        filtros_db["status"] = f_status
-    if f_cidade:
-        filtros_db["cidade"] = f_cidade
-    if f_rota:
-        filtros_db["rota"] = f_rota
-
-    TAMANHO_PAGINA = 20
-    df_gestao, total_registros = db.buscar_pedidos_paginado(
-        pagina_atual=st.session_state["pag_atual_gerenciar"],
-        tamanho_pagina=TAMANHO_PAGINA,
-        filtros=filtros_db
-    )
+    # período que o banco não consegue filtrar: avisa em vez de listar tudo
+    aviso_periodo = db.erro_periodo(data_inicio, data_fim)
+    if aviso_periodo:
+        st.warning(f"⚠️ {aviso_periodo}")
+        return
 
     total_paginas = math.ceil(total_registros / TAMANHO_PAGINA) if TAMANHO_PAGINA > 0 else 1
 
@@ -163,28 +177,11 @@ def tabela_gestao_interativa(perfil, nome_user):
 
     df_gestao.columns = [c.upper().strip() for c in df_gestao.columns]
 
-    # filtro local de data
     df_display = df_gestao.copy()
-    col_dt_display = next((c for c in df_display.columns if "ENTREGA" in c), None)
-
-    if f_data and col_dt_display and len(f_data) == 2:
-        ini, fim = f_data
-        dts = pd.to_datetime(df_display[col_dt_display], dayfirst=True, errors='coerce').dt.date
-        df_display = df_display[(dts >= ini) & (dts <= fim)]
-
-    # exportação
-    with st.container():
-        buffer = io.BytesIO()
-        with pd.ExcelWriter(buffer, engine='xlsxwriter') as writer:
-            df_display.to_excel(writer, index=False, sheet_name='Pedidos')
-
-        st.download_button(
-            label="📥 Baixar Tabela em Excel",
-            data=buffer,
-            file_name=f"pedidos_jt_{datetime.now().strftime('%d-%m-%Y')}.xlsx",
-            mime="application/vnd.ms-excel",
-            type="secondary"
-        )
+
+    # exportação sob demanda: o arquivo só é gerado no clique e cobre todo o
+    # resultado filtrado (em lotes no servidor), não só a página exibida
+    painel_exportacao(filtros_db, data_inicio, data_fim, total_registros, assinatura)
 
     cfg_visual = {
         "ID_PEDIDO": st.column_config.NumberColumn("🆔 ID", format="%d", width="small"),
@@ -193,7 +190,7 @@ def tabela_gestao_interativa(perfil, nome_user):
         "CIDADE": st.column_config.TextColumn("📍 Cidade", width="small"),
         "ROTA": st.column_config.TextColumn("🚚 Rota", width="small"),
         "PEDIDO": st.column_config.TextColumn("📝 Itens", width="medium"),
-        "DIA DA ENTREGA": st.column_config.TextColumn("📅 Entrega"),
+        "DIA DA ENTREGA": st.column_config.DateColumn("📅 Entrega", format="DD/MM/YYYY"),
         "STATUS": st.column_config.TextColumn("📊 Status", width="medium"),
         "PAGAMENTO": st.column_config.TextColumn("💳 Pagamento", width="medium"),
         "NR PEDIDO": st.column_config.TextColumn("🔢 NR", width="small"),
@@ -203,19 +200,18 @@ def tabela_gestao_interativa(perfil, nome_user):
         "VERSAO": None
     }
 
-    mobile = _is_mobile()
+    mobile = viewport.is_mobile()
 
     if not mobile:
         # =========================
         # DESKTOP = TABELA
         # =========================
-        df_tab = df_display.copy()
-        df_tab.insert(0, "VER", False)
+        # cor do status como coluna de dados (sem Styler), preparada uma vez por página/versão
+        df_tab = components.preparar_tabela_status(df_display, "STATUS", ICONES_STATUS)
 
         cfg_visual_tab = dict(cfg_visual)
         cfg_visual_tab["VER"] = st.column_config.CheckboxColumn("🔍 Ver", width="small")
-
-        df_styled = df_tab.style.map(highlight_status, subset=["STATUS"])
+        cfg_visual_tab[components.COLUNA_MARCADOR] = st.column_config.TextColumn("🎨", width="small")
 
         if perfil == "Admin":
             st.info("👆 Clique na caixa da primeira coluna para **Ver Detalhes**.")
@@ -223,7 +219,7 @@ def tabela_gestao_interativa(perfil, nome_user):
             st.info("👆 Clique na caixa da primeira coluna para **Ver Detalhes** e depois **Ir para Edição**.")
 
         df_editado = st.data_editor(
-            df_styled,
+            df_tab,
             column_config=cfg_visual_tab,
             use_container_width=True,
             height=600,
@@ -264,12 +260,11 @@ def tabela_gestao_interativa(perfil, nome_user):
                 st.session_state.pedido_para_visualizar = linha.iloc[0].to_dict()
                 st.rerun()
 
-    # paginação (sem st.rerun: o fragment reexecuta sozinho ao clicar no botão)
-    if total_paginas > 1:
+    # paginação por cursor (reexecuta só o fragment com a nova página)
+    if cursores["anterior"] is not None or cursores["proxima"] is not None:
         st.markdown("---")
-        nova_pagina = components.render_pagination(st.session_state["pag_atual_gerenciar"], total_paginas)
-        if nova_pagina != st.session_state["pag_atual_gerenciar"]:
-            st.session_state["pag_atual_gerenciar"] = nova_pagina
+        if components.render_pagination_cursor("pag_atual_gerenciar", cursores, total_paginas):
+            st.rerun(scope="fragment")
 
 
 def render_page(hash_dados, perfil, nome_user):
@@ -277,8 +272,8 @@ def render_page(hash_dados, perfil, nome_user):
         st.session_state.gerenciar_editor_key = 0
     if "pedido_para_visualizar" not in st.session_state:
         st.session_state.pedido_para_visualizar = None
-    if "pag_atual_gerenciar" not in st.session_state:
-        st.session_state["pag_atual_gerenciar"] = 1
+    if not isinstance(st.session_state.get("pag_atual_gerenciar"), dict):
+        st.session_state["pag_atual_gerenciar"] = components.estado_pagina_inicial()
 
     titulo = "👁️ Visão Geral" if perfil == "Admin" else "🚚 Painel de Operações"
     st.subheader(titulo)
@@ -69,7 +69,7 @@ def _voltar_para_tabela_op():
 
     # opcional: volta para página 1 da tabela
     if "pag_atual_gerenciar" in st.session_state:
-        st.session_state["pag_atual_gerenciar"] = 1
+        st.session_state["pag_atual_gerenciar"] = components.estado_pagina_inicial()
 
     st.rerun()
 
@@ -149,7 +149,7 @@ def render_page(hash_dados, perfil, nome_user):
     cliente = pedido_row.get("NOME CLIENTE", pedido_row.get("CLIENTE", ""))
     cidade = pedido_row.get("CIDADE", "")
     rota = pedido_row.get("ROTA", "")
-    entrega = pedido_row.get("DIA DA ENTREGA", pedido_row.get("ENTREGA", "-"))
+    entrega = components.texto_celula(pedido_row.get("DIA DA ENTREGA", pedido_row.get("ENTREGA")), vazio="-")
 
     val_status_atual = pedido_row.get("STATUS", "-")
     val_pagamento_atual = pedido_row.get("PAGAMENTO", "-")
@@ -239,13 +239,13 @@ def render_page(hash_dados, perfil, nome_user):
         }])
 
         try:
-            db.atualizar_pedidos_editaveis(df_update, usuario_logado=nome_user)
+            relatorio = db.atualizar_pedidos_editaveis(df_update, usuario_logado=nome_user)
 
-            # limpa cache de dados caso você use @st.cache_data em fetchs
-            try:
-                st.cache_data.clear()
-            except Exception:
-                pass
+            falhas = relatorio[relatorio["RESULTADO"].isin(["erro", "nao_encontrado"])]
+            if not falhas.empty:
+                motivo = falhas.iloc[0]["ERRO"] or "Pedido não encontrado no banco."
+                st.error(f"Erro ao atualizar: {motivo}")
+                return
 
             st.success("✅ Pedido atualizado com sucesso!")
             time.sleep(0.6)
@@ -1,5 +1,4 @@
 import streamlit as st
-import pandas as pd
 import time
 from datetime import datetime
 import services.database as db
@@ -11,25 +10,6 @@ from services.logging_module import LoggerStructurado
 
 logger = LoggerStructurado("pedidos_page")
 
-# --- FUNÇÃO DE CACHE LOCAL ---
-@st.cache_data(ttl=300, show_spinner=False)
-def carregar_clientes_cache(_hash_versao):
-    """
-    Busca a tabela de clientes otimizada e mantém em cache por 5 min.
-    O parâmetro _hash_versao força a atualização se houver mudanças.
-    """
-    try:
-        client = db.get_db_client()
-        response = client.table("clientes").select('Cliente, "Nome Cidade", ROTA').execute()
-        
-        if response.data:
-            df = pd.DataFrame(response.data)
-            df.columns = [str(c).strip() for c in df.columns]
-            return df
-    except Exception:
-        pass
-    return pd.DataFrame()
-
 # --- NOVO: FRAGMENTO DE ITENS DO PEDIDO ---
 @st.fragment
 def painel_itens_pedido(cli, dt, rota_cli, pg, stt, cor_principal, form_id):
@@ -65,7 +45,7 @@ def render_page(hash_dados, perfil, nome_user):
         st.session_state.show_modal_confirmar = False
 
     # --- 1. BUSCA OTIMIZADA DE CLIENTES (CACHE) ---
-    df_clientes_completo = carregar_clientes_cache(hash_dados)
+    df_clientes_completo = db.listar_clientes_rotas(versao=hash_dados)
 
     lista_nomes = []
     if not df_clientes_completo.empty:
@@ -127,9 +107,6 @@ def render_page(hash_dados, perfil, nome_user):
                                 usuario_logado=nome_user
                             )
                             
-                            # Limpa o cache local
-                            carregar_clientes_cache.clear()
-                            
                             st.toast(f"✅ Pedido salvo com sucesso!", icon="🎉")
                             time.sleep(1.5)
                             
@@ -255,12 +232,11 @@ def render_page(hash_dados, perfil, nome_user):
             st.write("")
             st.write("")
             try:
-                df_vol = db.buscar_pedidos_visualizacao()
+                df_vol = db.buscar_pedidos_visualizacao(versao=hash_dados)
                 if not df_vol.empty:
-                    data_sel = dt.strftime("%d/%m/%Y")
                     col_entrega = next((c for c in df_vol.columns if "ENTREGA" in c.upper()), None)
                     if col_entrega:
-                        pedidos_no_dia = len(df_vol[df_vol[col_entrega] == data_sel])
+                        pedidos_no_dia = int((df_vol[col_entrega].dt.date == dt).sum())
                         st.metric("📅 Agendamentos do Dia", f"{pedidos_no_dia} Pedidos")
             except:
                 pass
@@ -3,25 +3,76 @@ Página de Recebimento de Salmão.
 """
 import streamlit as st
 import pandas as pd
-import io
 from datetime import datetime
 
 import services.database as db
+import services.exportacao as exportacao
 import ui.components as components
-from ui.pages.salmao_utils import preparar_dataframe_view
-from ui.pages.salmao_modals import modal_detalhes_tag, highlight_status_salmao
+import ui.viewport as viewport
+from ui.pages.salmao_utils import arquivo_exportacao, preparar_dataframe_view
+from ui.pages.salmao_modals import ICONES_SALMAO, modal_detalhes_tag
 
 
-def _is_mobile(breakpoint: int = 768) -> bool:
-    try:
-        from streamlit_javascript import st_javascript  # type: ignore
-        w = st_javascript("window.innerWidth")
-        try:
-            return int(w) < breakpoint
-        except Exception:
-            return False
-    except Exception:
-        return False
+_FORMATOS_EXPORTACAO = {"Excel": "xlsx", "CSV": "csv", "Parquet": "parquet"}
+
+
+def _trabalho_exportacao(range_atual, formato, hash_dados, refazer=False):
+    """
+    Gera (ou reaproveita) em segundo plano o arquivo da faixa no formato
+    escolhido. A chave leva só a versão das tabelas do arquivo: um pedido
+    salvo não descarta a planilha pronta.
+    """
+    tag_inicio, tag_fim = range_atual
+    versao = hash_dados if isinstance(hash_dados, db.VersaoDados) else db.obter_versao_planilha()
+    chave = ("salmao", tag_inicio, tag_fim, formato, versao.de(*arquivo_exportacao.tabelas))
+    return exportacao.em_segundo_plano(
+        chave, lambda: arquivo_exportacao(tag_inicio, tag_fim, formato, versao=versao), refazer=refazer
+    )
+
+
+def _botao_exportacao(arquivo, formato):
+    extensao = _FORMATOS_EXPORTACAO[formato]
+    st.download_button(
+        label=f"📥 Baixar Tabela (Com Gerados) - {formato}",
+        data=arquivo,
+        file_name=f"estoque_salmao_completo_{datetime.now().strftime('%d-%m-%Y')}.{extensao}",
+        mime=exportacao.FORMATOS[extensao],
+        type="secondary"
+    )
+
+
+@st.fragment(run_every=1)
+def _aguardar_exportacao(futuro):
+    """Enquanto o arquivo é gerado, confere a cada segundo; pronto, redesenha a página."""
+    if futuro.done():
+        st.rerun()
+    st.caption("⏳ Preparando a planilha (atual + histórico)...")
+
+
+def painel_exportacao(range_atual, hash_dados):
+    """
+    Exportação da faixa carregada (estoque atual + histórico), preparada em
+    segundo plano e guardada em cache por faixa e versão dos dados: mexer nos
+    filtros da tabela não gera planilha nenhuma.
+    """
+    if not range_atual:
+        return
+    formato = st.segmented_control(
+        "Formato da exportação:", list(_FORMATOS_EXPORTACAO), default="Excel",
+        key="salmao_exp_formato", label_visibility="collapsed"
+    ) or "Excel"
+    extensao = _FORMATOS_EXPORTACAO[formato]
+    refazer = st.session_state.pop("salmao_exp_refazer", False)
+    futuro = _trabalho_exportacao(range_atual, extensao, hash_dados, refazer=refazer)
+    if not futuro.done():
+        _aguardar_exportacao(futuro)
+    elif futuro.exception() is not None:
+        components.render_error_details("Não foi possível gerar a planilha", futuro.exception())
+        if st.button("🔄 Tentar novamente", key="salmao_exp_tentar"):
+            st.session_state.salmao_exp_refazer = True
+            st.rerun()
+    else:
+        _botao_exportacao(futuro.result(), formato)
 
 
 @st.fragment
@@ -45,30 +96,6 @@ def painel_tabela_interativa(df_base, perfil, range_str):
 
     st.markdown(f"### 📋 Tabela Geral: {range_str}")
 
-    range_atual = st.session_state.get("range_salmao_atual")
-    buffer = io.BytesIO()
-    with pd.ExcelWriter(buffer, engine="xlsxwriter") as writer:
-        df_export = df_view.copy()
-        if range_atual:
-            df_backup = db.get_estoque_backup_filtrado(range_atual[0], range_atual[1])
-            if not df_backup.empty:
-                df_backup_view = preparar_dataframe_view(df_backup)
-                df_export["Origem"] = "Atual / Livre"
-                df_backup_view["Origem"] = "Histórico / Gerado"
-                df_export = pd.concat([df_export, df_backup_view], ignore_index=True)
-        if "Tag" in df_export.columns:
-            sort_by = ["Tag", "Origem"] if "Origem" in df_export.columns else ["Tag"]
-            df_export = df_export.sort_values(by=sort_by)
-        df_export.to_excel(writer, index=False, sheet_name="Salmao_Completo")
-
-    st.download_button(
-        label="📥 Baixar Tabela (Com Gerados)",
-        data=buffer,
-        file_name=f"estoque_salmao_completo_{datetime.now().strftime('%d-%m-%Y')}.xlsx",
-        mime="application/vnd.ms-excel",
-        type="secondary"
-    )
-
     cfg_colunas = {
         "Tag": st.column_config.NumberColumn("Tag", format="%d", width="small"),
         "Calibre": st.column_config.TextColumn("Calibre", width="small"),
@@ -79,20 +106,20 @@ def painel_tabela_interativa(df_base, perfil, range_str):
         "Fornecedor": st.column_config.TextColumn("Fornecedor", width="medium"),
     }
 
-    mobile = _is_mobile()
+    mobile = viewport.is_mobile()
 
     if not mobile:
-        df_tab = df_view.copy()
-        df_tab.insert(0, "VER", False)
+        # cor do status como coluna de dados (sem Styler), preparada uma vez por versão/filtro
+        df_tab = components.preparar_tabela_status(df_view, "Status", ICONES_SALMAO)
         cfg_colunas_tab = dict(cfg_colunas)
         cfg_colunas_tab["VER"] = st.column_config.CheckboxColumn(
             "Editar" if perfil != "Admin" else "Ver",
             width="small"
         )
-        df_styled = df_tab.style.map(highlight_status_salmao, subset=["Status"])
+        cfg_colunas_tab[components.COLUNA_MARCADOR] = st.column_config.TextColumn("🎨", width="small")
 
         tabela = st.data_editor(
-            df_styled,
+            df_tab,
             key=f"editor_salmao_{st.session_state.salmao_editor_key}",
             use_container_width=True,
             height=500,
@@ -193,6 +220,7 @@ def render_page(hash_dados, perfil, nome_user):
                 st.session_state.range_salmao_atual = (tag_start, tag_end)
 
     if not st.session_state.salmao_df.empty:
+        painel_exportacao(st.session_state.range_salmao_atual, hash_dados)
         painel_tabela_interativa(
             st.session_state.salmao_df,
             perfil,
@@ -209,3 +237,9 @@ def render_page(hash_dados, perfil, nome_user):
     else:
         if st.session_state.get("salmao_range_str"):
             st.warning("Nenhum dado encontrado.")
+
+    with st.expander("🗄️ Exportar Histórico Completo (tags arquivadas)"):
+        components.render_exportacao(
+            "salmao_historico", db.lotes_historico_salmao, "estoque_salmao_historico",
+            aba="Historico", formato_padrao="CSV", rotulo="Gerar arquivo do histórico"
+        )
@@ -14,14 +14,11 @@ PALETA_SALMAO = {
     "Gerado": "#ff8500", "Aberto": "#473822"
 }
 
-
-def highlight_status_salmao(val):
-    val_limpo = str(val).strip()
-    cor = PALETA_SALMAO.get(val_limpo, None)
-    if cor:
-        cor_texto = "black" if val_limpo in ["Orçamento"] else "white"
-        return f'background-color: {cor}; color: {cor_texto}; font-weight: 600;'
-    return ''
+# Marcador de status na tabela (mesma cor da PALETA_SALMAO, como texto)
+ICONES_SALMAO = {
+    "Livre": "🟢", "Reservado": "🔵", "Orçamento": "⚪",
+    "Gerado": "🟠", "Aberto": "🟤"
+}
 
 
 @st.dialog("🐟 Detalhes da Tag")
@@ -31,7 +28,8 @@ def modal_detalhes_tag(row_dict, perfil, nome_user, range_atual):
     if not status_db or str(status_db).strip() in ["", "None"]:
         status_db = "Livre"
 
-    peso_banco = float(row_dict.get("Peso", 0))
+    # Peso vem como float32: arredonda para não gravar 10.199999809 de volta
+    peso_banco = round(float(row_dict.get("Peso", 0)), 3)
     key_input_peso = f"num_peso_{tag_id}"
     peso_considerado = st.session_state.get(key_input_peso, peso_banco)
 
@@ -4,6 +4,9 @@ Utilitários para a página de salmão.
 import pandas as pd
 import streamlit as st
 
+import services.database as db
+import services.exportacao as exportacao
+
 
 @st.cache_data(show_spinner=False)
 def preparar_dataframe_view(df_input):
@@ -16,19 +19,31 @@ def preparar_dataframe_view(df_input):
 
     df_view = df_input.copy()
 
+    # Colunas de texto chegam como category (services/database/esquemas.py):
+    # limpa como texto e volta para category
     cols_texto = ["Calibre", "Cliente", "Fornecedor"]
     for c in cols_texto:
         if c in df_view.columns:
-            df_view[c] = df_view[c].fillna("").astype(str).replace("None", "").replace("nan", "")
+            df_view[c] = (
+                df_view[c]
+                .astype(object)
+                .fillna("")
+                .astype(str)
+                .replace("None", "")
+                .replace("nan", "")
+                .astype("category")
+            )
 
     if "Status" in df_view.columns:
         df_view["Status"] = (
             df_view["Status"]
+            .astype(object)
             .fillna("Livre")
             .astype(str)
             .replace("None", "Livre")
             .replace("nan", "Livre")
             .replace("", "Livre")
+            .astype("category")
         )
 
     if "Peso" in df_view.columns:
@@ -38,3 +53,23 @@ def preparar_dataframe_view(df_input):
         df_view["Validade"] = pd.to_datetime(df_view["Validade"], format="%d/%m/%Y", errors="coerce")
 
     return df_view
+
+
+@db.cache_por_versao("estoque_salmao", "estoque_salmao_backup", ttl=3600, max_entries=16, show_spinner=False)
+def arquivo_exportacao(tag_inicio, tag_fim, formato):
+    """
+    Estoque atual + histórico arquivado das tags `tag_inicio`..`tag_fim`, como
+    arquivo `formato` ("xlsx", "csv" ou "parquet"). Um arquivo por faixa,
+    formato e versão dos dados, compartilhado por todas as sessões.
+    """
+    atual = preparar_dataframe_view(db.get_estoque_filtrado(tag_inicio, tag_fim))
+    historico = preparar_dataframe_view(db.get_estoque_backup_filtrado(tag_inicio, tag_fim))
+    partes = [
+        df.assign(Origem=origem)
+        for df, origem in ((atual, "Atual / Livre"), (historico, "Histórico / Gerado"))
+        if not df.empty
+    ]
+    df_export = pd.concat(partes, ignore_index=True) if partes else pd.DataFrame()
+    if "Tag" in df_export.columns:
+        df_export = df_export.sort_values(by=["Tag", "Origem"], kind="stable")
+    return exportacao.exportar([df_export], formato, aba="Salmao_Completo")
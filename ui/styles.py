@@ -283,6 +283,20 @@ def aplicar_estilos(perfil="Admin"):
             padding: 15px;
         }}
 
+        /* --- LISTA DE CARDS (mobile, components.render_df_as_list_cards) --- */
+        .lista-card {{
+            border-radius: 12px;
+            border: 1px solid #30363d;
+            background-color: #161b22;
+            padding: 15px;
+            margin-bottom: 12px;
+        }}
+        .lista-card-titulo {{ font-size: 1.05em; font-weight: 800; color: #f0f6fc; }}
+        .lista-card-sub {{ color: #8b949e; font-size: 0.95em; margin-bottom: 4px; }}
+        .lista-card-campo {{ display: flex; gap: 8px; margin: 2px 0; }}
+        .lista-card-campo span:first-child {{ color: #8b949e; min-width: 110px; }}
+        .lista-card-campo span:last-child {{ color: #f0f6fc; font-weight: 600; }}
+
         /* ============================================================
            BOTÕES E LINKS (GLOBAL)
            ============================================================ */
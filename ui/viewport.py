@@ -0,0 +1,59 @@
+"""
+Largura da tela do navegador, medida uma vez por sessão.
+
+`st_javascript` é um componente: cada chamada é uma ida e volta ao navegador
+(e um rerun extra quando o valor chega). As páginas perguntavam a largura a
+cada rerun, inclusive dentro de fragments. Agora o app.py chama `medir()`
+uma vez por rerun, fora de qualquer fragment; o componente só é desenhado
+enquanto a largura não é conhecida, e o valor fica em `st.session_state`.
+`is_mobile()` só lê esse valor.
+
+`remedir()` é o sinal explícito de redimensionamento (ex.: celular girado):
+descarta a largura guardada e o próximo `medir()` pergunta de novo.
+
+Requer: pip install streamlit-javascript. Sem ele, assume desktop (tabela).
+"""
+import streamlit as st
+
+try:
+    from streamlit_javascript import st_javascript  # type: ignore
+except Exception:
+    st_javascript = None
+
+BREAKPOINT_MOBILE = 768
+
+_CHAVE_LARGURA = "viewport_largura"
+# Muda a key do componente a cada nova medição (uma instância nova é medida de novo)
+_CHAVE_MEDICAO = "viewport_medicao"
+
+
+def medir():
+    """Mede a largura da tela se ainda não for conhecida nesta sessão."""
+    if st_javascript is None or st.session_state.get(_CHAVE_LARGURA):
+        return
+    medicao = st.session_state.get(_CHAVE_MEDICAO, 0)
+    valor = st_javascript("window.innerWidth", key=f"viewport_js_{medicao}")
+    try:
+        largura = int(valor)
+    except (TypeError, ValueError):
+        return
+    # 0 = resposta do navegador ainda não chegou (o componente pede o rerun)
+    if largura > 0:
+        st.session_state[_CHAVE_LARGURA] = largura
+
+
+def remedir():
+    """Descarta a largura guardada; o próximo `medir()` vai ao navegador de novo."""
+    st.session_state.pop(_CHAVE_LARGURA, None)
+    st.session_state[_CHAVE_MEDICAO] = st.session_state.get(_CHAVE_MEDICAO, 0) + 1
+
+
+def largura():
+    """Largura da tela em px, ou None se ainda não medida."""
+    return st.session_state.get(_CHAVE_LARGURA)
+
+
+def is_mobile(breakpoint: int = BREAKPOINT_MOBILE) -> bool:
+    """True se a tela medida for mais estreita que `breakpoint` (sem medição: desktop)."""
+    valor = largura()
+    return valor is not None and valor < breakpoint